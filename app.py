@@ -1,12 +1,23 @@
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+
+from utils.charts import breakdown, gauge
+from utils.distributions import DISTRIBUTIONS, load_realized_data
+from utils.figures import cached_figure
+from utils.filters import labelled, payment_filters
+from utils.indicators import load_distribution_kpis
+from utils.queries import payment_summary
+from utils.reconciliation import MISMATCHES, load_reconciliation
+from utils.store import available_distributions, distribution_number
+from utils.tracing import performance_panel, trace_page
+from utils.versioning import value_version
+from utils.warmup import warm_up
 
 # --------------------------------------------------
 # CONFIGURATION
 # --------------------------------------------------
 st.set_page_config(page_title="ZARA MIRA – Dashboard", layout="wide")
+warm_up()
+trace = trace_page("app")
 
 # --------------------------------------------------
 # STYLE
@@ -58,36 +69,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --------------------------------------------------
-# DONNÉES RÉALISÉES (1–3)
-# --------------------------------------------------
-realized_data = {
-    "Distribution 1": {
-        "coverage_period": "4 Months",
-        "payment_code": "PP-2670-25-00000001",
-        "households_plan": 17788,
-        "households_reach": 16487,
-        "cash_plan": 1943720000,
-        "cash_reach": 1821600000
-    },
-    "Distribution 2": {
-        "coverage_period": "4 Months",
-        "payment_code": "PP-2670-25-00000005",
-        "households_plan": 17798,
-        "households_reach": 16243,
-        "cash_plan": 1103700000,
-        "cash_reach": 958340000
-    },
-    "Distribution 3": {
-        "coverage_period": "4 Months",
-        "payment_code": "PP-2670-25-00000006",
-        "households_plan": 28022,
-        "households_reach": 26215,
-        "cash_plan": 3443280000,
-        "cash_reach": 3200900000
-    }
-}
+# DONNÉES RÉALISÉES
+# --------------------------------------------------
+trace.section("données")
+realized_data = load_realized_data()
 
-distributions = [f"Distribution {i}" for i in range(1, 11)]
+distributions = DISTRIBUTIONS
 
 # --------------------------------------------------
 # HEADER
@@ -107,16 +94,22 @@ if selected_distribution not in realized_data:
       This distribution has no operational data available yet.
     </div>
     """, unsafe_allow_html=True)
+    trace.end()
+    performance_panel()
     st.stop()
 
 # --------------------------------------------------
 # EXTRACTION DONNÉES
 # --------------------------------------------------
+trace.section("kpi")
 d = realized_data[selected_distribution]
+distribution = distribution_number(selected_distribution)
+
+kpis = load_distribution_kpis(realized_data).loc[selected_distribution]
 
-coverage_rate = (d["households_reach"] / d["households_plan"]) * 100
-delivery_rate = (d["cash_reach"] / d["cash_plan"]) * 100
-undelivered = d["cash_plan"] - d["cash_reach"]
+coverage_rate = kpis["coverage_rate"]
+delivery_rate = kpis["delivery_rate"]
+undelivered = kpis["undelivered"]
 
 # Sous-titre dynamique
 st.markdown(f"""
@@ -170,70 +163,78 @@ with col4:
 # --------------------------------------------------
 # GAUGES
 # --------------------------------------------------
+trace.section("jauges")
 st.markdown('<div class="section-title">Operational Performance</div>', unsafe_allow_html=True)
 
+# Figures are served from a cache shared by all sessions, keyed on the
+# selected distribution and a fingerprint of its figures.
+figure_version = value_version(d)
+
 col5, col6 = st.columns(2)
 
 with col5:
-    fig_cov = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=coverage_rate,
-        title={'text': "Household Coverage (%)"},
-        gauge={'axis': {'range': [0, 100]},
-               'bar': {'color': "#005b96"}}
-    ))
-    fig_cov.update_layout(height=320)
+    fig_cov = cached_figure(
+        "app", "coverage_gauge",
+        lambda: gauge(coverage_rate, "Household Coverage (%)", "#005b96"),
+        figure_version, selected_distribution
+    )
     st.plotly_chart(fig_cov, use_container_width=True)
 
 with col6:
-    fig_fin = go.Figure(go.Indicator(
-        mode="gauge+number",
-        value=delivery_rate,
-        title={'text': "Cash Delivery (%)"},
-        gauge={'axis': {'range': [0, 100]},
-               'bar': {'color': "#c62828"}}
-    ))
-    fig_fin.update_layout(height=320)
+    fig_fin = cached_figure(
+        "app", "delivery_gauge",
+        lambda: gauge(delivery_rate, "Cash Delivery (%)", "#c62828"),
+        figure_version, selected_distribution
+    )
     st.plotly_chart(fig_fin, use_container_width=True)
 
 # --------------------------------------------------
 # BREAKDOWN
 # --------------------------------------------------
+trace.section("répartition")
 st.markdown('<div class="section-title">Cash Distribution Breakdown</div>', unsafe_allow_html=True)
 
-df = pd.DataFrame({
-    "Category": ["Reach", "Undelivered"],
-    "Amount": [d["cash_reach"], undelivered]
-})
-
-fig_bar = px.bar(
-    df,
-    x="Amount",
-    y="Category",
-    orientation="h",
-    text="Amount",
-    color="Category",
-    color_discrete_map={
-        "Reach": "#005b96",
-        "Undelivered": "#c62828"
-    }
-)
+fig_bar = cached_figure("app", "breakdown", lambda: breakdown(d, undelivered), figure_version, selected_distribution)
+st.plotly_chart(fig_bar, use_container_width=True)
 
-fig_bar.update_traces(
-    texttemplate='%{text:,.0f} MGA',
-    textposition='inside',
-    insidetextfont=dict(color="white")
-)
+reconciliation = load_reconciliation(d["payment_code"], distribution)
+if reconciliation is not None and not reconciliation.mismatches.empty:
+    with st.expander(f"Reconciliation mismatches ({len(reconciliation.mismatches):,} households)"):
+        st.dataframe(
+            reconciliation.mismatches.assign(category=reconciliation.mismatches["category"].map(MISMATCHES)),
+            use_container_width=True,
+            hide_index=True,
+        )
 
-fig_bar.update_layout(
-    height=380,
-    plot_bgcolor="#f4f7fb",
-    paper_bgcolor="#f4f7fb"
-)
+# --------------------------------------------------
+# ANALYSE DES PAIEMENTS (données détaillées)
+# --------------------------------------------------
+# Only for distributions ingested in the beneficiary store; every filter
+# change is a cached DuckDB query over the Parquet files.
+trace.section("analyse paiements")
+if distribution in available_distributions():
+    st.markdown('<div class="section-title">Payment Analysis</div>', unsafe_allow_html=True)
 
-st.plotly_chart(fig_bar, use_container_width=True)
+    filters = payment_filters(base={"distribution": [distribution]}, key="app-filters")
+    summary = payment_summary(filters=filters).iloc[0]
+
+    col7, col8, col9, col10 = st.columns(4)
+    col7.metric("Beneficiaries", f"{int(summary['beneficiaries']):,}")
+    col8.metric("Households Reached", f"{int(summary['households_paid']):,} / {int(summary['households']):,}")
+    col9.metric("Cash Plan – MGA", f"{summary['cash_plan']:,.0f}")
+    col10.metric("Cash Reach – MGA", f"{summary['cash_paid']:,.0f}")
+
+    by_commune = payment_summary(by=["district", "commune"], filters=filters)
+    st.dataframe(
+        labelled(by_commune),
+        use_container_width=True,
+        hide_index=True,
+    )
 
 st.markdown("---")
 st.success(
     f"{selected_distribution} – Coverage: {coverage_rate:.2f}% | Cash Delivery: {delivery_rate:.2f}%"
 )
+
+trace.end()
+performance_panel()
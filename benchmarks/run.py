@@ -0,0 +1,304 @@
+"""Per-page rerun benchmarks with regression budgets.
+
+Every page is driven headlessly with Streamlit's ``AppTest`` through its
+common interactions (each distribution, each Résultat filter, search terms,
+map zoom levels...). Each page runs in ``--processes`` fresh interpreters,
+so what one page leaves in the caches and the heap does not weigh on the
+next. In each, the first run is timed as the ``cold`` start (imports, data
+loading and the process-wide warm-up of :mod:`utils.warmup`), then the
+warm-up is joined so that no background thread competes with the measured
+reruns or shows up in their traced allocations. Each rerun records its
+fastest wall time over ``--repeat`` runs, with garbage collection paused,
+and its peak traced memory and net number of allocated memory blocks.
+
+Times keep the fastest process and the spread up to the median one;
+memory keeps the lowest peak. Both are compared against
+``benchmarks/baselines.json``:
+
+    python -m benchmarks.run                      # real data, compare
+    python -m benchmarks.run --save-baseline      # record the baseline
+    python -m benchmarks.run --scale 100          # 100x communes/indicators
+
+A time is over budget when it exceeds the baseline by more than
+``TIME_TOLERANCE``, by more than an absolute floor (``COLD_FLOOR_MS`` for
+cold starts, ``TIME_FLOOR_MS`` otherwise) and by more than ``NOISE_FACTOR``
+times the larger spread of the two runs. The process exits with status 1
+when a rerun exceeds its budget, or when no baseline is recorded for the
+dataset (``real``, ``x<scale>``). Baselines are committed; record them again
+on the reference machine after an intended change in cost.
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from streamlit.testing.v1 import AppTest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(REPO_ROOT, "benchmarks", "baselines.json")
+
+# Budgets relative to the baseline, with absolute and noise floors
+TIME_TOLERANCE = 0.30
+TIME_FLOOR_MS = 20
+COLD_FLOOR_MS = 250
+NOISE_FACTOR = 3
+MEMORY_TOLERANCE = 0.25
+MEMORY_FLOOR_KB = 512
+
+# Traced reruns per interaction (tracing slows them, they are not timed)
+TRACED_RUNS = 2
+
+DISTRIBUTIONS = [f"Distribution {i}" for i in range(1, 11)]
+SEARCH_TERMS = ["paiement", "referencement", "peas sens", "hope", "zzz"]
+
+
+# --------------------------------------------------
+# SCÉNARIOS
+# --------------------------------------------------
+
+def _page(path):
+    return os.path.join(REPO_ROOT, path)
+
+
+def select(label_index, value):
+    def step(at):
+        at.selectbox[label_index].select(value)
+    return step
+
+
+def type_text(value):
+    def step(at):
+        at.text_input[0].input(value)
+    return step
+
+
+def map_zoom(zoom):
+    def step(at):
+        at.session_state["zones_map"] = {"zoom": zoom}
+    return step
+
+
+def rerun(at):
+    pass
+
+
+def scenarios():
+    """``{page: [(interaction name, step)]}``; each step is followed by a rerun."""
+    return {
+        "app.py": [(d, select(0, d)) for d in DISTRIBUTIONS],
+        "pages/1_Indicateurs_Globaux.py": (
+            [(f"resultat={r}", select(0, r)) for r in ["Tous", "Résultat 1", "Résultat 2", "Résultat 3"]]
+            + [(f"search={t}", type_text(t)) for t in SEARCH_TERMS]
+        ),
+        "pages/2_Cumulative_Analysis.py": [("rerun", rerun)],
+        "pages/3_Zones_Intervention.py": [(f"zoom={z}", map_zoom(z)) for z in (7, 9, 12)],
+        "pages/4_Suivi_Indicateurs_DCT2.py": [("rerun", rerun)],
+    }
+
+
+# --------------------------------------------------
+# MESURE
+# --------------------------------------------------
+
+def _check(at, page, name):
+    if at.exception:
+        raise RuntimeError(f"{page} [{name}]: {at.exception[0].message}")
+
+
+def measure(at, step, repeat):
+    """Fastest of ``repeat`` reruns, then the lowest of ``TRACED_RUNS`` traced ones."""
+    times = []
+    for _ in range(repeat):
+        step(at)
+        # As timeit does: a collection pass would land on a random rerun.
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            at.run()
+            times.append((time.perf_counter() - start) * 1000)
+        finally:
+            gc.enable()
+
+    peaks = []
+    for _ in range(TRACED_RUNS):
+        gc.collect()
+        step(at)
+        blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        at.run()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "wall_ms": min(times),
+        "peak_kb": min(peaks) / 1024,
+        "alloc_blocks": sys.getallocatedblocks() - blocks,
+    }
+
+
+def run_page(page, interactions, repeat):
+    """Measurements of ``page`` in this interpreter, which must be fresh."""
+    from utils.warmup import warm_up
+
+    start = time.perf_counter()
+    at = AppTest.from_file(_page(page), default_timeout=300).run()
+    results = {"cold": {"wall_ms": (time.perf_counter() - start) * 1000}}
+    _check(at, page, "cold")
+
+    # The page started the warm-up: let it finish before the measured reruns.
+    warm_up().join()
+    for name, step in interactions:
+        results[name] = measure(at, step, repeat)
+        _check(at, page, name)
+
+    return results
+
+
+def measure_page(page, processes, child_args):
+    """:func:`run_page` in ``processes`` fresh interpreters, combined.
+
+    Times are the fastest over the processes, with the spread up to their
+    median; memory is the lowest peak and the median block count.
+    """
+    runs = []
+    for _ in range(processes):
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--child", page, *child_args],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1])
+        runs.append(json.loads(result.stdout.splitlines()[-1]))
+
+    results = {}
+    for name in runs[0]:
+        times = [run[name]["wall_ms"] for run in runs]
+        results[name] = {
+            "wall_ms": round(min(times), 2),
+            "wall_spread_ms": round(statistics.median(times) - min(times), 2),
+        }
+        if "peak_kb" in runs[0][name]:
+            results[name]["peak_kb"] = round(min(run[name]["peak_kb"] for run in runs), 1)
+            results[name]["alloc_blocks"] = int(statistics.median(run[name]["alloc_blocks"] for run in runs))
+    return results
+
+
+# --------------------------------------------------
+# BUDGETS
+# --------------------------------------------------
+
+def over_budget(current, baseline, time_floor=TIME_FLOOR_MS):
+    """Human-readable budget violations of one rerun (empty when fine)."""
+    problems = []
+    if "wall_ms" in baseline:
+        noise = max(baseline.get("wall_spread_ms", 0), current.get("wall_spread_ms", 0))
+        limit = max(
+            baseline["wall_ms"] * (1 + TIME_TOLERANCE),
+            baseline["wall_ms"] + time_floor,
+            baseline["wall_ms"] + NOISE_FACTOR * noise,
+        )
+        if current["wall_ms"] > limit:
+            problems.append(f"wall {current['wall_ms']:.1f} ms > {limit:.1f} ms")
+    if "peak_kb" in baseline:
+        limit = max(baseline["peak_kb"] * (1 + MEMORY_TOLERANCE), baseline["peak_kb"] + MEMORY_FLOOR_KB)
+        if current["peak_kb"] > limit:
+            problems.append(f"peak {current['peak_kb']:.0f} KB > {limit:.0f} KB")
+    return problems
+
+
+def load_baselines():
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(pages, processes, child_args, dataset, save):
+    """Measure ``pages`` and check or record their baseline; exit status."""
+    baselines = load_baselines()
+    reference = baselines.get(dataset, {})
+    results = {}
+    failures = []
+
+    for page in pages:
+        results[page] = measure_page(page, processes, child_args)
+
+        print(f"\n{page}")
+        for name, current in results[page].items():
+            floor = COLD_FLOOR_MS if name == "cold" else TIME_FLOOR_MS
+            problems = over_budget(current, reference.get(page, {}).get(name, {}), floor)
+            failures += [f"{page} [{name}]: {p}" for p in problems]
+            print(
+                f"  {name:<28} {current['wall_ms']:>9.1f} ms +{current['wall_spread_ms']:<6.1f}"
+                + (f" {current['peak_kb']:>10.0f} KB {current['alloc_blocks']:>+9d} blocks"
+                   if "peak_kb" in current else "")
+                + ("  REGRESSION" if problems else "")
+            )
+
+    if save:
+        baselines.setdefault(dataset, {}).update(results)
+        with open(BASELINES, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline '{dataset}' saved to {BASELINES}")
+        return 0
+
+    if not reference:
+        print(f"\nNo baseline for '{dataset}' (record one with --save-baseline).")
+        return 1
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-page rerun benchmarks")
+    parser.add_argument("--scale", type=int, default=0,
+                        help="benchmark a synthetic dataset N times the real size")
+    parser.add_argument("--households", type=int, default=30_000,
+                        help="households per synthetic payment plan")
+    parser.add_argument("--repeat", type=int, default=5, help="timed reruns per interaction")
+    parser.add_argument("--processes", type=int, default=3, help="fresh interpreters per page")
+    parser.add_argument("--page", action="append", help="only these pages")
+    parser.add_argument("--save-baseline", action="store_true")
+    # Internal: measure one page in this interpreter (see measure_page)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--workspace", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_ROOT)
+    dataset = "real"
+    child_args = ["--repeat", str(args.repeat)]
+    workspace = None
+    if args.scale:
+        from benchmarks.synthetic import prepare_workspace, scale_indicators
+
+        workspace = args.workspace or prepare_workspace(args.scale, args.households)
+        scale_indicators(args.scale)
+        os.chdir(workspace)
+        dataset = f"x{args.scale}"
+        child_args += ["--scale", str(args.scale), "--workspace", workspace]
+    else:
+        os.chdir(REPO_ROOT)
+
+    if args.child:
+        print(json.dumps(run_page(args.child, scenarios()[args.child], args.repeat)))
+        return 0
+
+    pages = [page for page in scenarios() if not args.page or page in args.page]
+    try:
+        return compare(pages, args.processes, child_args, dataset, args.save_baseline)
+    finally:
+        if workspace and not args.workspace:
+            os.chdir(REPO_ROOT)
+            shutil.rmtree(workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Synthetic datasets for benchmarking at a multiple of the real size.
+
+``prepare_workspace(scale)`` creates a throw-away directory with the same
+``data/`` layout as the repository:
+
+* boundaries: the real ADM2/ADM3 layers tiled ``scale`` times side by side
+  (shared borders are preserved inside each tile, pcodes are made unique);
+* payment exports for Distributions 1–3 over the tiled communes, ingested
+  into the beneficiary store;
+* indicators: the logframe and DCT 2 tables repeated ``scale`` times.
+
+The pages use relative ``data/`` paths, so running them with the workspace as
+working directory makes them read the synthetic data.
+"""
+import copy
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import utils.indicators as indicators
+from utils.boundaries import LAYERS, build_store, read_geojson
+from utils.distributions import REALIZED_DATA
+from utils.store import ingest_plan
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATEGORIES = ["Enfant", "Handicap", "Femme_enceinte"]
+
+
+# --------------------------------------------------
+# CONTOURS
+# --------------------------------------------------
+
+def _translate(geometry, dx, dy):
+    def shift(coords):
+        if isinstance(coords[0], (int, float)):
+            return [coords[0] + dx, coords[1] + dy]
+        return [shift(c) for c in coords]
+
+    return {"type": geometry["type"], "coordinates": shift(geometry["coordinates"])}
+
+
+def tiled_boundaries(scale):
+    """``{layer: FeatureCollection}`` with ``scale`` translated copies."""
+    sources = {layer: read_geojson(os.path.join(REPO_ROOT, path)) for layer, path in LAYERS.items()}
+    xmin = min(p[0] for f in sources["adm2"]["features"] for r in f["geometry"]["coordinates"] for p in r)
+    xmax = max(p[0] for f in sources["adm2"]["features"] for r in f["geometry"]["coordinates"] for p in r)
+    ymin = min(p[1] for f in sources["adm2"]["features"] for r in f["geometry"]["coordinates"] for p in r)
+    ymax = max(p[1] for f in sources["adm2"]["features"] for r in f["geometry"]["coordinates"] for p in r)
+    width, height = (xmax - xmin) * 1.05, (ymax - ymin) * 1.05
+    columns = math.ceil(math.sqrt(scale))
+
+    out = {layer: {"type": "FeatureCollection", "features": []} for layer in sources}
+    for k in range(scale):
+        dx, dy = (k % columns) * width, -(k // columns) * height
+        for layer, collection in sources.items():
+            for feature in collection["features"]:
+                props = copy.deepcopy(feature["properties"])
+                if k:
+                    for field in ("ADM2_PCODE", "ADM3_PCODE"):
+                        if field in props:
+                            props[field] = f"{props[field]}-{k:03d}"
+                out[layer]["features"].append({
+                    "type": "Feature",
+                    "properties": props,
+                    "geometry": _translate(feature["geometry"], dx, dy),
+                })
+    return out
+
+
+# --------------------------------------------------
+# PAIEMENTS
+# --------------------------------------------------
+
+def synthetic_export(communes, households, seed=0):
+    """Beneficiary-level HOPE-like export over ``communes`` [(adm2, adm3)]."""
+    rng = np.random.default_rng(seed)
+    members = rng.integers(1, 4, households)
+    n = int(members.sum())
+    hh = np.repeat(np.arange(households), members)
+    where = np.asarray(communes)[hh % len(communes)]
+    paid = np.repeat(rng.random(households) < 0.92, members)
+
+    return pd.DataFrame({
+        "payment_id": np.arange(n),
+        "household_id": np.char.add("HH-", hh.astype(str)),
+        "individual_id": np.char.add("IND-", np.arange(n).astype(str)),
+        "admin2": where[:, 0],
+        "admin3": where[:, 1],
+        "payment_site": np.char.add(where[:, 1], np.char.add("-S", (hh % 4).astype(str))),
+        "beneficiary_category": rng.choice(CATEGORIES, n, p=[0.9, 0.05, 0.05]),
+        "entitlement_quantity": 100_000,
+        "delivered_quantity": np.where(paid, 100_000, 0),
+    })
+
+
+# --------------------------------------------------
+# INDICATEURS
+# --------------------------------------------------
+
+def scale_indicators(scale):
+    """Repeat the logframe and DCT 2 tables ``scale`` times (in place)."""
+    rows = indicators.LOGFRAME_ROWS
+    indicators.LOGFRAME_ROWS = [
+        (r[0], r[1], f"{r[2]} #{k}" if k else r[2], *r[3:])
+        for k in range(scale) for r in rows
+    ]
+    for activity, data in indicators.DCT2_ACTIVITIES.items():
+        indicators.DCT2_ACTIVITIES[activity] = {
+            "Indicateur": [f"{i} #{k}" if k else i for k in range(scale) for i in data["Indicateur"]],
+            "Planifié": data["Planifié"] * scale,
+            "Réalisé": data["Réalisé"] * scale,
+        }
+    indicators.SOURCE_VERSION = indicators.value_version([indicators.LOGFRAME_ROWS, indicators.DCT2_ACTIVITIES])
+
+
+# --------------------------------------------------
+# ESPACE DE TRAVAIL
+# --------------------------------------------------
+
+def prepare_workspace(scale, households=30_000, directory=None):
+    """Build the synthetic ``data/`` tree and return its root directory."""
+    root = directory or tempfile.mkdtemp(prefix=f"zara_mira_x{scale}_")
+    cwd = os.getcwd()
+    os.makedirs(os.path.join(root, "data", "payments"), exist_ok=True)
+    os.chdir(root)
+    try:
+        layers = tiled_boundaries(scale)
+        for layer, path in LAYERS.items():
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(layers[layer], f)
+        build_store()
+
+        communes = sorted({
+            (f["properties"]["ADM2_PCODE"], f["properties"]["ADM3_PCODE"])
+            for f in layers["adm3"]["features"]
+        })
+        for n, (name, meta) in enumerate(REALIZED_DATA.items(), start=1):
+            export = synthetic_export(communes, households, seed=n)
+            export.to_csv(os.path.join("data", "payments", f"{meta['payment_code']}.csv"), index=False)
+            ingest_plan(meta["payment_code"], n)
+    finally:
+        os.chdir(cwd)
+
+    return root
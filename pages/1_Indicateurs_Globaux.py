@@ -1,157 +1,45 @@
-import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.express as px
+import streamlit as st
+
+from utils.datasets import memory_panel
+from utils.figures import cached_figure
+from utils.indicators import load_indicators, summarize
+from utils.search import build_search_index
+from utils.snapshots import compare, load_snapshots, progress
+from utils.tracing import performance_panel, trace_page
+from utils.warmup import warm_up
 
 # ==================================================
 # CONFIG
 # ==================================================
 st.set_page_config(page_title="Indicateurs globaux – ZARA MIRA", layout="wide")
+warm_up()
+trace = trace_page("indicateurs_globaux")
 
 st.markdown("## 📌 Indicateurs globaux du projet – ZARA MIRA")
 st.markdown("Suivi des résultats, performance et cibles (baseline → cible).")
 st.markdown("---")
 
 # ==================================================
-# DONNÉES (Structure identique – Réalisé modifié)
-# ==================================================
-
-rows = [
-
-    # ---------------- RESULTAT 1 ----------------
-    ("Résultat 1", "Couverture effective des allocations",
-     "Nombre de bénéficiaires recevant des paiements (enfants + PHS)",
-     "Fokontany", 0, 68000+3500, 76541,
-     "Fiche de paiement; HOPE; Listes bénéficiaires"),
-
-    ("Résultat 1", "Capacités des acteurs locaux",
-     "% d’acteurs locaux formés (PL, RCJ, TS, CMS…)",
-     "Région/district", 0, 100, 0,
-     "Registres formation; Rapports; Évaluations post-formation"),
-
-    ("Résultat 1", "Conformité des paiements",
-     "Nombre de paiements suivis régulièrement",
-     "Sites distribution", 0, 18, 0,
-     "États de paiement; HOPE; Rapport narratif SAF"),
-
-    ("Résultat 1", "Appropriation MACC",
-     "Taux d’agents évalués compétents après coaching",
-     "Région/district", 0, 70, 0,
-     "Rapports coaching; Grilles; Feedback bénéficiaires"),
-
-    ("Résultat 1", "Performance GRM",
-     "% de plaintes résolues / total plaintes",
-     "Fokontany/commune", 0, 90, 0,
-     "Système plaintes; Registres; Rapports"),
-
-    ("Résultat 1", "Activités EBE",
-     "Fréquence séances thématiques (EBE)",
-     "Fokontany", 0, 36, 0,
-     "Rapports; Fiches présence"),
-
-    ("Résultat 1", "Sensibilisation MACC",
-     "Nombre bénéficiaires sensibilisés MACC",
-     "Fokontany", 0, 62250, 0,
-     "Fiches AL; Fiches présence"),
-
-    ("Résultat 1", "PEAS – sensibilisation",
-     "Nombre de sites avec sessions PEAS",
-     "Fokontany", 0, 35, 0,
-     "Rapport activité"),
-
-    ("Résultat 1", "PEAS – formation staff",
-     "Personnel formé PEAS",
-     "Fokontany", 0, 1370, 0,
-     "Rapport activité"),
-
-    ("Résultat 1", "EBE – mise en place",
-     "Nombre d’EBE créées",
-     "Fokontany", 0, 102, 0,
-     "Registres; Photographies"),
-
-    # ---------------- RESULTAT 2 ----------------
-    ("Résultat 2", "Référencement & prise en charge",
-     "Circuit de référence établi",
-     "District", 0, 1, 0,
-     "Rapport validation"),
-
-    ("Résultat 2", "Comités gestion de cas",
-     "Nombre comités gestion cas",
-     "District", 0, 3, 0,
-     "Rapports; Listes comités"),
-
-    ("Résultat 2", "Réunions gestion de cas",
-     "Nombre réunions gestion cas",
-     "District", 0, 27, 0,
-     "Comptes rendus"),
-
-    ("Résultat 2", "Population cible",
-     "Bénéficiaires ciblés intervention protection",
-     "Fokontany", 0, 68000+3500, 0,
-     "Listes bénéficiaires"),
-
-    ("Résultat 2", "Sensibilisation communautés",
-     "Communautés sensibilisées (PE/VBG)",
-     "Fokontany", 0, 18000, 0,
-     "Fiches présence"),
-
-    ("Résultat 2", "Violences signalées et traitées",
-     "Nombre cas violences traités",
-     "District", 0, 900, 0,
-     "Dossiers cas"),
-
-    ("Résultat 2", "Participation communautaire",
-     "% communautés ayant participé campagnes",
-     "Région/district", 0, 70, 0,
-     "Rapports sensibilisation"),
-
-    ("Résultat 2", "Cas protection identifiés",
-     "Cas protection identifiés et pris en charge",
-     "Région/district", 0, 100, 0,
-     "Base de données cas"),
-
-    ("Résultat 2", "PEAS – engagement",
-     "% enfants/adultes engagés PEAS",
-     "Fokontany", 0, 80, 0,
-     "Rapports activité"),
-
-    # ---------------- RESULTAT 3 ----------------
-    ("Résultat 3", "Communication projet",
-     "Taux compréhension programme",
-     "3 districts", 0, 95, 0,
-     "Rapports atelier; Focus group"),
-
-    ("Résultat 3", "Supports communication",
-     "Nombre supports communication produits",
-     "Districts", 0, 3, 0,
-     "Inventaire supports"),
-
-    ("Résultat 3", "Success stories",
-     "Nombre histoires de réussite produites",
-     "Districts", 0, 6, 0,
-     "Liens publications"),
-]
-
-df = pd.DataFrame(rows, columns=[
-    "Résultat","Volet","Indicateur","Lieu",
-    "Baseline","Cible","Réalisé","Moyens de vérification"
-])
-
-# ==================================================
-# CALCULS
-# ==================================================
-
-df["Taux (%)"] = np.where(
-    df["Cible"] == 0,
-    0,
-    (df["Réalisé"] / df["Cible"]) * 100
-)
+# DONNÉES + CALCULS (module partagé, mémoïsé par version)
+# ==================================================
+trace.section("données")
 
-df["Taux (%)"] = df["Taux (%)"].round(1)
+# ``df`` is the process-wide copy shared by every session: never modified
+# here, rows are selected with a boolean mask.
+indicators = load_indicators()
+df = indicators["logframe"]
+
+search_index = build_search_index(
+    indicators["version"],
+    df,
+    ("Indicateur", "Volet", "Moyens de vérification")
+)
 
 # ==================================================
 # FILTRES (identique à avant)
 # ==================================================
+trace.section("filtres")
 
 c1, c2 = st.columns([1,2])
 
@@ -162,27 +50,29 @@ with c1:
 with c2:
     search = st.text_input("Recherche indicateur / volet / MV", "")
 
-df_view = df.copy()
+mask = np.ones(len(df), dtype=bool)
 
 if result_filter != "Tous":
-    df_view = df_view[df_view["Résultat"] == result_filter]
+    mask &= (df["Résultat"] == result_filter).to_numpy()
 
 if search.strip():
-    s = search.lower()
-    df_view = df_view[
-        df_view["Indicateur"].str.lower().str.contains(s) |
-        df_view["Volet"].str.lower().str.contains(s)
-    ]
+    # Accent/case-insensitive token-prefix lookup, index built once per data version
+    hits = np.zeros(len(df), dtype=bool)
+    hits[search_index.search(search)] = True
+    mask &= hits
+
+df_view = df[mask] if not mask.all() else df
+
+memory_panel()
 
 st.markdown("---")
 
 # ==================================================
 # KPI SYNTHÈSE
 # ==================================================
+trace.section("kpi")
 
-avg_rate = round(df_view["Taux (%)"].mean(), 1)
-nb_ind = len(df_view)
-nb_red = (df_view["Taux (%)"] < 50).sum()
+avg_rate, nb_ind, nb_red = summarize(df_view["Taux (%)"])
 
 k1, k2, k3 = st.columns(3)
 k1.metric("Indicateurs affichés", nb_ind)
@@ -194,6 +84,7 @@ st.markdown("---")
 # ==================================================
 # TABLEAU
 # ==================================================
+trace.section("tableau")
 
 st.subheader("📋 Tableau de suivi global")
 st.dataframe(df_view, use_container_width=True)
@@ -201,27 +92,83 @@ st.dataframe(df_view, use_container_width=True)
 # ==================================================
 # GRAPHIQUE
 # ==================================================
+trace.section("graphique")
 
 st.subheader("📈 Progression des indicateurs")
 
-fig = px.bar(
-    df_view.sort_values("Taux (%)"),
-    x="Taux (%)",
-    y="Indicateur",
-    orientation="h",
-    text="Taux (%)",
-    color="Résultat",
-    range_x=[0,120]
+def build_progress_chart():
+    import plotly.express as px
+
+    fig = px.bar(
+        df_view.sort_values("Taux (%)"),
+        x="Taux (%)",
+        y="Indicateur",
+        orientation="h",
+        text="Taux (%)",
+        color="Résultat",
+        range_x=[0,120]
+    )
+
+    fig.update_traces(texttemplate="%{text}%", textposition="outside")
+    fig.update_layout(height=800)
+    return fig
+
+fig = cached_figure(
+    "indicateurs_globaux", "progression", build_progress_chart,
+    indicators["version"], {"resultat": result_filter, "search": search.strip()}
 )
+st.plotly_chart(fig, use_container_width=True)
 
-fig.update_traces(texttemplate="%{text}%", textposition="outside")
-fig.update_layout(height=800)
+# ==================================================
+# HISTORIQUE (instantanés par période de rapportage)
+# ==================================================
+trace.section("historique")
 
-st.plotly_chart(fig, use_container_width=True)
+st.subheader("🕰️ Évolution du Réalisé")
+
+snapshots = load_snapshots()
+
+if snapshots is None:
+    st.info("Aucun instantané enregistré : `python -m scripts.record_snapshot AAAA-MM-JJ` à chaque période de rapportage.")
+else:
+    shown = snapshots.history_table[snapshots.history_table["Indicateur"].isin(df_view["Indicateur"])]
+
+    def build_history_chart():
+        import plotly.express as px
+
+        fig = px.line(
+            progress(shown, "logframe"),
+            x="period",
+            y="Taux (%)",
+            color="Groupe",
+            markers=True,
+            labels={"period": "Période", "Groupe": "Résultat"}
+        )
+        return fig
+
+    fig_history = cached_figure(
+        "indicateurs_globaux", "historique", build_history_chart,
+        snapshots.version, {"resultat": result_filter, "search": search.strip()}
+    )
+    st.plotly_chart(fig_history, use_container_width=True)
+
+    # Any two reporting dates, side by side (as-of lookups on the index)
+    dates = [str(p) for p in snapshots.periods]
+    c3, c4 = st.columns(2)
+    date_a = c3.selectbox("Date A", dates, index=max(len(dates) - 2, 0))
+    date_b = c4.selectbox("Date B", dates, index=len(dates) - 1)
+
+    comparison = compare(snapshots, np.datetime64(date_a), np.datetime64(date_b), "logframe")
+    st.dataframe(
+        comparison[comparison["Indicateur"].isin(df_view["Indicateur"])],
+        use_container_width=True,
+        hide_index=True,
+    )
 
 # ==================================================
 # LECTURE STRATÉGIQUE
 # ==================================================
+trace.section("lecture")
 
 st.markdown("---")
 
@@ -236,3 +183,6 @@ else:
 
 if avg_rate < 30:
     st.error("🔴 Mise en œuvre globale encore faible (hors paiements).")
+
+trace.end()
+performance_panel()
@@ -1,8 +1,21 @@
 import streamlit as st
-import plotly.express as px
 import pandas as pd
 
+from utils.cumulative import TOTAL, load_cumulative
+from utils.datasets import memory_panel
+from utils.distributions import load_realized_data
+from utils.figures import cached_figure
+from utils.filters import payment_filters
+from utils.households import load_household_flows
+from utils.queries import DIMENSIONS, MEASURES, payment_summary
+from utils.store import store_version
+from utils.tracing import performance_panel, trace_page
+from utils.versioning import frame_version
+from utils.warmup import warm_up
+
 st.set_page_config(page_title="Cumulative Analysis", layout="wide")
+warm_up()
+trace = trace_page("cumulative")
 
 # --------------------------------------------------
 # STYLE
@@ -30,76 +43,231 @@ st.markdown("""
 st.markdown('<div class="title">Cumulative Cash Analysis</div>', unsafe_allow_html=True)
 
 # --------------------------------------------------
-# DONNÉES (Distribution 1–3 seulement)
+# DONNÉES (mêmes distributions réalisées que le dashboard)
 # --------------------------------------------------
-data = {
-    "Distribution": ["Distribution 1", "Distribution 2", "Distribution 3"],
-    "Cash_Reach": [1821600000, 1954000000, 2103000000],
-    "Cash_Plan": [1943720000, 2050000000, 2200000000]
-}
+trace.section("données")
+# Running totals are materialised offline, once per distribution
+# (python -m scripts.update_cumulative); a rerun only reads them.
+realized = load_realized_data()
+cumulative, cumulative_version = load_cumulative(realized)
+memory_panel()
 
-df = pd.DataFrame(data)
+totals = cumulative[cumulative["commune"] == TOTAL]
 
-# Calcul cumulatif
-df["Cumulative_Reach"] = df["Cash_Reach"].cumsum()
-df["Cumulative_Plan"] = df["Cash_Plan"].cumsum()
+df = pd.DataFrame({
+    "Distribution": "Distribution " + totals["distribution"].astype(str),
+    "Cash_Reach": totals["cash_reach"],
+    "Cash_Plan": totals["cash_plan"],
+    "Cumulative_Reach": totals["cum_cash_reach"],
+    "Cumulative_Plan": totals["cum_cash_plan"],
+})
 
 # --------------------------------------------------
 # GRAPHIQUE CUMULATIF
 # --------------------------------------------------
+trace.section("cumul")
 st.markdown('<div class="section-title">Cumulative Cash to Beneficiaries (Reach)</div>', unsafe_allow_html=True)
 
-fig = px.line(
-    df,
-    x="Distribution",
-    y="Cumulative_Reach",
-    markers=True,
-)
+def build_cumulative_chart():
+    import plotly.express as px
+
+    fig = px.line(
+        df,
+        x="Distribution",
+        y="Cumulative_Reach",
+        markers=True,
+    )
 
-fig.update_traces(line=dict(color="#005b96", width=4))
+    fig.update_traces(line=dict(color="#005b96", width=4))
 
-fig.update_layout(
-    height=450,
-    plot_bgcolor="#f4f7fb",
-    paper_bgcolor="#f4f7fb",
-    yaxis_title="Cumulative Amount (MGA)",
-    xaxis_title=""
-)
+    fig.update_layout(
+        height=450,
+        plot_bgcolor="#f4f7fb",
+        paper_bgcolor="#f4f7fb",
+        yaxis_title="Cumulative Amount (MGA)",
+        xaxis_title=""
+    )
+    return fig
 
+fig = cached_figure("cumulative", "cumulative_reach", build_cumulative_chart, cumulative_version)
 st.plotly_chart(fig, use_container_width=True)
 
 # --------------------------------------------------
 # BAR COMPARISON
 # --------------------------------------------------
+trace.section("comparaison")
 st.markdown('<div class="section-title">Distribution Comparison (Reach)</div>', unsafe_allow_html=True)
 
-fig_bar = px.bar(
-    df,
-    x="Distribution",
-    y="Cash_Reach",
-    text="Cash_Reach",
-    color="Distribution"
-)
-
-fig_bar.update_traces(
-    texttemplate='%{text:,.0f}',
-    textposition='outside'
-)
-
-fig_bar.update_layout(
-    height=450,
-    plot_bgcolor="#f4f7fb",
-    paper_bgcolor="#f4f7fb",
-    yaxis_title="Amount (MGA)",
-    xaxis_title=""
-)
+def build_comparison_chart():
+    import plotly.express as px
+
+    fig_bar = px.bar(
+        df,
+        x="Distribution",
+        y="Cash_Reach",
+        text="Cash_Reach",
+        color="Distribution"
+    )
+
+    fig_bar.update_traces(
+        texttemplate='%{text:,.0f}',
+        textposition='outside'
+    )
 
+    fig_bar.update_layout(
+        height=450,
+        plot_bgcolor="#f4f7fb",
+        paper_bgcolor="#f4f7fb",
+        yaxis_title="Amount (MGA)",
+        xaxis_title=""
+    )
+    return fig_bar
+
+fig_bar = cached_figure("cumulative", "comparison", build_comparison_chart, cumulative_version)
 st.plotly_chart(fig_bar, use_container_width=True)
 
+# --------------------------------------------------
+# CUMUL PAR COMMUNE
+# --------------------------------------------------
+trace.section("communes")
+communes = cumulative[cumulative["commune"] != TOTAL]
+
+def build_commune_chart():
+    import plotly.express as px
+
+    fig_communes = px.line(
+        communes.assign(Distribution="Distribution " + communes["distribution"].astype(str)),
+        x="Distribution",
+        y="cum_cash_reach",
+        color="commune",
+        markers=True,
+    )
+
+    fig_communes.update_layout(
+        height=450,
+        plot_bgcolor="#f4f7fb",
+        paper_bgcolor="#f4f7fb",
+        yaxis_title="Cumulative Amount (MGA)",
+        xaxis_title="",
+        legend_title="Commune"
+    )
+    return fig_communes
+
+if not communes.empty:
+    st.markdown('<div class="section-title">Cumulative Cash per Commune (Reach)</div>', unsafe_allow_html=True)
+
+    fig_communes = cached_figure("cumulative", "communes", build_commune_chart, cumulative_version)
+    st.plotly_chart(fig_communes, use_container_width=True)
+
+# --------------------------------------------------
+# MÉNAGES UNIQUES (dédoublonnage inter-distributions)
+# --------------------------------------------------
+trace.section("ménages uniques")
+flows = load_household_flows(realized)
+
+def build_households_chart():
+    import plotly.graph_objects as go
+
+    x = "Distribution " + flows["distribution"].astype(str)
+    fig_households = go.Figure([
+        go.Bar(x=x, y=flows["first_time"], name="First-time", marker_color="#005b96"),
+        go.Bar(x=x, y=flows["repeat"], name="Repeat", marker_color="#9fb3c8"),
+        go.Scatter(x=x, y=flows["cumulative_unique"], name="Cumulative unique",
+                   mode="lines+markers", line=dict(color="#c62828", width=4)),
+        go.Scatter(x=x, y=flows["dropouts"], name="Drop-outs",
+                   mode="lines+markers", line=dict(color="#8e0000", dash="dot")),
+    ])
+
+    fig_households.update_layout(
+        barmode="stack",
+        height=450,
+        plot_bgcolor="#f4f7fb",
+        paper_bgcolor="#f4f7fb",
+        yaxis_title="Households",
+        xaxis_title="",
+        legend_title=""
+    )
+    return fig_households
+
+if not flows.empty:
+    st.markdown('<div class="section-title">Unique Households Reached</div>', unsafe_allow_html=True)
+
+    last = flows.iloc[-1]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Distinct households reached", f"{last['cumulative_unique']:,}")
+    col2.metric("Household reaches (with repeats)", f"{flows['reached'].sum():,}")
+    col3.metric(
+        f"Drop-outs (Distribution {last['distribution']})", f"{last['dropouts']:,}"
+    )
+
+    fig_households = cached_figure(
+        "cumulative", "households", build_households_chart, frame_version(flows)
+    )
+    st.plotly_chart(fig_households, use_container_width=True)
+    st.dataframe(
+        flows.rename(columns={
+            "distribution": "Distribution",
+            "reached": "Reached",
+            "first_time": "First-time",
+            "repeat": "Repeat",
+            "returning": "Returning",
+            "dropouts": "Drop-outs",
+            "cumulative_unique": "Cumulative unique",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+# --------------------------------------------------
+# ANALYSE FILTRÉE (données détaillées)
+# --------------------------------------------------
+trace.section("analyse filtrée")
+store = store_version()
+
+def build_filtered_chart(summary):
+    import plotly.express as px
+
+    fig_filtered = px.bar(
+        summary.assign(Distribution="Distribution " + summary["distribution"].astype(str)),
+        x="Distribution",
+        y=["cash_plan", "cash_paid"],
+        barmode="group",
+        color_discrete_map={"cash_plan": "#9fb3c8", "cash_paid": "#005b96"},
+    )
+
+    fig_filtered.update_layout(
+        height=450,
+        plot_bgcolor="#f4f7fb",
+        paper_bgcolor="#f4f7fb",
+        yaxis_title="Amount (MGA)",
+        xaxis_title="",
+        legend_title=""
+    )
+    return fig_filtered
+
+if store is not None:
+    st.markdown('<div class="section-title">Filtered Analysis (Plan vs Reach)</div>', unsafe_allow_html=True)
+
+    filters = payment_filters(key="cumulative-filters")
+    summary = payment_summary(by=["distribution"], filters=filters)
+
+    if summary.empty:
+        st.info("No payment matches these filters.")
+    else:
+        fig_filtered = cached_figure(
+            "cumulative", "filtered", lambda: build_filtered_chart(summary), store, filters
+        )
+        st.plotly_chart(fig_filtered, use_container_width=True)
+        st.dataframe(summary.rename(columns={**DIMENSIONS, **MEASURES}), use_container_width=True, hide_index=True)
+
 # --------------------------------------------------
 # INDICATEUR GLOBAL
 # --------------------------------------------------
-total_cumulative = df["Cash_Reach"].sum()
+trace.section("indicateur global")
+total_cumulative = df["Cumulative_Reach"].iloc[-1]
 
 st.markdown("---")
-st.success(f"Total Cumulative Cash Delivered (Distribution 1–3): {total_cumulative:,.0f} MGA")
+st.success(f"Total Cumulative Cash Delivered ({df['Distribution'].iloc[0]}–{totals['distribution'].iloc[-1]}): {total_cumulative:,.0f} MGA")
+
+trace.end()
+performance_panel()
@@ -1,10 +1,20 @@
-import json
+import numpy as np
 import streamlit as st
-import folium
-from streamlit_folium import st_folium
-import pandas as pd
+
+from utils.areas import load_areas, with_density
+from utils.boundaries import tier_for_zoom
+from utils.communes import commune_at, load_commune_detail
+from utils.datasets import memory_panel
+from utils.queries import DIMENSIONS, MEASURES
+from utils.rollup import COUNT_COLUMNS, SOURCE_TARGETING, load_rollup, rollup_sources, source_version
+from utils.spatial import load_site_counts
+from utils.tracing import performance_panel, span, trace_page
+from utils.viewport import clipped_topojson, leaflet_bounds, tile_box, viewport_around
+from utils.warmup import warm_up
 
 st.set_page_config(page_title="Zones d'Intervention", layout="wide")
+warm_up()
+trace = trace_page("zones")
 
 # --------------------------------------------------
 # STYLE
@@ -33,35 +43,31 @@ st.markdown("---")
 # --------------------------------------------------
 # DONNÉES SOCIALES
 # --------------------------------------------------
+trace.section("données")
+
+# Commune, district and programme totals come from one rollup over the
+# beneficiary records of the selected source (targeting list, GPS registry
+# or one distribution of the beneficiary store), cached per data version.
+sources = rollup_sources()
+source = st.selectbox("Source des effectifs", sources) if len(sources) > 1 else SOURCE_TARGETING
+rollup = load_rollup(source)
 
-data = [
-    ["BEFOTAKA","ANTANINARENINA","MG25222032",3723,92,29],
-    ["BEFOTAKA","BEFOTAKA SUD","MG25222011",5680,158,50],
-    ["BEFOTAKA","BEHARENA","MG25222052",4403,114,50],
-    ["MIDONGY-ATSIMO","ANKAZOVELO","MG25215012",3377,29,48],
-    ["MIDONGY-ATSIMO","NOSIFENO","MG25215011",10618,117,104],
-    ["MIDONGY-ATSIMO","MALIORANO","MG25215032",4125,41,19],
-    ["VONDROZO","VONDROZO","MG25217011",5573,125,79],
-    ["VONDROZO","MANAMBIDALA","MG25217012",11327,238,49],
-    ["VONDROZO","ANANDRAVY","MG25217013",4964,105,74],
-    ["VONDROZO","MAHATSINJO","MG25217030",15095,372,228],
-    ["VONDROZO","VOHIMARY","MG25217071",7656,167,39],
-]
+if rollup.unmatched:
+    st.caption(f"{rollup.unmatched:,} bénéficiaires non rattachés à une commune (coordonnées ou code absents, hors zone).")
 
-df = pd.DataFrame(data, columns=[
-    "District","Commune","ADM3_PCODE",
-    "Enfants","Handicap","Femmes_Enceintes"
-])
+df = rollup.communes
+memory_panel()
 
 # --------------------------------------------------
 # KPI GLOBALS
 # --------------------------------------------------
+trace.section("kpi")
 
 st.markdown("## Indicateurs Globaux Bénéficiaires")
 
-total_enfants = df["Enfants"].sum()
-total_handicap = df["Handicap"].sum()
-total_femmes = df["Femmes_Enceintes"].sum()
+total_enfants = rollup.programme["Enfants"]
+total_handicap = rollup.programme["Handicap"]
+total_femmes = rollup.programme["Femmes_Enceintes"]
 
 col1, col2, col3 = st.columns(3)
 
@@ -79,33 +85,107 @@ st.markdown("---")
 # --------------------------------------------------
 # LOAD GEOJSON
 # --------------------------------------------------
+trace.section("limites")
+
+MAP_CENTER = [-22.0, 47.0]
+MAP_ZOOM = 7
+MAP_HEIGHT = 750
+MAP_WIDTH = 1100   # approximate width of the map column, first render only
+
+# Communes sent per view at most: a zoomed-out view over a large coverage
+# shows the districts only, so its payload stays bounded.
+MAX_VIEW_COMMUNES = 250
+
+# The zoom and bounds returned by the map on the previous rerun pick the
+# boundary resolution (simplified offline, shared borders kept aligned) and
+# the snapped box around the view: only the features inside the box
+# are sent, clipped to it (utils/viewport.py), as quantized TopoJSON.
+map_state = st.session_state.get("zones_map") or {}
+zoom = map_state.get("zoom") or MAP_ZOOM
+tier = tier_for_zoom(zoom)
+viewport = leaflet_bounds(map_state.get("bounds")) or viewport_around(MAP_CENTER, zoom, MAP_WIDTH, MAP_HEIGHT)
+box = tile_box(viewport, zoom)
+
+# Communes carry the pcode only: names and figures are fetched for the
+# clicked commune (see DÉTAIL COMMUNE), so the map payload stays the same
+# size whatever the detail panel shows.
+adm2 = clipped_topojson("adm2", tier, box)
+adm3 = clipped_topojson("adm3", tier, box, limit=MAX_VIEW_COMMUNES)
 
-@st.cache_data
-def load_geojson(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# --------------------------------------------------
+# COULEURS PAR DISTRICT
+# --------------------------------------------------
 
-adm2 = load_geojson("data/zara_mira_adm2.geojson")
-adm3 = load_geojson("data/zara_mira_adm3.geojson")
+DISTRICT_COLORS = {
+    "BEFOTAKA": "#c62828",         # Befotaka
+    "MIDONGY-ATSIMO": "#2e7d32",   # Midongy Atsimo
+    "VONDROZO": "#005b96",         # Vondrozo
+}
 
 # --------------------------------------------------
-# GROUPES COULEURS
+# CHOROPLÈTHES (densité, couverture)
 # --------------------------------------------------
 
-group_red = df[df["District"]=="BEFOTAKA"]["ADM3_PCODE"].tolist()
-group_green = df[df["District"]=="MIDONGY-ATSIMO"]["ADM3_PCODE"].tolist()
-group_blue = df[df["District"]=="VONDROZO"]["ADM3_PCODE"].tolist()
+COLOR_DISTRICT = "District"
+COLOR_DENSITY = "Densité (bénéficiaires / km²)"
+COLOR_COVERAGE = "Couverture (% du ciblage)"
+
+CHOROPLETH_PALETTE = np.array(["#deebf7", "#9ecae1", "#6baed6", "#3182bd", "#08519c"])
+
+# Areas are precomputed in an equal-area projection (utils/areas.py): the
+# densities are a join on the pcode, no geometry is measured here.
+communes = with_density(df, load_areas("adm3")["area_km2"], "ADM3_PCODE", COUNT_COLUMNS)
+density = communes.set_index("ADM3_PCODE")["Bénéficiaires / km²"]
+
+def coverage_rates():
+    """Beneficiaries of the source per 100 targeted, per targeted commune."""
+    targeting = load_rollup(SOURCE_TARGETING).communes.set_index("ADM3_PCODE")[COUNT_COLUMNS].sum(axis=1)
+    counts = df.set_index("ADM3_PCODE")[COUNT_COLUMNS].sum(axis=1).reindex(targeting.index, fill_value=0)
+    return (counts / targeting * 100).round(1)
+
+def choropleth(values):
+    """``({pcode: colour}, class bounds)``, quantile classes of ``values``."""
+    values = values.dropna()
+    if values.empty:
+        return {}, []
+    bounds = np.unique(np.quantile(values, np.linspace(0, 1, len(CHOROPLETH_PALETTE) + 1)))
+    classes = np.clip(np.searchsorted(bounds, values, side="right") - 1, 0, max(len(bounds) - 2, 0))
+    return dict(zip(values.index, CHOROPLETH_PALETTE[classes])), bounds
+
+def legend(bounds, unit):
+    items = [
+        f'<span style="background:{CHOROPLETH_PALETTE[i]};padding:0 10px;margin-right:4px"></span>'
+        f"{low:,.1f} – {high:,.1f}{unit}"
+        for i, (low, high) in enumerate(zip(bounds[:-1], bounds[1:]))
+    ]
+    st.markdown(" &nbsp; ".join(items), unsafe_allow_html=True)
+
+modes = [COLOR_DISTRICT, COLOR_DENSITY] + ([COLOR_COVERAGE] if source != SOURCE_TARGETING else [])
+mode = st.radio("Coloration des communes", modes, horizontal=True)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def commune_colors(version, source, mode):
+    """``({pcode: colour}, class bounds)`` per data version, source and colouring."""
+    if mode == COLOR_DISTRICT:
+        return {
+            pcode: DISTRICT_COLORS.get(district)
+            for pcode, district in zip(df["ADM3_PCODE"], df["District"])
+        }, []
+    return choropleth(density if mode == COLOR_DENSITY else coverage_rates())
+
+colors, bounds = commune_colors(source_version(source), source, mode)
+if mode != COLOR_DISTRICT:
+    legend(bounds, " /km²" if mode == COLOR_DENSITY else " %")
 
 # --------------------------------------------------
 # MAP
 # --------------------------------------------------
+trace.section("carte")
 
-m = folium.Map(
-    location=[-22.0, 47.0],
-    zoom_start=7,
-    tiles="CartoDB positron",
-    control_scale=True
-)
+# folium and the Leaflet component are the heaviest imports of the app: they
+# load here, once the header and the KPIs are already on screen.
+import folium
+from streamlit_folium import st_folium
 
 def style_adm2(feature):
     return {
@@ -115,16 +195,8 @@ def style_adm2(feature):
         "fillOpacity": 0.10,
     }
 
-def style_adm3(feature):
-    pcode = feature["properties"]["ADM3_PCODE"]
-
-    if pcode in group_red:
-        color = "#c62828"      # Befotaka
-    elif pcode in group_green:
-        color = "#2e7d32"      # Midongy Atsimo
-    elif pcode in group_blue:
-        color = "#005b96"      # Vondrozo
-    else:
+def style_adm3(color):
+    if color is None:
         return {
             "fillColor": "#cfd8dc",
             "color": "#90a4ae",
@@ -139,56 +211,148 @@ def style_adm3(feature):
         "fillOpacity": 0.7,
     }
 
-# Add District Layer
-folium.GeoJson(
-    adm2,
-    style_function=style_adm2,
-    tooltip=folium.GeoJsonTooltip(
-        fields=["ADM2_EN"],
-        aliases=["District:"],
-        sticky=True
+def has_features(topology, layer):
+    """Whether a clipped layer is sent and holds features (folium needs one)."""
+    return topology is not None and bool(topology["objects"][layer]["geometries"])
+
+def build_layers(adm2, adm3, colors):
+    """Boundary layers of this rerun.
+
+    Built fresh every time: ``st_folium`` renders the group into the
+    session's map, so it must never be shared. The payloads and colours it
+    is made from are cached.
+    """
+    layers = folium.FeatureGroup(name="Contours")
+
+    # Add District Layer
+    if has_features(adm2, "adm2"):
+        folium.TopoJson(
+            adm2,
+            "objects.adm2",
+            style_function=style_adm2,
+            tooltip=folium.GeoJsonTooltip(
+                fields=["ADM2_EN"],
+                aliases=["District:"],
+                sticky=True
+            )
+        ).add_to(layers)
+
+    # Add Communes as a single layer, coloured when targeted
+    if has_features(adm3, "adm3"):
+        folium.TopoJson(
+            adm3,
+            "objects.adm3",
+            style_function=lambda feature: style_adm3(colors.get(feature["properties"]["ADM3_PCODE"])),
+        ).add_to(layers)
+
+    return layers
+
+# The base map stays identical across reruns, so st_folium keeps the user's
+# view and only swaps the boundary layers when the tier or the box changes:
+# pans inside the padding of the box send nothing new.
+m = folium.Map(
+    location=MAP_CENTER,
+    zoom_start=MAP_ZOOM,
+    tiles="CartoDB positron",
+    control_scale=True
+)
+
+with span("couches folium"):
+    layers = build_layers(adm2, adm3, colors)
+
+col_map, col_detail = st.columns([3, 1])
+
+with col_map, span("st_folium"):
+    if adm3 is None:
+        st.caption("Zoomez pour afficher les communes.")
+    map_state = st_folium(
+        m,
+        key="zones_map",
+        width=None,
+        height=MAP_HEIGHT,
+        feature_group_to_add=layers,
+        returned_objects=["zoom", "bounds", "last_object_clicked"],
     )
-).add_to(m)
-
-# Add Communes with popup indicators
-for feature in adm3["features"]:
-    pcode = feature["properties"]["ADM3_PCODE"]
-    commune_name = feature["properties"]["ADM3_EN"]
-    district_name = feature["properties"]["ADM2_EN"]
-
-    stats = df[df["ADM3_PCODE"]==pcode]
-
-    if not stats.empty:
-        enfants = stats.iloc[0]["Enfants"]
-        handicap = stats.iloc[0]["Handicap"]
-        femmes = stats.iloc[0]["Femmes_Enceintes"]
-
-        popup_html = f"""
-        <b>Commune:</b> {commune_name}<br>
-        <b>District:</b> {district_name}<br>
-        <hr>
-        👶 Enfants: {enfants:,}<br>
-        ♿ Handicap: {handicap:,}<br>
-        🤰 Femmes enceintes: {femmes:,}
-        """
-    else:
-        popup_html = f"<b>{commune_name}</b><br>Non ciblée"
 
-    folium.GeoJson(
-        feature,
-        style_function=style_adm3,
-        popup=popup_html
-    ).add_to(m)
+# --------------------------------------------------
+# DÉTAIL COMMUNE (chargé au clic)
+# --------------------------------------------------
+trace.section("détail commune")
 
-st_folium(m, width=None, height=750)
+clicked = (map_state or {}).get("last_object_clicked")
+
+with col_detail:
+    if not clicked:
+        st.info("Cliquez sur une commune pour afficher son détail.")
+    else:
+        commune = commune_at(clicked["lat"], clicked["lng"], tier)
+        if commune is None:
+            st.info("Aucune commune à cet endroit.")
+        else:
+            pcode, commune_name, district_name = commune
+            detail = load_commune_detail(pcode)
+
+            st.markdown(f"### {commune_name}")
+            st.caption(f"District : {district_name} · {pcode}")
+            st.caption(f"Superficie : {load_areas('adm3').loc[pcode, 'area_km2']:,.1f} km²")
+            if pcode in density.index:
+                st.metric(f"Bénéficiaires / km² ({source})", f"{density[pcode]:,.1f}")
+
+            if not detail["counts"]:
+                st.markdown("Non ciblée")
+            for source_name, counts in detail["counts"].items():
+                st.markdown(
+                    f"**{source_name}**  \n"
+                    f"👶 Enfants : {counts['Enfants']:,}  \n"
+                    f"♿ Handicap : {counts['Handicap']:,}  \n"
+                    f"🤰 Femmes enceintes : {counts['Femmes_Enceintes']:,}"
+                )
+
+            if detail["sites"] is not None:
+                st.metric("Sites de paiement", detail["sites"])
+
+            if detail["payments"] is not None:
+                st.markdown("**Paiements par distribution**")
+                st.bar_chart(detail["payments"], x="distribution", y=["cash_plan", "cash_paid"], height=220)
+                st.dataframe(
+                    detail["payments"].rename(columns={**DIMENSIONS, **MEASURES}),
+                    hide_index=True,
+                    use_container_width=True,
+                )
+
+            if detail["categories"] is not None:
+                st.markdown("**Par catégorie**")
+                st.dataframe(
+                    detail["categories"].rename(columns={**DIMENSIONS, **MEASURES}),
+                    hide_index=True,
+                    use_container_width=True,
+                )
 
 # --------------------------------------------------
 # RÉSUMÉ PAR DISTRICT
 # --------------------------------------------------
+trace.section("résumé districts")
 
 st.markdown("---")
 st.subheader("Résumé par District")
 
-district_summary = df.groupby("District")[["Enfants","Handicap","Femmes_Enceintes"]].sum()
+# ``rollup`` is shared by every session: derive, never assign into it.
+# Districts are keyed by name there, so areas are summed per name too.
+adm2_areas = load_areas("adm2")
+district_summary = with_density(
+    rollup.districts,
+    adm2_areas.groupby(adm2_areas["name"].str.upper())["area_km2"].sum(),
+    None,
+    COUNT_COLUMNS,
+)
+
+sites = load_site_counts()
+if sites is not None:
+    district_summary = district_summary.assign(**{
+        "Sites de paiement": sites[0].groupby("District")["Sites"].sum().reindex(district_summary.index, fill_value=0)
+    })
 
 st.dataframe(district_summary)
+
+trace.end()
+performance_panel()
@@ -1,51 +1,47 @@
-import streamlit as st
-import pandas as pd
-import plotly.express as px
 import numpy as np
+import streamlit as st
+
+from utils.charts import activity_chart
+from utils.datasets import memory_panel
+from utils.figures import cached_figure
+from utils.indicators import DCT2_WEIGHTS, activity_table, load_indicators
+from utils.snapshots import compare, load_snapshots, progress
+from utils.tracing import performance_panel, trace_page
+from utils.warmup import warm_up
 
 st.set_page_config(page_title="DCT 2 – Suivi Global", layout="wide")
+warm_up()
+trace = trace_page("dct2")
 
 st.markdown("## 📊 DCT 2 – Suivi Global des Indicateurs")
 st.markdown("### Activités 1, 2 et 3")
 st.markdown("---")
 
+# ==================================================
+# DONNÉES + CALCULS (module partagé, mémoïsé par version)
+# ==================================================
+trace.section("données")
+
+indicators = load_indicators()
+
+group_rates = indicators["group_rates"].loc["dct2"]
+memory_panel()
+
 
 # ==================================================
 # 🔵 ACTIVITÉ 1 – SUIVI & SUPERVISION
 # ==================================================
+trace.section("activité 1")
 
 st.markdown("## 🔹 Activité 1 – Paiement & Supervision")
 
-data_act1 = {
-    "Indicateur": [
-        "CMS impliqués",
-        "AL recrutés & formés",
-        "IS formés",
-        "Superviseurs impliqués",
-        "Sites de paiement",
-        "Vagues de paiement",
-        "Sites avec ombrage conforme"
-    ],
-    "Planifié": [400, 60, 30, 6, 33, 2, 33],
-    "Réalisé": [404, 63, 31, 6, 33, 2, 12]  # 🔵 Réalisation théorique
-}
-
-df1 = pd.DataFrame(data_act1)
-df1["Écart"] = df1["Réalisé"] - df1["Planifié"]
-df1["Taux (%)"] = round((df1["Réalisé"] / df1["Planifié"]) * 100, 1)
-
-global_act1 = round(df1["Taux (%)"].mean(), 1)
+df1 = activity_table(indicators["table"], "Activité 1")
+global_act1 = group_rates["Activité 1"]
 
 st.metric("Taux Global Activité 1", f"{global_act1}%")
 st.dataframe(df1, use_container_width=True)
 
-fig1 = px.bar(df1.sort_values("Taux (%)"),
-              x="Taux (%)", y="Indicateur",
-              orientation="h", text="Taux (%)",
-              color="Taux (%)",
-              color_continuous_scale=["#c62828","#ff9800","#2e8b57"],
-              range_x=[0,120])
-fig1.update_traces(texttemplate='%{text}%', textposition='outside')
+fig1 = cached_figure("dct2", "activite_1", lambda: activity_chart(df1), indicators["version"])
 st.plotly_chart(fig1, use_container_width=True)
 
 st.markdown("---")
@@ -54,36 +50,17 @@ st.markdown("---")
 # ==================================================
 # 🔵 ACTIVITÉ 2 – GRM
 # ==================================================
+trace.section("activité 2")
 
 st.markdown("## 🔹 Activité 2 – Mécanisme de Plaintes (GRM)")
 
-data_act2 = {
-    "Indicateur": [
-        "Ligne verte dédiée",
-        "Boîtes à doléances installées",
-        "Plaintes traitées (%)",
-        "Couverture géographique"
-    ],
-    "Planifié": [1, 102, 90, 102],
-    "Réalisé": [1, 102, 88, 102]  # 🔵 Réalisation théorique
-}
-
-df2 = pd.DataFrame(data_act2)
-df2["Écart"] = df2["Réalisé"] - df2["Planifié"]
-df2["Taux (%)"] = round((df2["Réalisé"] / df2["Planifié"]) * 100, 1)
-
-global_act2 = round(df2["Taux (%)"].mean(), 1)
+df2 = activity_table(indicators["table"], "Activité 2")
+global_act2 = group_rates["Activité 2"]
 
 st.metric("Taux Global Activité 2", f"{global_act2}%")
 st.dataframe(df2, use_container_width=True)
 
-fig2 = px.bar(df2.sort_values("Taux (%)"),
-              x="Taux (%)", y="Indicateur",
-              orientation="h", text="Taux (%)",
-              color="Taux (%)",
-              color_continuous_scale=["#c62828","#ff9800","#2e8b57"],
-              range_x=[0,120])
-fig2.update_traces(texttemplate='%{text}%', textposition='outside')
+fig2 = cached_figure("dct2", "activite_2", lambda: activity_chart(df2), indicators["version"])
 st.plotly_chart(fig2, use_container_width=True)
 
 st.markdown("---")
@@ -92,36 +69,17 @@ st.markdown("---")
 # ==================================================
 # 🔵 ACTIVITÉ 3 – EBE & ACTEURS COMMUNAUTAIRES
 # ==================================================
+trace.section("activité 3")
 
 st.markdown("## 🔹 Activité 3 – EBE & Acteurs Communautaires")
 
-data_act3 = {
-    "Indicateur": [
-        "Espaces de Bien-Être (EBE)",
-        "Parents Leaders mobilisés",
-        "Relais Communautaires Jeunes (RCJ)",
-        "Fokontany avec RCJ"
-    ],
-    "Planifié": [102, 742, 102, 102],
-    "Réalisé": [95, 700, 102, 102]  # 🔵 Réalisation théorique
-}
-
-df3 = pd.DataFrame(data_act3)
-df3["Écart"] = df3["Réalisé"] - df3["Planifié"]
-df3["Taux (%)"] = round((df3["Réalisé"] / df3["Planifié"]) * 100, 1)
-
-global_act3 = round(df3["Taux (%)"].mean(), 1)
+df3 = activity_table(indicators["table"], "Activité 3")
+global_act3 = group_rates["Activité 3"]
 
 st.metric("Taux Global Activité 3", f"{global_act3}%")
 st.dataframe(df3, use_container_width=True)
 
-fig3 = px.bar(df3.sort_values("Taux (%)"),
-              x="Taux (%)", y="Indicateur",
-              orientation="h", text="Taux (%)",
-              color="Taux (%)",
-              color_continuous_scale=["#c62828","#ff9800","#2e8b57"],
-              range_x=[0,120])
-fig3.update_traces(texttemplate='%{text}%', textposition='outside')
+fig3 = cached_figure("dct2", "activite_3", lambda: activity_chart(df3), indicators["version"])
 st.plotly_chart(fig3, use_container_width=True)
 
 st.markdown("---")
@@ -130,14 +88,10 @@ st.markdown("---")
 # ==================================================
 # 🔵 SCORE GLOBAL DCT 2 (pondération stratégique)
 # ==================================================
+trace.section("score global")
 
-# Pondération : Act1=40%, Act2=30%, Act3=30%
-global_dct2 = round(
-    (global_act1 * 0.4) +
-    (global_act2 * 0.3) +
-    (global_act3 * 0.3),
-    1
-)
+# Pondération : Act1=40%, Act2=30%, Act3=30% (utils/indicators.DCT2_WEIGHTS)
+global_dct2 = indicators["dct2_score"]
 
 st.markdown("## 🎯 Score Global DCT 2")
 st.metric("Performance Globale Pondérée", f"{global_dct2}%")
@@ -150,3 +104,45 @@ elif global_dct2 >= 60:
     st.warning("🟠 Performance intermédiaire – Ajustements requis.")
 else:
     st.error("🔴 Performance faible – Actions correctives nécessaires.")
+
+st.markdown("---")
+
+
+# ==================================================
+# 🔵 ÉVOLUTION (instantanés par période de rapportage)
+# ==================================================
+trace.section("historique")
+
+st.markdown("## 📈 Évolution DCT 2")
+
+snapshots = load_snapshots()
+
+if snapshots is None:
+    st.info("Aucun instantané enregistré : `python -m scripts.record_snapshot AAAA-MM-JJ` à chaque période de rapportage.")
+else:
+    def build_history_chart():
+        import plotly.express as px
+
+        fig = px.line(
+            progress(snapshots.history_table, "dct2", DCT2_WEIGHTS),
+            x="period", y="Taux (%)", color="Groupe", markers=True,
+            labels={"period": "Période", "Groupe": "Activité"}
+        )
+        return fig
+
+    fig_history = cached_figure("dct2", "historique", build_history_chart, snapshots.version)
+    st.plotly_chart(fig_history, use_container_width=True)
+
+    dates = [str(p) for p in snapshots.periods]
+    col_a, col_b = st.columns(2)
+    date_a = col_a.selectbox("Date A", dates, index=max(len(dates) - 2, 0))
+    date_b = col_b.selectbox("Date B", dates, index=len(dates) - 1)
+
+    st.dataframe(
+        compare(snapshots, np.datetime64(date_a), np.datetime64(date_b), "dct2"),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+trace.end()
+performance_panel()
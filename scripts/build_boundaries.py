@@ -0,0 +1,36 @@
+"""Offline preprocessing of the boundary layers.
+
+Run from the repository root after updating ``data/*.geojson``:
+
+    python -m scripts.build_boundaries
+
+Prints, per layer and tier, the size of the Arrow store file and of the map
+payload before (GeoJSON) and after (quantized TopoJSON), raw and gzipped,
+then writes the equal-area metrics of every pcode (``utils/areas.py``).
+"""
+import os
+
+from utils.areas import EQUAL_AREA_CRS, build_areas
+from utils.boundaries import DERIVED_DIR, LAYERS, TIERS, build_store
+
+
+def main():
+    sizes = build_store()
+    for layer, source in LAYERS.items():
+        print(f"{layer} (source GeoJSON {os.path.getsize(source) / 1024:.1f} KB)")
+        for tier, _, tolerance in TIERS:
+            s = sizes[(layer, tier)]
+            print(
+                f"  {tier:<7} tol={tolerance:<7} store {s['store'] / 1024:7.1f} KB | "
+                f"map {s['geojson'] / 1024:7.1f} -> {s['topojson'] / 1024:6.1f} KB "
+                f"({s['topojson'] / s['geojson']:.0%}), "
+                f"gzip {s['geojson_gz'] / 1024:6.1f} -> {s['topojson_gz'] / 1024:5.1f} KB "
+                f"({s['topojson_gz'] / s['geojson_gz']:.0%})"
+            )
+    rows = build_areas()
+    print(f"Area metrics ({EQUAL_AREA_CRS.split()[0]}): " + ", ".join(f"{n} {layer} pcodes" for layer, n in rows.items()))
+    print(f"Boundary store, map payloads and area metrics written to {DERIVED_DIR}/")
+
+
+if __name__ == "__main__":
+    main()
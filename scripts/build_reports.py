@@ -0,0 +1,111 @@
+"""Batch PDF + XLSX reports for every realised distribution and its districts.
+
+    python -m scripts.build_reports [--out build/reports] [--jobs 4] [--force]
+
+Report contents are gathered in this process from the same data and chart
+functions as the dashboard (see :mod:`utils.reports`). Reports whose content
+did not change since the last run are skipped. The chart images still
+missing are rendered by a pool of worker processes (one Kaleido batch
+each), then every outdated report is written by the pool.
+
+Chart images are rendered by Kaleido, which drives a headless Chrome. Kaleido
+1.x does not bundle one; install it once with::
+
+    plotly_get_chrome
+
+The build checks for it before starting the workers and stops with that
+hint when it is missing.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _init_worker():
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+
+def collect_reports():
+    """Every report: one per realised distribution, one per district in the store."""
+    from utils.distributions import load_realized_data
+    from utils.indicators import load_distribution_kpis, load_indicators
+    from utils.reports import distribution_report, district_reports
+
+    realized = load_realized_data()
+    kpis = load_distribution_kpis(realized)
+    indicators = load_indicators()
+
+    reports = []
+    for name, d in realized.items():
+        reports.append(distribution_report(name, d, kpis.loc[name], indicators))
+        reports.extend(district_reports(name, d))
+    return reports
+
+
+def _write(args):
+    from utils.reports import write_report
+
+    return write_report(*args)
+
+
+def build(out_dir, jobs=None, force=False):
+    """Write the outdated reports; returns ``(written, skipped, images rendered)``."""
+    from utils.reports import check_renderer, is_current, missing_images, read_manifest, render_images, write_manifest
+
+    images_dir = os.path.join(out_dir, "images")
+    manifest_path = os.path.join(out_dir, "manifest.json")
+
+    reports = collect_reports()
+    manifest = {} if force else read_manifest(manifest_path)
+    pending = [r for r in reports if not is_current(r, manifest, out_dir)]
+    skipped = len(reports) - len(pending)
+    if not pending:
+        return [], skipped, 0
+
+    images = list(missing_images(pending, images_dir).items())
+    if images:
+        check_renderer()
+    workers = jobs or min(len(pending), os.cpu_count() or 1)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        # One Kaleido batch per worker: Chrome starts once per batch.
+        batches = [images[i::workers] for i in range(workers) if images[i::workers]]
+        rendered = sum(pool.map(render_images, batches))
+        written = list(pool.map(_write, [(r, out_dir, images_dir) for r in pending]))
+
+    manifest.update({r.stem: r.version for r in pending})
+    manifest = {r.stem: manifest[r.stem] for r in reports if r.stem in manifest}
+    write_manifest(manifest, manifest_path)
+    return written, skipped, rendered
+
+
+def main():
+    from utils.reports import REPORTS_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=REPORTS_DIR)
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per report, up to the CPU count)")
+    parser.add_argument("--force", action="store_true", help="rewrite every report, even if unchanged")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        written, skipped, rendered = build(args.out, args.jobs, args.force)
+    except RuntimeError as exc:
+        parser.error(str(exc))
+    for stem in written:
+        print(f"  {stem}.pdf / {stem}.xlsx")
+    print(
+        f"{len(written)} reports written, {skipped} unchanged, {rendered} chart images rendered "
+        f"in {time.perf_counter() - start:.1f}s -> {args.out}/"
+    )
+
+
+if __name__ == "__main__":
+    main()
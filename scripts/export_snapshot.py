@@ -0,0 +1,449 @@
+"""Offline static snapshot of the dashboard.
+
+Renders the ``app.py`` dashboard once per realized distribution and each of
+the pages into a self-contained HTML bundle that any static file server (or
+a browser opening it from a USB stick) can show without Streamlit:
+
+    python -m scripts.export_snapshot [--out build/snapshot] [--jobs 4] [--zip]
+
+Every view is executed headlessly with Streamlit's ``AppTest`` in a pool of
+worker processes, and its element tree (markdown, KPI cards, Plotly charts,
+tables, alerts, the folium map) is converted to HTML, so the snapshot shows
+exactly what the live pages compute. Shared assets (Plotly.js, the snapshot
+stylesheet, the Leaflet files the map pulls from CDNs) are written once under
+content-hashed names; every text file also gets a pre-compressed ``.gz``
+sibling for servers with ``gzip_static``, and ``--zip`` packs the bundle into
+a single deflated archive for slow links.
+
+The map's base layer is not bundled: its tiles still come from the CartoDB
+tile server, so without a connection the map shows the boundaries on a blank
+background. ``--out`` is replaced as a whole on every export; a non-empty
+directory is only overwritten if it holds an earlier snapshot
+(``snapshot.json``).
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import time
+import urllib.request
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUT_DIR = "build/snapshot"
+MANIFEST = "snapshot.json"
+MAP_COMPONENT = "streamlit_folium.st_folium"
+GZIP_MIN_BYTES = 1024
+FETCH_TIMEOUT = 30
+
+STYLESHEET = """
+body { margin: 0; font-family: "Source Sans Pro", Arial, sans-serif; color: #31333f; background: #f4f7fb; }
+nav { position: fixed; top: 0; bottom: 0; left: 0; width: 240px; padding: 24px 16px; background: #f0f2f6; overflow-y: auto; box-sizing: border-box; }
+nav a { display: block; padding: 6px 8px; border-radius: 6px; color: #31333f; text-decoration: none; }
+nav a.current { background: #dde3ec; font-weight: 700; }
+nav .generated { margin-top: 24px; font-size: 12px; color: #6b7280; }
+main { margin-left: 240px; padding: 32px 48px; max-width: 1400px; }
+.row { display: flex; gap: 16px; }
+.col { flex: 1 1 0; min-width: 0; }
+.metric { padding: 8px 0; }
+.metric .label { font-size: 14px; }
+.metric .value { font-size: 36px; }
+.metric .delta { font-size: 14px; }
+.delta.up { color: #09ab3b; } .delta.down { color: #ff2b2b; } .delta.off { color: #808495; }
+.alert { padding: 16px; margin: 8px 0; border-radius: 8px; }
+.alert.success { background: #dff3e4; color: #0e6027; } .alert.info { background: #e0ecfa; color: #0c4a8c; }
+.alert.warning { background: #fff6d9; color: #8a6100; } .alert.error { background: #ffe2e2; color: #8f1d1d; }
+.widget { font-size: 14px; color: #6b7280; margin: 8px 0; }
+.table { overflow-x: auto; margin: 8px 0 16px; }
+table.dataframe { border-collapse: collapse; font-size: 14px; }
+table.dataframe th, table.dataframe td { border: 1px solid #e6e9ef; padding: 4px 8px; text-align: right; }
+table.dataframe th { background: #f0f2f6; }
+.chart { width: 100%; min-height: 450px; }
+iframe.map { width: 100%; border: 0; }
+"""
+
+
+# --------------------------------------------------
+# VUES
+# --------------------------------------------------
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def views():
+    """``[(file name, title, entry point, {selectbox index: value})]``."""
+    sys.path.insert(0, REPO_ROOT)
+    from utils.distributions import load_realized_data
+
+    out = [
+        (f"{_slug(name)}.html", name, "app.py", {0: name})
+        for name in load_realized_data()
+    ]
+    for path in sorted(glob.glob(os.path.join(REPO_ROOT, "pages", "*.py"))):
+        name = os.path.splitext(os.path.basename(path))[0].split("_", 1)[1]
+        out.append((f"{_slug(name)}.html", name.replace("_", " "), os.path.relpath(path, REPO_ROOT), {}))
+    return out
+
+
+# --------------------------------------------------
+# RENDU (processus de travail)
+# --------------------------------------------------
+
+def _init_worker():
+    """Run pages from the repository root."""
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+
+def _inline(text):
+    text = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", text)
+    text = re.sub(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?!\w)", r"<em>\1</em>", text)
+    text = re.sub(r"`([^`]+)`", r"<code>\1</code>", text)
+    return re.sub(r"\[([^\]]+)\]\(([^)\s]+)\)", r'<a href="\2">\1</a>', text)
+
+
+def markdown_to_html(text, allow_html=False):
+    """The subset of Markdown the pages use (headings, rules, lists, emphasis)."""
+    if allow_html and text.lstrip().startswith("<"):
+        return text  # raw HTML/CSS written by the page
+    blocks = []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        if not allow_html:
+            block = html.escape(block, quote=False)
+        lines = block.splitlines()
+        if all(re.match(r"\s*[-*] ", line) for line in lines):
+            items = "".join(f"<li>{_inline(line.split(' ', 1)[1])}</li>" for line in lines)
+            blocks.append(f"<ul>{items}</ul>")
+            continue
+        paragraph = []
+        for line in lines:
+            heading = re.match(r"(#{1,6})\s+(.*)", line)
+            if heading or re.fullmatch(r"\s*(-{3,}|\*{3,})\s*", line):
+                if paragraph:
+                    blocks.append(f"<p>{'<br>'.join(paragraph)}</p>")
+                    paragraph = []
+                if heading:
+                    level = len(heading.group(1))
+                    blocks.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+                else:
+                    blocks.append("<hr>")
+            else:
+                paragraph.append(_inline(line))
+        if paragraph:
+            blocks.append(f"<p>{'<br>'.join(paragraph)}</p>")
+    return "\n".join(blocks)
+
+
+def _script_json(value):
+    return json.dumps(value).replace("</", "<\\/")
+
+
+class Renderer:
+    """Converts an ``AppTest`` element tree into an HTML fragment."""
+
+    def __init__(self):
+        self.charts = 0
+        self.map_pages = []
+
+    def render(self, node):
+        return "\n".join(self.element(child) for child in node.children.values())
+
+    def element(self, node):
+        kind = node.type
+        if kind == "column":
+            return f'<div class="col">{self.render(node)}</div>'
+        if hasattr(node, "children"):
+            if any(child.type == "column" for child in node.children.values()):
+                return f'<div class="row">{self.render(node)}</div>'
+            return f"<div>{self.render(node)}</div>"
+
+        if kind == "markdown":
+            return markdown_to_html(node.value, node.proto.allow_html)
+        if kind == "caption":
+            return f'<p class="widget">{markdown_to_html(node.value)}</p>'
+        if kind in ("title", "header", "subheader"):
+            level = {"title": 1, "header": 2, "subheader": 3}[kind]
+            return f"<h{level}>{html.escape(node.value)}</h{level}>"
+        if kind in ("success", "info", "warning", "error"):
+            return f'<div class="alert {kind}">{markdown_to_html(node.value)}</div>'
+        if kind == "metric":
+            return self.metric(node)
+        if kind in ("dataframe", "table"):
+            return self.table(node.value)
+        if kind == "plotly_chart":
+            return self.plotly_chart(node.proto)
+        if kind == "component_instance" and node.proto.component_name == MAP_COMPONENT:
+            return self.folium_map(json.loads(node.proto.json_args))
+        if hasattr(node, "label") and hasattr(node, "value"):
+            # Widgets are frozen at the value the snapshot was taken with
+            label = f"{html.escape(node.label)} : " if node.label else ""
+            return f'<p class="widget">{label}<strong>{html.escape(str(node.value))}</strong></p>'
+        if hasattr(node, "value"):
+            return f"<p>{html.escape(str(node.value))}</p>"
+        return ""
+
+    def metric(self, node):
+        delta = ""
+        if node.delta:
+            color = node.proto.MetricColor.Name(node.color)
+            direction = {"GREEN": "up", "RED": "down"}.get(color, "off")
+            delta = f'<div class="delta {direction}">{html.escape(node.delta)}</div>'
+        return (
+            f'<div class="metric"><div class="label">{html.escape(node.label)}</div>'
+            f'<div class="value">{html.escape(node.value)}</div>{delta}</div>'
+        )
+
+    def table(self, df):
+        table = df.to_html(
+            index=not isinstance(df.index, pd.RangeIndex), border=0, na_rep="",
+            float_format=lambda v: f"{v:,.1f}",
+        )
+        return f'<div class="table">{table}</div>'
+
+    def plotly_chart(self, proto):
+        self.charts += 1
+        spec = json.loads(proto.spec)
+        chart_id = f"chart-{self.charts}"
+        return (
+            f'<div class="chart" id="{chart_id}"></div>\n<script>Plotly.newPlot('
+            f'"{chart_id}", {_script_json(spec.get("data", []))}, '
+            f'{_script_json(spec.get("layout", {}))}, '
+            '{"responsive": true, "displaylogo": false});</script>'
+        )
+
+    def folium_map(self, args):
+        """Standalone page of a ``st_folium`` map, from the component's arguments."""
+        links = "\n".join(
+            [f'<link rel="stylesheet" href="{href}"/>' for href in args.get("css_links") or []]
+            + [f'<script src="{src}"></script>' for src in args.get("js_links") or []]
+        )
+        scripts = "\n".join(args.get(k) or "" for k in ("script", "feature_group", "layer_control"))
+        document = (
+            f'<!DOCTYPE html>\n<html>\n<head>\n{links}\n{args.get("header") or ""}\n</head>\n'
+            f'<body>\n{args.get("html") or ""}\n<div id="{args["id"]}"></div>\n'
+            f"<script>\n{scripts}\n</script>\n</body>\n</html>\n"
+        )
+        name = f"map-{hashlib.sha1(document.encode('utf-8')).hexdigest()[:10]}.html"
+        self.map_pages.append((name, document))
+        return f'<iframe class="map" src="maps/{name}" height="750" loading="lazy"></iframe>'
+
+
+def render_view(view):
+    """Run one view headlessly; returns ``(fragment, uses Plotly, map pages)``."""
+    from streamlit.testing.v1 import AppTest
+
+    filename, title, script, selections = view
+
+    at = AppTest.from_file(os.path.join(REPO_ROOT, script), default_timeout=600).run()
+    for index, value in selections.items():
+        at = at.selectbox[index].select(value).run()
+    if at.exception:
+        raise RuntimeError(f"{script}: {at.exception[0].message}")
+
+    renderer = Renderer()
+    fragment = renderer.render(at.main)
+    return fragment, renderer.charts > 0, renderer.map_pages
+
+
+# --------------------------------------------------
+# ASSETS + ÉCRITURE
+# --------------------------------------------------
+
+class Bundle:
+    """Writes the snapshot files; assets are content-addressed and written once."""
+
+    def __init__(self, out_dir, fetch=True):
+        self.out_dir = out_dir
+        self.fetch = fetch
+        self.assets = {}
+        self.remote = {}
+
+    def write(self, relpath, content):
+        path = os.path.join(self.out_dir, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        with open(path, "wb") as f:
+            f.write(data)
+        return relpath
+
+    def asset(self, name, content):
+        """Relative URL of an asset, writing it the first time it is seen."""
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        digest = hashlib.sha1(data).hexdigest()[:10]
+        if digest not in self.assets:
+            stem, ext = os.path.splitext(name)
+            self.assets[digest] = self.write(f"assets/{stem}.{digest}{ext}", data)
+        return self.assets[digest]
+
+    def localize(self, url):
+        """Local copy of a CDN asset, or the URL itself when it cannot be fetched."""
+        if not self.fetch:
+            return url
+        if url not in self.remote:
+            try:
+                with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as response:
+                    data = response.read()
+                name = os.path.basename(url.split("?")[0]) or "asset"
+                self.remote[url] = self.asset(name, data)
+            except OSError as exc:
+                print(f"  warning: {url} kept remote ({exc})", file=sys.stderr)
+                self.remote[url] = None
+        return self.remote[url] or url
+
+    def localize_document(self, document, prefix):
+        def replace(match):
+            local = self.localize(match.group(2))
+            if local == match.group(2):
+                return match.group(0)
+            return f"{match.group(1)}{prefix}{local}{match.group(3)}"
+
+        return re.sub(
+            r"""((?:src|href)=["'])(https?://[^"']+\.(?:js|css))(["'])""", replace, document
+        )
+
+    def compress(self):
+        """Pre-compressed ``.gz`` sibling for every text file worth it."""
+        saved = 0
+        for root, _, files in os.walk(self.out_dir):
+            for name in files:
+                if not name.endswith((".html", ".js", ".css")):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    data = f.read()
+                if len(data) < GZIP_MIN_BYTES:
+                    continue
+                packed = gzip.compress(data, compresslevel=9, mtime=0)
+                with open(path + ".gz", "wb") as f:
+                    f.write(packed)
+                saved += len(data) - len(packed)
+        return saved
+
+
+def page_html(title, body, nav, stylesheet, plotly_js=None):
+    scripts = f'<script src="{plotly_js}"></script>\n' if plotly_js else ""
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)} – ZARA MIRA</title>
+<link rel="stylesheet" href="{stylesheet}">
+{scripts}</head>
+<body>
+{nav}
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+
+def navigation(views, current, generated):
+    links = "\n".join(
+        f'<a href="{filename}"{" class=current" if filename == current else ""}>{html.escape(title)}</a>'
+        for filename, title, _, _ in views
+    )
+    return f'<nav>\n{links}\n<div class="generated">Instantané du {generated}</div>\n</nav>'
+
+
+def export(out_dir=OUT_DIR, jobs=None, fetch=True, archive=False):
+    """Render every view into ``out_dir``; returns the list of views written."""
+    from plotly.offline import get_plotlyjs
+
+    if os.path.isdir(out_dir) and os.listdir(out_dir):
+        if not os.path.exists(os.path.join(out_dir, MANIFEST)):
+            raise ValueError(f"{out_dir} is not empty and holds no earlier snapshot ({MANIFEST}): choose another --out")
+        shutil.rmtree(out_dir)
+
+    all_views = views()
+    bundle = Bundle(out_dir, fetch=fetch)
+    stylesheet = bundle.asset("snapshot.css", STYLESHEET)
+    generated = datetime.now().strftime("%d/%m/%Y %H:%M")
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=jobs or min(len(all_views), os.cpu_count() or 1),
+        mp_context=context,
+        initializer=_init_worker,
+    ) as pool:
+        rendered = list(pool.map(render_view, all_views))
+
+    plotly_js = None
+    for view, (fragment, uses_plotly, map_pages) in zip(all_views, rendered):
+        filename, title, _, _ = view
+        if uses_plotly and plotly_js is None:
+            plotly_js = bundle.asset("plotly.min.js", get_plotlyjs())
+        for name, document in map_pages:
+            bundle.write(f"maps/{name}", bundle.localize_document(document, "../"))
+        nav = navigation(all_views, filename, generated)
+        bundle.write(filename, page_html(
+            title, fragment, nav, stylesheet, plotly_js if uses_plotly else None
+        ))
+
+    first = all_views[0][0]
+    bundle.write("index.html", f'<!DOCTYPE html><meta charset="utf-8">'
+                               f'<meta http-equiv="refresh" content="0; url={first}">'
+                               f'<a href="{first}">{html.escape(all_views[0][1])}</a>\n')
+    saved = bundle.compress()
+    bundle.write(MANIFEST, json.dumps({
+        "generated": generated,
+        "views": [filename for filename, _, _, _ in all_views],
+    }, indent=2, ensure_ascii=False))
+
+    if archive:
+        with zipfile.ZipFile(out_dir.rstrip("/") + ".zip", "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+            for root, _, files in os.walk(out_dir):
+                for name in files:
+                    if name.endswith(".gz"):
+                        continue
+                    path = os.path.join(root, name)
+                    zf.write(path, os.path.relpath(path, os.path.dirname(out_dir.rstrip("/"))))
+
+    return all_views, saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per view, up to the CPU count)")
+    parser.add_argument("--no-fetch", action="store_true", help="keep the map's CDN assets remote")
+    parser.add_argument("--zip", action="store_true", help="also pack the bundle into <out>.zip")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        written, saved = export(args.out, args.jobs, fetch=not args.no_fetch, archive=args.zip)
+    except ValueError as exc:
+        parser.error(str(exc))
+    size = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(args.out) for name in files if not name.endswith(".gz")
+    )
+    for filename, title, _, _ in written:
+        print(f"  {filename:<40} {title}")
+    print(
+        f"{len(written)} views, {size / 1024:,.0f} KB ({saved / 1024:,.0f} KB saved by gzip) "
+        f"in {time.perf_counter() - start:.1f}s -> {args.out}/"
+    )
+
+
+if __name__ == "__main__":
+    # Streamlit swaps ``sys.modules["__main__"]`` while a page runs, so the
+    # workers must find the functions they unpickle under the module's name.
+    from scripts.export_snapshot import main
+
+    main()
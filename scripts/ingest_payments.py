@@ -0,0 +1,39 @@
+"""Load a payment plan's exports into the partitioned beneficiary store.
+
+    python -m scripts.ingest_payments PP-2670-25-00000006 3
+
+The distribution's reached-household array (``data/store/households/``)
+and the running totals (``data/store/cumulative/``) are brought up to date
+afterwards.
+"""
+import argparse
+import time
+
+from utils.cumulative import update_cumulative
+from utils.distributions import load_realized_data
+from utils.households import write_distribution_ids
+from utils.store import STORE_DIR, ingest_plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payment_code", help="e.g. PP-2670-25-00000006")
+    parser.add_argument("distribution", type=int, help="distribution number (1-10)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = ingest_plan(args.payment_code, args.distribution)
+    print(
+        f"{args.payment_code} -> distribution={args.distribution}: "
+        f"{rows:,} rows in {time.perf_counter() - start:.1f}s ({STORE_DIR}/)"
+    )
+
+    households = write_distribution_ids(args.distribution, args.payment_code)
+    print(f"distribution={args.distribution}: {households or 0:,} households reached")
+
+    computed = update_cumulative(load_realized_data())
+    print(f"running totals recomputed for distributions: {', '.join(map(str, computed)) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Import-time profile of each entry point.
+
+Runs the module-level imports of ``app.py`` and every page in a fresh
+interpreter with ``python -X importtime`` and reports the total import time
+and the heaviest top-level packages, i.e. what a first visitor waits for
+after a deploy before the page can start rendering.
+
+    python -m scripts.profile_imports [--top 8]
+"""
+import argparse
+import ast
+import glob
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def entry_points():
+    return ["app.py"] + sorted(
+        os.path.relpath(p, REPO_ROOT) for p in glob.glob(os.path.join(REPO_ROOT, "pages", "*.py"))
+    )
+
+
+def module_imports(path):
+    """Source of the import block at the top of ``path``.
+
+    Imports placed further down a page (next to the section that needs them)
+    run after the page has started rendering and are left out.
+    """
+    with open(os.path.join(REPO_ROOT, path), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+            continue  # module docstring
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            break
+        nodes.append(node)
+    return "\n".join(ast.unparse(n) for n in nodes)
+
+
+def profile(code):
+    """``(total µs, [(cumulative µs, top-level module)])`` for ``code``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total = 0
+    top = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = match.groups()
+        total += int(own)
+        if len(indent) == 1:
+            top.append((int(cumulative), name))
+    return total, sorted(top, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile per entry point")
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    for path in entry_points():
+        total, top = profile(module_imports(path))
+        print(f"\n{path}: {total / 1000:.0f} ms of imports")
+        for cumulative, name in top[:args.top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
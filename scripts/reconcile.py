@@ -0,0 +1,46 @@
+"""Reconcile a payment plan against the provider's confirmation files.
+
+    python -m scripts.reconcile PP-2670-25-00000006 3 [--mismatches out.csv]
+
+Plan rows come from ``data/payments/`` (or the beneficiary store),
+confirmations from ``data/confirmations/<payment_code>*.csv|xlsx``.
+"""
+import argparse
+import time
+
+from utils.reconciliation import (
+    MISMATCHES, confirmation_chunks, confirmation_files, plan_chunks, reconcile,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payment_code", help="e.g. PP-2670-25-00000006")
+    parser.add_argument("distribution", type=int, help="distribution number (1-10)")
+    parser.add_argument("--mismatches", help="write the flagged households to this CSV")
+    args = parser.parse_args()
+
+    confirmations = confirmation_files(args.payment_code)
+    if not confirmations:
+        parser.error(f"no confirmation file for {args.payment_code}")
+
+    start = time.perf_counter()
+    result = reconcile(
+        plan_chunks(args.payment_code, args.distribution), confirmation_chunks(confirmations)
+    )
+    t = result.totals
+    print(f"{args.payment_code}: reconciled in {time.perf_counter() - start:.1f}s")
+    print(f"  households  {t['households_reach']:,} reached / {t['households_plan']:,} planned")
+    print(f"  cash        {t['cash_reach']:,.0f} paid / {t['cash_plan']:,.0f} planned "
+          f"({t['cash_undelivered']:,.0f} undelivered)")
+    for category, label in MISMATCHES.items():
+        print(f"  {label:<20}{t[f'households_{category}']:>8,} households "
+              f"{t[f'cash_{category}']:>16,.0f} off plan")
+
+    if args.mismatches:
+        result.mismatches.to_csv(args.mismatches, index=False)
+        print(f"Mismatches written to {args.mismatches}")
+
+
+if __name__ == "__main__":
+    main()
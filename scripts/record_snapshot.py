@@ -0,0 +1,30 @@
+"""Record the current indicator values as a reporting period.
+
+    python -m scripts.record_snapshot 2026-09-30 [--project zara_mira]
+
+Appends the ``Cible``/``Réalisé`` of every indicator (logframe and DCT 2,
+``utils/indicators.py``) to ``data/store/snapshots/`` as of that date; only
+the values that changed since the previous period are written.
+"""
+import argparse
+
+from utils.indicators import combined_table
+from utils.snapshots import PROJECT, record_snapshot, snapshot_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("period", help="reporting date, YYYY-MM-DD")
+    parser.add_argument("--project", default=PROJECT)
+    args = parser.parse_args()
+
+    try:
+        changed = record_snapshot(combined_table(), args.period, args.project)
+    except ValueError as exc:
+        parser.error(str(exc))
+    periods = len(snapshot_files(args.project))
+    print(f"{args.project} {args.period}: {changed} values changed ({periods} periods recorded)")
+
+
+if __name__ == "__main__":
+    main()
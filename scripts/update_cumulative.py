@@ -0,0 +1,29 @@
+"""Materialise the running totals of the realised distributions.
+
+    python -m scripts.update_cumulative
+
+Writes ``data/store/cumulative/`` (see :mod:`utils.cumulative`): only the
+distributions whose figures changed since the last run are recomputed.
+``scripts.ingest_payments`` runs it after each ingest; run it by hand after
+adding confirmation files.
+"""
+import argparse
+import time
+
+from utils.cumulative import CUMULATIVE_DIR, update_cumulative
+from utils.distributions import load_realized_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=CUMULATIVE_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    computed = update_cumulative(load_realized_data(), args.out)
+    listed = ", ".join(str(n) for n in computed) or "none"
+    print(f"distributions recomputed: {listed} in {time.perf_counter() - start:.1f}s ({args.out}/)")
+
+
+if __name__ == "__main__":
+    main()
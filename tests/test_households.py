@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.households import contains, distribution_ids, household_flows, reached_ids, write_distribution_ids
+
+
+def _hash(ids):
+    return pd.util.hash_array(np.array(ids, dtype=object))
+
+
+def _chunk(rows):
+    return pd.DataFrame(rows, columns=["household_id", "amount_paid"])
+
+
+def test_reached_ids_are_the_paid_households():
+    chunks = [
+        _chunk([("A", 10), ("B", 0), ("A", 5), ("", 10)]),
+        _chunk([("C", 20), (None, 10), ("B", 0)]),
+        _chunk([]),
+    ]
+    ids = reached_ids(chunks)
+    assert ids.dtype == np.uint64
+    assert ids.tolist() == sorted(_hash(["A", "C"]).tolist())
+    assert len(reached_ids([])) == 0
+
+
+def test_contains_matches_set_membership():
+    rng = np.random.default_rng(0)
+    sorted_ids = np.unique(rng.integers(0, 1000, 300).astype(np.uint64))
+    ids = rng.integers(0, 1100, 500).astype(np.uint64)
+    assert contains(sorted_ids, ids).tolist() == [i in set(sorted_ids) for i in ids]
+    assert contains(np.empty(0, dtype=np.uint64), ids).tolist() == [False] * len(ids)
+    assert contains(sorted_ids, np.empty(0, dtype=np.uint64)).tolist() == []
+
+
+def _naive_flows(id_sets):
+    seen, previous, rows = set(), set(), []
+    for distribution, ids in sorted(id_sets.items()):
+        ids = set(ids)
+        rows.append({
+            "distribution": distribution,
+            "reached": len(ids),
+            "first_time": len(ids - seen),
+            "repeat": len(ids & seen),
+            "returning": len((ids & seen) - previous),
+            "dropouts": len(previous - ids),
+            "cumulative_unique": len(seen | ids),
+        })
+        seen |= ids
+        previous = ids
+    return rows
+
+
+def test_flows_match_set_operations():
+    rng = np.random.default_rng(1)
+    id_sets = {
+        # distribution 4 is absent (no payment rows); 3 reached nobody
+        1: np.unique(rng.integers(0, 500, 300)).astype(np.uint64),
+        2: np.unique(rng.integers(200, 700, 300)).astype(np.uint64),
+        3: np.empty(0, dtype=np.uint64),
+        5: np.unique(rng.integers(0, 800, 400)).astype(np.uint64),
+        6: np.unique(rng.integers(0, 800, 400)).astype(np.uint64),
+    }
+    flows = household_flows(id_sets)
+    assert flows.to_dict("records") == _naive_flows(id_sets)
+
+    after_empty = flows.set_index("distribution").loc[5]
+    assert after_empty["dropouts"] == 0
+    assert after_empty["returning"] == after_empty["repeat"]
+
+
+def test_no_distributions():
+    flows = household_flows({})
+    assert flows.empty
+    assert list(flows.columns) == [
+        "distribution", "reached", "first_time", "repeat", "returning", "dropouts", "cumulative_unique",
+    ]
+
+
+@pytest.fixture
+def payments(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("data", "payments"))
+
+    def export(code, rows):
+        pd.DataFrame(rows, columns=["household_id", "delivered_quantity"]).to_csv(
+            os.path.join("data", "payments", f"{code}.csv"), index=False
+        )
+
+    return export
+
+
+def test_absent_distribution_has_no_ids(payments, tmp_path):
+    directory = tmp_path / "households"
+    assert distribution_ids(4, "PP-ABSENT", directory) is None
+    assert write_distribution_ids(4, "PP-ABSENT", directory) is None
+    assert not directory.exists()
+
+
+def test_written_ids_round_trip(payments, tmp_path):
+    directory = tmp_path / "households"
+    payments("PP-PAID", [("A", 10), ("B", 0), ("C", 5), ("A", 3)])
+    payments("PP-NONE", [("A", 0), ("B", 0)])
+
+    computed = distribution_ids(1, "PP-PAID", directory)
+    assert write_distribution_ids(1, "PP-PAID", directory) == 2
+    assert write_distribution_ids(2, "PP-NONE", directory) == 0
+
+    stored = distribution_ids(1, "PP-PAID", directory)
+    assert isinstance(stored, np.memmap)
+    assert stored.tolist() == computed.tolist() == sorted(_hash(["A", "C"]).tolist())
+
+    nobody = distribution_ids(2, "PP-NONE", directory)
+    assert isinstance(nobody, np.memmap)
+    assert len(nobody) == 0
+
+    flows = household_flows({1: stored, 2: nobody})
+    assert flows["reached"].tolist() == [2, 0]
+    assert flows["dropouts"].tolist() == [0, 2]
+
+
+def test_new_payment_data_replaces_the_stored_array(payments, tmp_path):
+    directory = tmp_path / "households"
+    payments("PP-PAID", [("A", 10)])
+    write_distribution_ids(1, "PP-PAID", directory)
+    payments("PP-PAID", [("A", 10), ("B", 10), ("C", 10)])
+
+    assert len(distribution_ids(1, "PP-PAID", directory)) == 3
+    write_distribution_ids(1, "PP-PAID", directory)
+    assert len(os.listdir(directory)) == 1
+    assert len(distribution_ids(1, "PP-PAID", directory)) == 3
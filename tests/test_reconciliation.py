@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from utils.reconciliation import reconcile
+
+
+def _plan(rows):
+    return [pd.DataFrame(rows, columns=["household_id", "amount_plan"])]
+
+
+def _confirmations(rows):
+    return [pd.DataFrame(rows, columns=["household_id", "amount_confirmed"])]
+
+
+@pytest.fixture
+def result():
+    plan = _plan([
+        ("SPLIT", 50), ("SPLIT", 50),   # two beneficiaries, paid in two transactions
+        ("EXACT", 100),
+        ("DOUBLE", 100),                # paid twice
+        ("OVER", 100),                  # one transaction above plan
+        ("UNDER", 100), ("UNDER", 50),  # two transactions below plan
+        ("NONE", 100),                  # never paid
+    ])
+    confirmations = _confirmations([
+        ("SPLIT", 50), ("SPLIT", 50),
+        ("EXACT", 100),
+        ("DOUBLE", 100), ("DOUBLE", 100),
+        ("OVER", 130),
+        ("UNDER", 60), ("UNDER", 40),
+        ("GHOST", 70), ("GHOST", 30),
+    ])
+    return reconcile(plan, confirmations)
+
+
+def _categories(result):
+    return dict(zip(result.mismatches["household_id"], result.mismatches["category"]))
+
+
+def test_split_payment_matching_plan_is_not_flagged(result):
+    assert "SPLIT" not in _categories(result)
+    assert "EXACT" not in _categories(result)
+
+
+def test_several_transactions_above_plan_are_duplicates(result):
+    assert _categories(result)["DOUBLE"] == "duplicate"
+    assert result.totals["households_duplicate"] == 1
+    assert result.totals["cash_duplicate"] == 100
+
+
+def test_over_and_under_payments_are_amount_mismatches(result):
+    categories = _categories(result)
+    assert categories["OVER"] == "amount_mismatch"
+    assert categories["UNDER"] == "amount_mismatch"
+    assert result.totals["households_amount_mismatch"] == 2
+    assert result.totals["cash_amount_mismatch"] == 30 + 50
+
+
+def test_unpaid_household_is_unreached_not_a_mismatch(result):
+    assert "NONE" not in _categories(result)
+    assert result.totals["households_plan"] == 6
+    assert result.totals["households_reach"] == 5
+    assert result.totals["households_unreached"] == 1
+    assert result.totals["cash_undelivered"] == 100 + 50
+
+
+def test_unknown_households(result):
+    unknown = result.mismatches[result.mismatches["category"] == "unknown"]
+    assert unknown["household_id"].tolist() == ["GHOST"]
+    assert unknown["paid"].tolist() == [100]
+    assert result.totals["households_unknown"] == 1
+    assert result.totals["cash_unknown"] == 100
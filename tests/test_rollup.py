@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.rollup import COUNT_COLUMNS, CommuneKeys, rollup
+from utils.store import CATEGORIES
+
+PROPERTIES = [
+    {"ADM3_PCODE": "P3", "ADM2_EN": "North", "ADM3_EN": "Three"},
+    {"ADM3_PCODE": "P1", "ADM2_EN": "North", "ADM3_EN": "One"},
+    {"ADM3_PCODE": "P2", "ADM2_EN": "South", "ADM3_EN": "Two"},
+    {"ADM3_PCODE": "P1", "ADM2_EN": "North", "ADM3_EN": "One"},  # second feature of P1
+    {"ADM3_PCODE": "P4", "ADM2_EN": "East", "ADM3_EN": "Four"},  # no records
+]
+DISTRICTS = {"P1": "NORTH", "P2": "SOUTH", "P3": "NORTH", "P4": "EAST"}
+
+
+@pytest.fixture
+def keys():
+    return CommuneKeys(PROPERTIES)
+
+
+def _records(seed, size, counted=False):
+    rng = np.random.default_rng(seed)
+    chunk = pd.DataFrame({
+        "commune": pd.array(rng.choice(["P1", "P2", "P3", "GONE", None], size), dtype="string"),
+        "category": pd.array(rng.choice(["enfant", "Handicap", "femme_enceinte", "autre"], size), dtype="string"),
+    })
+    if counted:
+        chunk["count"] = rng.integers(0, 50, size)
+    return chunk
+
+
+def _naive(chunks):
+    """Commune × count column totals with a plain groupby."""
+    records = pd.concat(chunks, ignore_index=True)
+    if "count" not in records:
+        records["count"] = 1
+    records["column"] = records["category"].str.lower().map(CATEGORIES)
+    known = records["commune"].isin(DISTRICTS)
+    unmatched = int(records.loc[~known.fillna(False).astype(bool), "count"].sum())
+    kept = records[known.fillna(False).astype(bool) & records["column"].notna()]
+    totals = kept.groupby(["commune", "column"])["count"].sum()
+    return {key: int(n) for key, n in totals.items() if n}, unmatched
+
+
+def _cells(table, key):
+    return {
+        (k, column): int(n)
+        for k, row in zip(table[key], table[COUNT_COLUMNS].itertuples(index=False))
+        for column, n in zip(COUNT_COLUMNS, row)
+        if n
+    }
+
+
+@pytest.mark.parametrize("counted", [False, True])
+def test_rollup_matches_a_groupby(keys, counted):
+    chunks = [_records(seed, 300, counted) for seed in range(3)]
+    expected, unmatched = _naive(chunks)
+
+    result = rollup(iter(chunks), keys)
+
+    assert _cells(result.communes, "ADM3_PCODE") == expected
+    assert result.unmatched == unmatched
+
+    by_district = {}
+    for (pcode, column), n in expected.items():
+        by_district[(DISTRICTS[pcode], column)] = by_district.get((DISTRICTS[pcode], column), 0) + n
+    assert _cells(result.districts.reset_index(), "District") == by_district
+
+    programme = {column: sum(n for (_, c), n in expected.items() if c == column) for column in COUNT_COLUMNS}
+    assert result.programme.to_dict() == programme
+
+
+def test_communes_without_records_are_left_out(keys):
+    result = rollup(iter([_records(0, 100)]), keys)
+    assert "P4" not in set(result.communes["ADM3_PCODE"])
+    assert "EAST" not in set(result.districts.index)
+    assert dict(zip(result.communes["ADM3_PCODE"], result.communes["District"])) == {
+        p: DISTRICTS[p] for p in result.communes["ADM3_PCODE"]
+    }
+
+
+def test_no_records(keys):
+    result = rollup(iter([]), keys)
+    assert result.communes.empty
+    assert result.districts.empty
+    assert result.programme.sum() == 0
+    assert result.unmatched == 0
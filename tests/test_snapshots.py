@@ -0,0 +1,76 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.snapshots import progress, read_index, record_snapshot
+
+
+def _table(rows):
+    return pd.DataFrame(rows, columns=["source", "Groupe", "Indicateur", "Cible", "Réalisé"])
+
+
+A = ("dct2", "Santé", "A")
+B = ("dct2", "Santé", "B")
+
+
+def _values(frame, indicator):
+    row = frame[frame["Indicateur"] == indicator[2]]
+    assert len(row) == 1
+    return row["Cible"].iloc[0], row["Réalisé"].iloc[0]
+
+
+def test_target_change_is_seen_from_its_period(tmp_path):
+    record_snapshot(_table([(*A, 100, 10), (*B, 50, 5)]), "2026-01-31", directory=tmp_path)
+    assert record_snapshot(_table([(*A, 120, 10), (*B, 50, 5)]), "2026-02-28", directory=tmp_path) == 1
+
+    index = read_index(directory=tmp_path)
+    assert _values(index.as_of(np.datetime64("2026-01-31")), A) == (100, 10)
+    assert _values(index.as_of(np.datetime64("2026-02-28")), A) == (120, 10)
+
+
+def test_between_periods_reads_the_previous_one(tmp_path):
+    record_snapshot(_table([(*A, 100, 10)]), "2026-01-31", directory=tmp_path)
+    record_snapshot(_table([(*A, 100, 40)]), "2026-03-31", directory=tmp_path)
+
+    index = read_index(directory=tmp_path)
+    assert _values(index.as_of(np.datetime64("2026-02-15")), A) == (100, 10)
+    assert index.as_of(np.datetime64("2025-12-31")).empty
+
+
+def test_dropped_indicator_leaves_and_comes_back(tmp_path):
+    record_snapshot(_table([(*A, 100, 10), (*B, 50, 5)]), "2026-01-31", directory=tmp_path)
+    assert record_snapshot(_table([(*A, 100, 10)]), "2026-02-28", directory=tmp_path) == 1
+    assert record_snapshot(_table([(*A, 100, 10), (*B, 50, 5)]), "2026-03-31", directory=tmp_path) == 1
+
+    index = read_index(directory=tmp_path)
+    assert set(index.as_of(np.datetime64("2026-02-28"))["Indicateur"]) == {"A"}
+    assert _values(index.as_of(np.datetime64("2026-03-31")), B) == (50, 5)
+    assert len(index.history()) == 5
+
+
+def test_null_realise_is_a_value_not_a_drop(tmp_path):
+    record_snapshot(_table([(*A, 100, None)]), "2026-01-31", directory=tmp_path)
+    assert record_snapshot(_table([(*A, 100, None)]), "2026-02-28", directory=tmp_path) == 0
+
+    frame = read_index(directory=tmp_path).as_of(np.datetime64("2026-02-28"))
+    cible, realise = _values(frame, A)
+    assert cible == 100 and np.isnan(realise)
+
+
+def test_earlier_or_same_period_is_rejected(tmp_path):
+    record_snapshot(_table([(*A, 100, 10)]), "2026-02-28", directory=tmp_path)
+    for period in ("2026-02-28", "2026-01-31"):
+        with pytest.raises(ValueError):
+            record_snapshot(_table([(*A, 100, 20)]), period, directory=tmp_path)
+    assert list(read_index(directory=tmp_path).periods) == [np.datetime64("2026-02-28")]
+
+
+def test_progress_does_not_warn(tmp_path):
+    record_snapshot(_table([(*A, 100, 10), (*B, 50, 5)]), "2026-01-31", directory=tmp_path)
+    history = read_index(directory=tmp_path).history()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        curves = progress(history, "dct2", {"Santé": 1.0})
+    assert curves["Taux (%)"].tolist() == [10.0, 10.0]
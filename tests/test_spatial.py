@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import box, mapping
+
+from utils.spatial import CommuneIndex, count_sites
+
+
+def _feature(geometry, pcode, commune, district="D"):
+    return {
+        "type": "Feature",
+        "properties": {"ADM3_PCODE": pcode, "ADM3_EN": commune, "ADM2_EN": district},
+        "geometry": mapping(geometry),
+    }
+
+
+@pytest.fixture
+def index():
+    # A and B share the border x = 1; C is made of two features.
+    return CommuneIndex({"type": "FeatureCollection", "features": [
+        _feature(box(0, 0, 1, 1), "A", "Alpha"),
+        _feature(box(1, 0, 2, 1), "B", "Beta"),
+        _feature(box(3, 0, 4, 1), "C", "Gamma", "E"),
+        _feature(box(4, 0, 5, 1), "C", "Gamma", "E"),
+    ]})
+
+
+def _naive(index, lon, lat):
+    """First polygon in index order containing or touching each point, else -1."""
+    out = []
+    for x, y in zip(lon, lat):
+        point = shapely.Point(x, y)
+        out.append(next((i for i, p in enumerate(index.polygons) if p.intersects(point)), -1))
+    return np.array(out)
+
+
+def test_assign_matches_a_loop_over_polygons(index):
+    rng = np.random.default_rng(0)
+    lon = rng.uniform(-0.5, 5.5, 2000)
+    lat = rng.uniform(-0.5, 1.5, 2000)
+    assert (index.assign(lon, lat) == _naive(index, lon, lat)).all()
+
+
+def test_shared_border_goes_to_the_first_polygon(index):
+    lon, lat = [1.0, 1.0, 4.0, 2.0], [0.5, 0.0, 0.5, 0.5]
+    assert index.assign(lon, lat).tolist() == [0, 0, 2, 1]
+    assert (index.assign(lon, lat) == _naive(index, lon, lat)).all()
+
+
+def test_outside_points_and_empty_input(index):
+    assert index.assign([2.5, 10.0], [0.5, 0.5]).tolist() == [-1, -1]
+    assert index.assign([], []).tolist() == []
+
+
+def test_site_counts_sum_features_per_pcode(index, tmp_path):
+    rng = np.random.default_rng(1)
+    lon = rng.uniform(-0.5, 5.5, 500)
+    lat = rng.uniform(-0.5, 1.5, 500)
+    path = tmp_path / "payment_sites.csv"
+    pd.DataFrame({"site_id": range(500), "latitude": lat, "longitude": lon}).to_csv(path, index=False)
+
+    sites, unassigned = count_sites(index, [str(path)])
+
+    naive = pd.Series(_naive(index, lon, lat))
+    expected = naive[naive >= 0].map(lambda i: index.pcodes[i]).value_counts()
+    assert dict(zip(sites["ADM3_PCODE"], sites["Sites"])) == {p: expected.get(p, 0) for p in ["A", "B", "C"]}
+    assert unassigned == int((naive < 0).sum())
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import shape
+
+from utils.viewport import LayerIndex, box_bounds, tile_box, tile_degrees
+
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+
+@pytest.mark.parametrize("padding", [0, 0.5])
+def test_box_covers_the_padded_viewport(padding):
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        zoom = int(rng.integers(5, 14))
+        west, south = rng.uniform(40, 50), rng.uniform(-25, -15)
+        width, height = rng.uniform(0.01, 3) * tile_degrees(zoom), rng.uniform(0.01, 3) * tile_degrees(zoom)
+        viewport = (west, south, west + width, south + height)
+
+        box = tile_box(viewport, zoom, padding)
+        padded = (west - width * padding, south - height * padding,
+                  west + width * (1 + padding), south + height * (1 + padding))
+        assert box[0] == zoom
+        assert _contains(box_bounds(box), padded)
+        # Snapped outward by less than one cell on each side.
+        step = tile_degrees(zoom)
+        assert not _contains(box_bounds(box), (padded[0] - step, padded[1], padded[2], padded[3]))
+        assert not _contains(box_bounds(box), (padded[0], padded[1], padded[2] + step, padded[3]))
+
+
+def test_viewport_across_a_cell_border_takes_both_cells():
+    step = tile_degrees(8)
+    viewport = (2.9 * step, -1.2 * step, 3.1 * step, -0.8 * step)  # crosses x = 3 and y = -1 cells
+    assert tile_box(viewport, 8, padding=0) == (8, 2, -2, 4, 0)
+    assert box_bounds((8, 2, -2, 4, 0)) == (2 * step, -2 * step, 4 * step, 0.0)
+
+
+def test_small_pans_keep_the_box():
+    step = tile_degrees(10)
+    viewport = (10.3 * step, 20.3 * step, 10.6 * step, 20.6 * step)
+    box = tile_box(viewport, 10)
+    for dx, dy in [(0.01, 0), (0, -0.01), (0.005, 0.005)]:
+        moved = (viewport[0] + dx * step, viewport[1] + dy * step, viewport[2] + dx * step, viewport[3] + dy * step)
+        assert tile_box(moved, 10) == box
+    far = tuple(v + 2 * step for v in viewport)
+    assert tile_box(far, 10) != box
+
+
+# --------------------------------------------------
+# INDEX
+# --------------------------------------------------
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(1)
+    geometries = [shapely.box(x, y, x + 1, y + 1) for x in range(6) for y in range(4)]
+    geometries += [
+        shapely.Polygon([(0.5, 0.5), (5.5, 1.5), (2.5, 3.5)]),
+        shapely.MultiPolygon([shapely.box(0.2, 0.2, 0.4, 0.4), shapely.box(4.6, 2.6, 4.8, 2.8)]),
+        shapely.box(20, 20, 21, 21),
+    ]
+    geometries += [shapely.Point(rng.uniform(0, 6), rng.uniform(0, 4)).buffer(0.3) for _ in range(20)]
+    return LayerIndex(geometries, [{"id": i} for i in range(len(geometries))])
+
+
+BOUNDS = [
+    (1.5, 0.5, 3.5, 2.5),    # crosses cell borders
+    (1.0, 1.0, 3.0, 3.0),    # on cell borders
+    (-1.0, -1.0, 7.0, 5.0),  # everything but the far box
+    (10.0, 10.0, 11.0, 11.0),
+]
+
+
+@pytest.mark.parametrize("bounds", BOUNDS)
+def test_query_matches_a_loop(index, bounds):
+    box = shapely.box(*bounds)
+    expected = [i for i, g in enumerate(index.geometries) if g.intersects(box)]
+    assert index.query(bounds).tolist() == expected
+
+
+@pytest.mark.parametrize("bounds", BOUNDS)
+def test_clip_matches_the_intersection(index, bounds):
+    box = shapely.box(*bounds)
+    original = index.geometries.copy()
+    clipped = {f["properties"]["id"]: shape(f["geometry"]) for f in index.clip(bounds)["features"]}
+
+    expected = {}
+    for i, geometry in enumerate(original):
+        part = geometry.intersection(box)
+        if part.area > 0:
+            expected[i] = part
+    assert sorted(clipped) == sorted(expected)
+    for i, geometry in clipped.items():
+        assert geometry.area == pytest.approx(expected[i].area)
+        assert geometry.difference(expected[i]).area == pytest.approx(0, abs=1e-9)
+        if box.contains_properly(original[i]):
+            assert geometry.equals_exact(original[i], 0)
+    # The index geometries are not clipped in place.
+    assert all(a is b for a, b in zip(index.geometries, original))
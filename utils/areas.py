@@ -0,0 +1,154 @@
+"""Equal-area metrics of the boundary layers: area, centroid and bounding box.
+
+``python -m scripts.build_boundaries`` projects every source polygon once to
+a Lambert azimuthal equal-area CRS centred on the programme area
+(``EQUAL_AREA_CRS``, with ``pyproj``) and writes one row per pcode to
+``data/derived/<layer>.areas.arrow``:
+
+* ``area_km2``: projected area, summed over the features of the pcode;
+* ``centroid_lon`` / ``centroid_lat``: area centroid, computed in the
+  projection and converted back to WGS84;
+* ``min_lon`` ... ``max_lat``: bounding box in WGS84.
+
+Pages read that attribute table (cached, shared by every session) and derive
+densities with a join on the pcode (:func:`with_density`), so no geometry
+is touched on a rerun. Without the derived file the table is computed from
+the source GeoJSON on first use.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import shapely
+import streamlit as st
+
+from utils.boundaries import DERIVED_DIR, LAYERS, PCODE_FIELDS, read_geojson, write_table
+from utils.datasets import share
+from utils.versioning import file_version
+
+# Lambert azimuthal equal-area centred on Atsimo Atsinanana (map centre):
+# area distortion is nil, shape distortion negligible over the three districts.
+EQUAL_AREA_CRS = "+proj=laea +lat_0=-22 +lon_0=47 +x_0=0 +y_0=0 +datum=WGS84 +units=m +no_defs"
+
+NAME_FIELDS = {
+    "adm2": "ADM2_EN",
+    "adm3": "ADM3_EN",
+}
+
+
+def areas_path(layer, directory=DERIVED_DIR):
+    stem = os.path.splitext(os.path.basename(LAYERS[layer]))[0]
+    return os.path.join(directory, f"{stem}.areas.arrow")
+
+
+def _transformers():
+    from pyproj import Transformer
+
+    return (
+        Transformer.from_crs("EPSG:4326", EQUAL_AREA_CRS, always_xy=True),
+        Transformer.from_crs(EQUAL_AREA_CRS, "EPSG:4326", always_xy=True),
+    )
+
+
+def area_metrics(collection, layer):
+    """One row per pcode of ``collection`` (see module docstring), by pcode."""
+    forward, inverse = _transformers()
+    features = collection["features"]
+    geoms = np.array([shapely.geometry.shape(f["geometry"]) for f in features])
+    projected = shapely.transform(geoms, lambda xy: np.column_stack(forward.transform(xy[:, 0], xy[:, 1])))
+
+    centroids = shapely.get_coordinates(shapely.centroid(projected))
+    bounds = shapely.bounds(geoms)
+    parts = pd.DataFrame({
+        "pcode": [f["properties"][PCODE_FIELDS[layer]] for f in features],
+        "name": [f["properties"][NAME_FIELDS[layer]] for f in features],
+        "area": shapely.area(projected),
+        "x": centroids[:, 0],
+        "y": centroids[:, 1],
+        "min_lon": bounds[:, 0],
+        "min_lat": bounds[:, 1],
+        "max_lon": bounds[:, 2],
+        "max_lat": bounds[:, 3],
+    })
+
+    # Features of one pcode are disjoint: areas add up and the centroid of
+    # the whole is the area-weighted mean of the part centroids.
+    parts["wx"] = parts["x"] * parts["area"]
+    parts["wy"] = parts["y"] * parts["area"]
+    grouped = parts.groupby("pcode", sort=True)
+    table = grouped.agg(
+        name=("name", "first"), area=("area", "sum"), wx=("wx", "sum"), wy=("wy", "sum"),
+        min_lon=("min_lon", "min"), min_lat=("min_lat", "min"),
+        max_lon=("max_lon", "max"), max_lat=("max_lat", "max"),
+    )
+    lon, lat = inverse.transform(
+        (table["wx"] / table["area"]).to_numpy(), (table["wy"] / table["area"]).to_numpy()
+    )
+
+    return pd.DataFrame({
+        "name": table["name"],
+        "area_km2": table["area"] / 1e6,
+        "centroid_lon": lon,
+        "centroid_lat": lat,
+        **{c: table[c] for c in ("min_lon", "min_lat", "max_lon", "max_lat")},
+    }).rename_axis(PCODE_FIELDS[layer])
+
+
+# --------------------------------------------------
+# PRÉTRAITEMENT (écriture hors ligne)
+# --------------------------------------------------
+
+def build_areas(out_dir=DERIVED_DIR):
+    """Write the area table of every layer; returns ``{layer: rows}``."""
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    for layer, source in LAYERS.items():
+        metrics = area_metrics(read_geojson(source), layer)
+        table = pa.Table.from_pandas(metrics.reset_index(), preserve_index=False)
+        table = table.replace_schema_metadata({"pcode": PCODE_FIELDS[layer]})
+        write_table(table, areas_path(layer, out_dir))
+        written[layer] = len(metrics)
+    return written
+
+
+# --------------------------------------------------
+# LECTURE
+# --------------------------------------------------
+
+@st.cache_resource(show_spinner=False)
+def _cached_areas(layer, version):
+    path = areas_path(layer)
+    if os.path.exists(path):
+        with pa.memory_map(path, "r") as source:
+            metrics = pa.ipc.open_file(source).read_all().to_pandas().set_index(PCODE_FIELDS[layer])
+    else:
+        metrics = area_metrics(read_geojson(LAYERS[layer]), layer)
+    return share(f"surfaces ({layer})", metrics)
+
+
+def load_areas(layer):
+    """Area table of ``layer`` indexed by pcode (read-only, shared)."""
+    path = areas_path(layer)
+    version = file_version(path) if os.path.exists(path) else f"source-{file_version(LAYERS[layer])}"
+    return _cached_areas(layer, version)
+
+
+def with_density(df, area_km2, on, columns, total="Bénéficiaires"):
+    """``df`` plus ``Superficie (km²)`` and per-km² densities of ``columns``.
+
+    ``area_km2`` is a Series of areas indexed by the keys found in column
+    ``on`` of ``df`` (its index when ``on`` is ``None``); ``total`` names the
+    density of the sum of ``columns``.
+    """
+    keys = df.index if on is None else df[on]
+    area = area_km2.reindex(keys).to_numpy(dtype=float)
+    counts = df[columns].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        density = counts / area[:, None]
+        overall = counts.sum(axis=1) / area
+    return df.assign(**{
+        "Superficie (km²)": area.round(1),
+        f"{total} / km²": overall.round(2),
+        **{f"{c} / km²": density[:, i].round(2) for i, c in enumerate(columns)},
+    })
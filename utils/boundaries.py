@@ -0,0 +1,287 @@
+"""ADM2/ADM3 boundary layers, their simplified resolution tiers and the
+binary boundary store.
+
+``python -m scripts.build_boundaries`` converts every layer and tier once
+into an Arrow IPC file in ``data/derived/`` (one row per feature, WKB
+geometry, GeoParquet-style ``geo`` metadata). The dashboard memory-maps
+those files, so the OS page cache holds a single copy shared by every
+worker process, and only the requested rows and properties are turned
+back into GeoJSON. When a store file is missing the loader falls back to
+the source GeoJSON (simplified in-process), so a fresh checkout still works.
+
+The same step writes the map payload of each layer and tier: a TopoJSON
+file with shared arcs, coordinates quantized to the tier's ``PRECISION``
+and delta-encoded, and only the ``MAP_PROPERTIES`` the Zones page uses.
+"""
+import gzip
+import json
+import os
+
+import pyarrow as pa
+import shapely
+import streamlit as st
+
+from utils.topology import Topology
+from utils.versioning import file_version
+
+DATA_DIR = "data"
+DERIVED_DIR = os.path.join(DATA_DIR, "derived")
+
+LAYERS = {
+    "adm2": os.path.join(DATA_DIR, "zara_mira_adm2.geojson"),
+    "adm3": os.path.join(DATA_DIR, "zara_mira_adm3.geojson"),
+}
+
+PCODE_FIELDS = {
+    "adm2": "ADM2_PCODE",
+    "adm3": "ADM3_PCODE",
+}
+
+GEOMETRY_COLUMN = "geometry"
+
+# (name, max zoom, Douglas–Peucker tolerance in degrees)
+# One screen pixel is ~360 / (256 * 2**zoom) degrees, i.e. ~0.011° at zoom 7.
+TIERS = [
+    ("low", 7, 0.005),
+    ("medium", 9, 0.0015),
+    ("full", None, 0.0),
+]
+
+
+# Grid step of the map payload in degrees: ~1/10 pixel at the deepest zoom
+# of the low and medium tiers, ~1 m for the full tier.
+PRECISION = {
+    "low": 0.001,
+    "medium": 0.0003,
+    "full": 0.00001,
+}
+
+# Properties shipped to the browser with each layer
+MAP_PROPERTIES = {
+    "adm2": ("ADM2_PCODE", "ADM2_EN"),
+    "adm3": ("ADM3_PCODE", "ADM3_EN", "ADM2_EN"),
+}
+
+
+def tier_for_zoom(zoom):
+    """Name of the coarsest tier that is still sharp at ``zoom``."""
+    for name, max_zoom, _ in TIERS:
+        if max_zoom is None or (zoom or 0) <= max_zoom:
+            return name
+    return TIERS[-1][0]
+
+
+def tier_tolerance(tier):
+    return {name: tol for name, _, tol in TIERS}[tier]
+
+
+def store_path(layer, tier):
+    stem = os.path.splitext(os.path.basename(LAYERS[layer]))[0]
+    return os.path.join(DERIVED_DIR, f"{stem}.{tier}.arrow")
+
+
+def topojson_path(layer, tier):
+    stem = os.path.splitext(os.path.basename(LAYERS[layer]))[0]
+    return os.path.join(DERIVED_DIR, f"{stem}.{tier}.topojson")
+
+
+def read_geojson(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_topology():
+    """One topology over all layers so commune and district borders agree."""
+    return Topology.from_layers({name: read_geojson(path) for name, path in LAYERS.items()})
+
+
+# --------------------------------------------------
+# STORE (écriture hors ligne)
+# --------------------------------------------------
+
+def collection_to_table(collection, layer):
+    """FeatureCollection -> Arrow table with one column per property + WKB."""
+    features = collection["features"]
+    props = [f["properties"] for f in features]
+    keys = list(dict.fromkeys(k for p in props for k in p))
+
+    columns = {k: pa.array([p.get(k) for p in props]) for k in keys}
+    geoms = [shapely.geometry.shape(f["geometry"]) for f in features]
+    columns[GEOMETRY_COLUMN] = pa.array(shapely.to_wkb(geoms), type=pa.binary())
+
+    geo = {
+        "version": "1.0.0",
+        "primary_column": GEOMETRY_COLUMN,
+        "columns": {
+            GEOMETRY_COLUMN: {
+                "encoding": "WKB",
+                "geometry_types": sorted({g.geom_type for g in geoms}),
+                "bbox": list(shapely.total_bounds(geoms)),
+            }
+        },
+    }
+    metadata = {"geo": json.dumps(geo), "pcode": PCODE_FIELDS[layer]}
+    return pa.table(columns).replace_schema_metadata(metadata)
+
+
+def write_table(table, path):
+    # Uncompressed IPC so the file can be memory-mapped without a copy.
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def map_topojson(topology, layer, tier):
+    """Compact map payload of ``layer`` at ``tier`` (see ``PRECISION``)."""
+    return topology.to_topojson(
+        [layer], tier_tolerance(tier), PRECISION[tier], {layer: MAP_PROPERTIES[layer]}
+    )
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def build_store(out_dir=DERIVED_DIR):
+    """Write every layer at every tier (Arrow store + map TopoJSON).
+
+    Returns ``{(layer, tier): sizes}`` with the store file size and the map
+    payload before (tier GeoJSON, full precision, every source property)
+    and after (compact TopoJSON), raw and gzipped, in bytes.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    topology = build_topology()
+    written = {}
+
+    for tier, _, tolerance in TIERS:
+        for layer in LAYERS:
+            collection = topology.to_geojson(layer, tolerance)
+            path = os.path.join(out_dir, os.path.basename(store_path(layer, tier)))
+            write_table(collection_to_table(collection, layer), path)
+
+            before = _dumps(collection)
+            after = _dumps(map_topojson(topology, layer, tier))
+            with open(os.path.join(out_dir, os.path.basename(topojson_path(layer, tier))), "wb") as f:
+                f.write(after)
+
+            written[(layer, tier)] = {
+                "store": os.path.getsize(path),
+                "geojson": len(before),
+                "geojson_gz": len(gzip.compress(before, mtime=0)),
+                "topojson": len(after),
+                "topojson_gz": len(gzip.compress(after, mtime=0)),
+            }
+
+    return written
+
+
+# --------------------------------------------------
+# STORE (lecture)
+# --------------------------------------------------
+
+class BoundaryStore:
+    """Memory-mapped boundary table with a pcode -> rows index."""
+
+    def __init__(self, table):
+        self.table = table
+        self.pcode_field = table.schema.metadata[b"pcode"].decode()
+        self.index = {}
+        for row, code in enumerate(table.column(self.pcode_field).to_pylist()):
+            self.index.setdefault(code, []).append(row)
+
+    @classmethod
+    def open(cls, path):
+        source = pa.memory_map(path, "r")
+        return cls(pa.ipc.open_file(source).read_all())
+
+    def rows(self, pcodes=None):
+        if pcodes is None:
+            return list(range(self.table.num_rows))
+        return [row for code in pcodes for row in self.index.get(code, [])]
+
+    def to_geojson(self, pcodes=None, properties=None):
+        """GeoJSON for the selected features, materialising only ``properties``."""
+        subset = self.table.take(self.rows(pcodes))
+        names = properties or [n for n in subset.column_names if n != GEOMETRY_COLUMN]
+        props = subset.select(names).to_pylist()
+        geoms = shapely.from_wkb(subset.column(GEOMETRY_COLUMN).to_numpy(zero_copy_only=False))
+
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "properties": p, "geometry": shapely.geometry.mapping(g)}
+                for p, g in zip(props, geoms)
+            ],
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def open_store(layer, tier, version):
+    """Process-wide store handle; ``version`` reopens it after a rebuild."""
+    return BoundaryStore.open(store_path(layer, tier))
+
+
+def layers_version():
+    """Version of the source GeoJSON layers."""
+    return file_version(*LAYERS.values())
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _cached_topology(version):
+    return build_topology()
+
+
+def _fallback_geojson(layer, tier, pcodes, properties):
+    collection = _cached_topology(layers_version()).to_geojson(layer, tier_tolerance(tier))
+    wanted = None if pcodes is None else set(pcodes)
+    features = []
+    for f in collection["features"]:
+        props = f["properties"]
+        if wanted is not None and props[PCODE_FIELDS[layer]] not in wanted:
+            continue
+        if properties:
+            props = {k: props.get(k) for k in properties}
+        features.append({"type": "Feature", "properties": props, "geometry": f["geometry"]})
+    return {"type": "FeatureCollection", "features": features}
+
+
+def boundaries_version(layer, tier):
+    """Version of what :func:`load_boundaries` serves: store file or source layers."""
+    path = store_path(layer, tier)
+    return file_version(path) if os.path.exists(path) else f"source-{layers_version()}"
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _load_boundaries(layer, tier, pcodes, properties, version):
+    path = store_path(layer, tier)
+    if not os.path.exists(path):
+        return _fallback_geojson(layer, tier, pcodes, properties)
+
+    store = open_store(layer, tier, file_version(path))
+    return store.to_geojson(pcodes, properties)
+
+
+def load_boundaries(layer, tier="full", pcodes=None, properties=None):
+    """GeoJSON FeatureCollection of ``layer`` at resolution ``tier``.
+
+    ``pcodes`` restricts the features, ``properties`` the attributes kept.
+    Cached once per process and store (or source) version, so a rebuild is
+    picked up: the collection is shared by every session, do not modify it.
+    """
+    return _load_boundaries(layer, tier, pcodes, properties, boundaries_version(layer, tier))
+
+
+@st.cache_data(show_spinner=False)
+def _map_topojson(layer, tier, version):
+    path = topojson_path(layer, tier)
+    if version is None:
+        return map_topojson(_cached_topology(layers_version()), layer, tier)
+    return read_geojson(path)
+
+
+def load_map_topojson(layer, tier="full"):
+    """Compact TopoJSON of ``layer`` at ``tier`` for the map (``objects[layer]``)."""
+    path = topojson_path(layer, tier)
+    return _map_topojson(layer, tier, file_version(path) if os.path.exists(path) else None)
@@ -0,0 +1,83 @@
+"""Plotly figures shared by the pages and the batch reports.
+
+The dashboard and ``scripts/build_reports.py`` build their charts from the
+same functions, so a report shows exactly what the page shows.
+"""
+import pandas as pd
+import plotly.graph_objects as go
+
+from utils.reconciliation import MISMATCHES
+
+BREAKDOWN_COLORS = {
+    "Reach": "#005b96",
+    "Undelivered": "#c62828",
+    MISMATCHES["duplicate"]: "#ef6c00",
+    MISMATCHES["amount_mismatch"]: "#f9a825",
+    MISMATCHES["unknown"]: "#6d4c41",
+}
+
+
+def gauge(value, title, color):
+    """0–100 % gauge of the dashboard."""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=value,
+        title={'text': title},
+        gauge={'axis': {'range': [0, 100]},
+               'bar': {'color': color}}
+    ))
+    fig.update_layout(height=320)
+    return fig
+
+
+def breakdown(d, undelivered):
+    """Cash reached / undelivered bar, plus the reconciliation mismatches in ``d``."""
+    import plotly.express as px
+
+    rows = [("Reach", d["cash_reach"]), ("Undelivered", undelivered)]
+    # Reconciled against the provider's confirmations: cash gap vs plan per
+    # mismatch category (under-payments also count in "Undelivered")
+    rows += [
+        (label, d[f"cash_{category}"])
+        for category, label in MISMATCHES.items()
+        if d.get(f"cash_{category}")
+    ]
+    df = pd.DataFrame(rows, columns=["Category", "Amount"])
+
+    fig_bar = px.bar(
+        df,
+        x="Amount",
+        y="Category",
+        orientation="h",
+        text="Amount",
+        color="Category",
+        color_discrete_map=BREAKDOWN_COLORS,
+    )
+
+    fig_bar.update_traces(
+        texttemplate='%{text:,.0f} MGA',
+        textposition='inside',
+        insidetextfont=dict(color="white")
+    )
+
+    fig_bar.update_layout(
+        height=380,
+        plot_bgcolor="#f4f7fb",
+        paper_bgcolor="#f4f7fb"
+    )
+
+    return fig_bar
+
+
+def activity_chart(df):
+    """``Taux (%)`` per indicator of a DCT 2 activity."""
+    import plotly.express as px
+
+    fig = px.bar(df.sort_values("Taux (%)"),
+                 x="Taux (%)", y="Indicateur",
+                 orientation="h", text="Taux (%)",
+                 color="Taux (%)",
+                 color_continuous_scale=["#c62828","#ff9800","#2e8b57"],
+                 range_x=[0,120])
+    fig.update_traces(texttemplate='%{text}%', textposition='outside')
+    return fig
@@ -0,0 +1,69 @@
+"""Commune detail panel of the Zones page, loaded on click.
+
+The map carries only geometry and pcode. A click comes back from
+``st_folium`` as a coordinate (``last_object_clicked``); :func:`commune_at`
+resolves it to a commune with the spatial index of :mod:`utils.spatial`,
+built over the polygons of the tier the map draws (so a click near a border
+picks the commune drawn under it, not its full-resolution neighbour). Then
+:func:`load_commune_detail` assembles that commune's figures: counts of
+every rollup source, payments per distribution and per category from the
+beneficiary store, and payment sites. Details are cached per commune and
+data version, so only communes actually clicked are ever computed.
+"""
+import streamlit as st
+
+from utils.queries import payment_summary
+from utils.rollup import load_rollup, rollup_sources, source_version
+from utils.spatial import load_commune_index, load_site_counts
+from utils.store import store_version
+
+
+def commune_at(lat, lon, tier=None):
+    """``(pcode, commune, district)`` of the commune containing a point, or ``None``.
+
+    ``tier`` is the boundary tier drawn on the map (source polygons if ``None``).
+    """
+    index = load_commune_index(tier)
+    position = int(index.assign([lon], [lat])[0])
+    if position < 0:
+        return None
+    return str(index.pcodes[position]), index.communes[position], index.districts[position]
+
+
+def _counts(pcode):
+    """Beneficiary counts of ``pcode`` in every rollup source (zero rows dropped)."""
+    rows = {}
+    for source in rollup_sources():
+        communes = load_rollup(source).communes
+        match = communes[communes["ADM3_PCODE"] == pcode]
+        if not match.empty:
+            rows[source] = match.iloc[0][["Enfants", "Handicap", "Femmes_Enceintes"]]
+    return rows
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _detail(pcode, version):
+    filters = {"commune": [pcode]}
+    payments = payment_summary(by=["distribution"], filters=filters)
+    categories = payment_summary(by=["category"], filters=filters)
+
+    sites = load_site_counts()
+    site_count = None
+    if sites is not None:
+        match = sites[0][sites[0]["ADM3_PCODE"] == pcode]
+        site_count = int(match["Sites"].sum())
+
+    return {
+        "counts": _counts(pcode),
+        "payments": None if payments is None or payments.empty else payments,
+        "categories": None if categories is None or categories.empty else categories,
+        "sites": site_count,
+    }
+
+
+def load_commune_detail(pcode):
+    """Figures of one commune (see module docstring), cached per data version."""
+    version = "-".join(str(v) for v in (
+        store_version(), *(source_version(s) for s in rollup_sources())
+    ))
+    return _detail(pcode, version)
@@ -0,0 +1,187 @@
+"""Materialised running totals per distribution and per commune.
+
+One Parquet file per distribution in ``data/store/cumulative/`` holds, for
+the programme (``commune == ""``) and for every commune seen so far, that
+distribution's figures and the running sums (``cum_*``). Files are only
+appended: adding Distribution N reads the N-1 snapshot, computes N's delta
+and writes N. Each file records the fingerprint of the figures it was built
+from; if an earlier distribution changes, it and everything after it are
+rebuilt.
+
+The files are written offline (``python -m scripts.update_cumulative``, also
+run by ``scripts.ingest_payments``); pages only read them. While they are
+missing or outdated, pages compute the same table in memory, without
+writing anything.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.datasets import compact, share
+from utils.store import commune_totals, distribution_number, store_version
+from utils.versioning import file_version, value_version
+
+CUMULATIVE_DIR = os.path.join("data", "store", "cumulative")
+MEASURES = ["households_plan", "households_reach", "cash_plan", "cash_reach"]
+KEYS = ["district", "commune"]
+TOTAL = ""  # district/commune key of the programme-level row
+
+_LOCK = threading.Lock()
+
+
+def _path(distribution, directory):
+    return os.path.join(directory, f"distribution={distribution:02d}.parquet")
+
+
+def _existing(directory):
+    files = glob.glob(os.path.join(directory, "distribution=*.parquet"))
+    return {int(re.search(r"distribution=(\d+)", os.path.basename(f)).group(1)): f for f in files}
+
+
+def _source_version(distribution, d):
+    figures = {k: d.get(k) for k in MEASURES}
+    h = hashlib.sha1(json.dumps(figures, sort_keys=True).encode())
+    h.update(str(store_version(distribution=distribution)).encode())
+    return h.hexdigest()[:16]
+
+
+def _sources(realized):
+    """``(distribution number, figures, source version)`` in distribution order."""
+    numbered = sorted(((distribution_number(name), d) for name, d in realized.items()), key=lambda item: item[0])
+    return [(n, d, _source_version(n, d)) for n, d in numbered]
+
+
+def _stored_version(path):
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(b"source_version", b"").decode()
+
+
+def _delta(distribution, d):
+    """This distribution's own figures: programme row + one row per commune."""
+    rows = pd.DataFrame([{"district": TOTAL, "commune": TOTAL, **{k: d[k] for k in MEASURES}}])
+    communes = commune_totals(distribution)
+    if communes is not None:
+        rows = pd.concat([rows, communes[KEYS + MEASURES]], ignore_index=True)
+    return rows
+
+
+def _extend(previous, delta, distribution):
+    """Running sums at ``distribution`` from the previous snapshot + delta.
+
+    Communes absent from this distribution are carried forward with a zero
+    delta so every snapshot is complete on its own.
+    """
+    if previous is None:
+        snapshot = delta.copy()
+        for k in MEASURES:
+            snapshot[f"cum_{k}"] = snapshot[k]
+    else:
+        snapshot = previous[KEYS + [f"cum_{k}" for k in MEASURES]].merge(delta, on=KEYS, how="outer")
+        for k in MEASURES:
+            snapshot[k] = snapshot[k].fillna(0)
+            snapshot[f"cum_{k}"] = snapshot[f"cum_{k}"].fillna(0) + snapshot[k]
+
+    snapshot.insert(0, "distribution", distribution)
+    return snapshot[["distribution"] + KEYS + MEASURES + [f"cum_{k}" for k in MEASURES]]
+
+
+def _write(snapshot, version, path):
+    table = pa.Table.from_pandas(snapshot, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, b"source_version": version.encode()})
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def update_cumulative(realized, directory=CUMULATIVE_DIR):
+    """Bring the table in line with ``realized``; returns the distributions
+    that had to be (re)computed — normally none, or just the newest one."""
+    with _LOCK:
+        return _update(_sources(realized), directory)
+
+
+def _update(sources, directory):
+    os.makedirs(directory, exist_ok=True)
+    existing = _existing(directory)
+
+    previous_path = None
+    previous = None
+    dirty = False
+    computed = []
+
+    for n, d, version in sources:
+        path = _path(n, directory)
+
+        if not dirty and n in existing and _stored_version(path) == version:
+            previous_path = path
+            continue
+
+        dirty = True
+        if previous is None and previous_path is not None:
+            previous = pd.read_parquet(previous_path)
+
+        previous = _extend(previous, _delta(n, d), n)
+        _write(previous, version, path)
+        computed.append(n)
+
+    for n, path in existing.items():
+        if n not in {number for number, _, _ in sources}:
+            os.remove(path)
+
+    return computed
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _read_all(version, directory):
+    files = sorted(_existing(directory).values())
+    return share("cumul", compact(pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _computed(version, _sources):
+    snapshots = []
+    previous = None
+    for n, d, _ in _sources:
+        previous = _extend(previous, _delta(n, d), n)
+        snapshots.append(previous)
+    return share("cumul", compact(pd.concat(snapshots, ignore_index=True)))
+
+
+def _is_current(sources, existing):
+    return set(existing) == {n for n, _, _ in sources} and all(
+        _stored_version(existing[n]) == version for n, _, version in sources
+    )
+
+
+def load_cumulative(realized, directory=CUMULATIVE_DIR):
+    """``(table, version)``: every snapshot of ``realized``, one row per
+    (distribution, district, commune), and the version of its sources.
+
+    Read from the materialised files when they are up to date, computed in
+    memory otherwise (never written from here). Shared, read-only, by every
+    session (see :mod:`utils.datasets`). ``version`` keys caches built on
+    top without hashing the table. ``(None, None)`` without distributions.
+    """
+    sources = _sources(realized)
+    if not sources:
+        return None, None
+    existing = _existing(directory)
+    if _is_current(sources, existing):
+        version = file_version(*sorted(existing.values()))
+        return _read_all(version, directory), version
+    versions = tuple(version for _, _, version in sources)
+    return _computed(versions, sources), value_version(versions)
@@ -0,0 +1,119 @@
+"""Process-wide, read-only datasets and their memory footprint.
+
+Datasets the pages read (indicators, rollups, running totals) are built
+once per data version in ``st.cache_resource`` and shared by every session
+of the worker: no per-session pickled copy as with ``st.cache_data``. They
+must be treated as immutable. Pages select rows with boolean masks or
+``.loc``, and derive new columns with ``.assign``; with copy-on-write,
+the default from pandas 3 on (pinned in ``requirements.txt``), those never
+write through to the shared frame. pandas 3 also groups categoricals by
+observed values only, so the compact columns group like the text they
+replace.
+
+Before sharing, :func:`compact` stores repeated strings as categoricals and
+integers in the narrowest type. :func:`memory_report` compares each shared
+dataset with the object/int64 copy every session used to hold; it is
+computed once per registry contents and shown to admins only.
+"""
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from utils.tracing import is_admin
+
+CATEGORY_RATIO = 0.5  # categorical when distinct values <= 50 % of rows
+
+_registry = {}
+_lock = threading.Lock()
+_report = (None, None)  # (registry contents, memory_report() of them)
+
+
+def compact(df):
+    """Copy of ``df`` with categorical text and narrow integer columns.
+
+    Text columns with few distinct values become ``category``; integer
+    columns are downcast to the smallest signed type holding their range
+    (signed, so differences of two columns cannot wrap around).
+    """
+    out = {}
+    for column, values in df.items():
+        if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            out[column] = pd.to_numeric(values, downcast="integer")
+        elif (
+            pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+        ) and values.nunique(dropna=False) <= CATEGORY_RATIO * len(values):
+            out[column] = values.astype("category")
+        else:
+            out[column] = values
+    return pd.DataFrame(out, index=df.index)
+
+
+def share(name, df):
+    """Record ``df`` as the current shared copy of dataset ``name``; returns it."""
+    with _lock:
+        _registry[name] = df
+    return df
+
+
+# --------------------------------------------------
+# RAPPORT MÉMOIRE
+# --------------------------------------------------
+
+def _expanded(df):
+    """The frame as it was held before: object text, int64 integers."""
+    out = {}
+    for column, values in df.items():
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            out[column] = values.astype(object)
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            out[column] = values.astype("int64")
+        else:
+            out[column] = values
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_report():
+    """One row per shared dataset: rows, shared bytes, bytes of a per-session copy.
+
+    Measuring builds the expanded copy of every dataset, so the report is
+    kept until a dataset is shared again.
+    """
+    global _report
+    with _lock:
+        datasets = dict(_registry)
+        key = tuple((name, id(df)) for name, df in sorted(datasets.items()))
+        if _report[0] == key:
+            return _report[1]
+
+    rows = []
+    for name, df in sorted(datasets.items()):
+        rows.append({
+            "Dataset": name,
+            "Lignes": len(df),
+            "Partagé (Ko)": df.memory_usage(deep=True).sum() / 1024,
+            "Copie par session avant (Ko)": _expanded(df).memory_usage(deep=True).sum() / 1024,
+        })
+    report = pd.DataFrame(rows, columns=["Dataset", "Lignes", "Partagé (Ko)", "Copie par session avant (Ko)"])
+    with _lock:
+        _report = (key, report)
+    return report
+
+
+def memory_panel():
+    """Sidebar expander with :func:`memory_report` and the per-session saving, for admins only."""
+    if not is_admin():
+        return
+    report = memory_report()
+    if report.empty:
+        return
+
+    shared = report["Partagé (Ko)"].sum()
+    before = report["Copie par session avant (Ko)"].sum()
+
+    with st.sidebar.expander("Mémoire (données partagées)"):
+        st.dataframe(report.round(1), hide_index=True, use_container_width=True)
+        st.caption(
+            f"{shared:,.1f} Ko partagés une fois pour le processus, contre {before:,.1f} Ko "
+            f"pour chaque session avec une copie par session."
+        )
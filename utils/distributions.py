@@ -0,0 +1,69 @@
+"""Distributions: plan metadata and realised figures shared by every page.
+
+Figures typed in below are the fallback. They are replaced by the
+aggregates of the Parquet store (``scripts/ingest_payments.py``) or, failing
+that, recomputed from the payment exports (``data/payments/<code>.csv|xlsx``)
+as soon as those are present. Once the provider's confirmations are in
+``data/confirmations/``, reach and undelivered cash come from the
+reconciliation of the plan against them (``utils/reconciliation.py``). A
+distribution can also be declared with only ``coverage_period`` and
+``payment_code``: it shows up once its payments land.
+"""
+import copy
+
+from utils.payments import load_plan_aggregates
+from utils.reconciliation import load_reconciliation
+from utils.store import distribution_number, load_distribution_totals
+
+DISTRIBUTIONS = [f"Distribution {i}" for i in range(1, 11)]
+
+# --------------------------------------------------
+# DONNÉES RÉALISÉES (1–3)
+# --------------------------------------------------
+REALIZED_DATA = {
+    "Distribution 1": {
+        "coverage_period": "4 Months",
+        "payment_code": "PP-2670-25-00000001",
+        "households_plan": 17788,
+        "households_reach": 16487,
+        "cash_plan": 1943720000,
+        "cash_reach": 1821600000
+    },
+    "Distribution 2": {
+        "coverage_period": "4 Months",
+        "payment_code": "PP-2670-25-00000005",
+        "households_plan": 17798,
+        "households_reach": 16243,
+        "cash_plan": 1103700000,
+        "cash_reach": 958340000
+    },
+    "Distribution 3": {
+        "coverage_period": "4 Months",
+        "payment_code": "PP-2670-25-00000006",
+        "households_plan": 28022,
+        "households_reach": 26215,
+        "cash_plan": 3443280000,
+        "cash_reach": 3200900000
+    }
+}
+
+
+def load_realized_data():
+    """Realised distributions (those with figures), in distribution order."""
+    realized = {}
+
+    for name, meta in REALIZED_DATA.items():
+        d = copy.deepcopy(meta)
+        aggregates = (
+            load_distribution_totals(distribution_number(name))
+            or load_plan_aggregates(d["payment_code"])
+        )
+        if aggregates:
+            d.update(aggregates)
+        reconciliation = load_reconciliation(d["payment_code"], distribution_number(name))
+        if reconciliation:
+            d.update(reconciliation.totals)
+        if "cash_plan" in d:
+            realized[name] = d
+
+    return dict(sorted(realized.items(), key=lambda item: distribution_number(item[0])))
@@ -0,0 +1,92 @@
+"""Process-wide LRU cache of serialised Plotly figures.
+
+Entries are keyed on ``(page, chart, filter state, data version)`` and hold
+the figure JSON produced by ``plotly.io.to_json``. Every session of the
+worker shares the same cache, so when a room full of people opens the same
+view only the first one pays for building the figure. A hit returns a fresh
+figure parsed from the JSON, so no session can mutate another one's figure.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from utils.tracing import span
+
+MAX_ENTRIES = 512
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class FigureCache:
+    """Thread-safe LRU map of figure key -> figure JSON string."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def put(self, key, spec):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = spec
+            self._bytes += len(spec)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def figure_cache():
+    """The cache shared by every session of this process."""
+    return FigureCache()
+
+
+def cached_figure(page, chart, build, version, state=None):
+    """Figure for ``st.plotly_chart``; ``build()`` runs only on a miss.
+
+    ``state`` holds whatever widget values the figure depends on and
+    ``version`` the fingerprint of the data it is built from.
+    """
+    key = (page, chart, json.dumps(state, sort_keys=True, default=str), version)
+    cache = figure_cache()
+
+    spec = cache.get(key)
+    if spec is None:
+        with span(f"figure {chart}"):
+            fig = build()
+        with span(f"serialisation {chart}"):
+            spec = pio.to_json(fig, validate=False)
+        cache.put(key, spec)
+
+    # The JSON was produced from a validated figure: skip re-validation, and
+    # hand Streamlit a Figure (a plain dict with no traces is rejected).
+    return go.Figure(json.loads(spec), _validate=False)
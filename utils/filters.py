@@ -0,0 +1,67 @@
+"""Filter widgets over the payment data (see :mod:`utils.queries`).
+
+Options come from the data itself (distinct values of the rows already
+selected by the other filters) and codes are shown with readable labels.
+"""
+import streamlit as st
+
+from utils.queries import DIMENSIONS, MEASURES, STATUSES, dimension_values
+from utils.store import CATEGORIES
+
+
+def _area_labels(column):
+    from utils.rollup import commune_keys
+
+    keys = commune_keys()
+    if column == "commune":
+        return {p: c.title() for p, c in zip(keys.pcodes, keys.communes)}
+    # ADM2 pcode = first 7 characters of the ADM3 pcode
+    return {p[:7]: d.title() for p, d in zip(keys.pcodes, keys.districts)}
+
+
+def option_labels(column):
+    """``{code: label}`` of a dimension's values (empty: show the code)."""
+    if column in ("district", "commune"):
+        return _area_labels(column)
+    if column == "category":
+        return {code: label.replace("_", " ") for code, label in CATEGORIES.items()}
+    if column == "status":
+        return STATUSES
+    return {}
+
+
+def labelled(summary):
+    """A :func:`utils.queries.payment_summary` result with readable codes and headers."""
+    codes = {}
+    for column in summary.columns:
+        labels = option_labels(column) if column in DIMENSIONS else None
+        if labels:
+            codes[column] = summary[column].map(labels).fillna(summary[column])
+    return summary.assign(**codes).rename(columns={**DIMENSIONS, **MEASURES})
+
+
+def payment_filters(columns=("commune", "site", "category", "status"), base=None, key="filters"):
+    """Multiselect per dimension of ``columns``, side by side.
+
+    ``base`` holds fixed filters (e.g. the selected distribution) that scope
+    the options. Returns ``{dimension: selected values}`` including ``base``;
+    an empty selection means no filter.
+    """
+    filters = dict(base or {})
+    widgets = st.columns(len(columns))
+
+    for widget, column in zip(widgets, columns):
+        options = dimension_values(column, filters)
+        if not options:
+            continue
+        labels = option_labels(column)
+        with widget:
+            filters[column] = st.multiselect(
+                DIMENSIONS[column],
+                options,
+                format_func=lambda v, labels=labels: labels.get(v, v),
+                placeholder="Tous",
+                key=f"{key}-{column}",
+            )
+
+    return filters
@@ -0,0 +1,185 @@
+"""Distinct households reached across distributions.
+
+Each distribution's reached households (``amount_paid > 0``) are kept as one
+sorted array of unique uint64 hashes of ``household_id`` (8 bytes per
+household), written to ``data/store/households/`` by
+``scripts.ingest_payments`` (:func:`write_distribution_ids`) and rebuilt only
+when that distribution's payment data changes. Pages only read them; a
+missing or outdated array is computed in memory, without writing it.
+Cross-distribution figures are set operations on those arrays: membership
+is a binary search (``np.searchsorted``) of one sorted array in another, so
+walking ten cycles of hundreds of thousands of IDs costs a few sorted
+passes, not a merge per pair of distributions.
+
+Per distribution, in order:
+
+* ``reached``: households paid in this distribution;
+* ``first_time``: reached now, never before;
+* ``repeat``: reached now and in at least one earlier distribution;
+* ``returning``: repeat households that were not reached in the previous one;
+* ``dropouts``: reached in the previous distribution, not in this one;
+* ``cumulative_unique``: distinct households reached so far.
+"""
+import glob
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.payments import export_files, read_chunks
+from utils.store import distribution_number, record_chunks, store_version
+from utils.versioning import file_version
+
+HOUSEHOLDS_DIR = os.path.join("data", "store", "households")
+
+REACH_COLUMNS = {
+    "household_id": "household_id",
+    "delivered_quantity": "amount_paid",
+}
+
+
+# --------------------------------------------------
+# ENSEMBLES TRIÉS
+# --------------------------------------------------
+
+def contains(sorted_ids, ids):
+    """Boolean mask: which of ``ids`` are in the sorted array ``sorted_ids``."""
+    if len(sorted_ids) == 0:
+        return np.zeros(len(ids), dtype=bool)
+    position = np.searchsorted(sorted_ids, ids)
+    return sorted_ids[np.minimum(position, len(sorted_ids) - 1)] == ids
+
+
+def reached_ids(chunks):
+    """Sorted unique hashes of the households paid in ``chunks``."""
+    parts = []
+    for chunk in chunks:
+        ids = chunk.loc[chunk["amount_paid"] > 0, "household_id"].dropna()
+        ids = ids[ids != ""]
+        parts.append(np.unique(pd.util.hash_array(ids.to_numpy(dtype=object))))
+    return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.uint64)
+
+
+# --------------------------------------------------
+# PERSISTANCE (un tableau par distribution)
+# --------------------------------------------------
+
+def _source(distribution, payment_code):
+    """``(version, chunks)`` of a distribution's payment rows, or ``None``."""
+    version = store_version(distribution=distribution)
+    if version is not None:
+        return version, lambda: record_chunks(["household_id", "amount_paid"], distribution=distribution)
+
+    paths = export_files(payment_code)
+    if paths:
+        return file_version(*paths), lambda: (c for p in paths for c in read_chunks(p, REACH_COLUMNS))
+    return None
+
+
+def _path(distribution, version, directory):
+    return os.path.join(directory, f"distribution={distribution:02d}-{version}.npy")
+
+
+def distribution_ids(distribution, payment_code, directory=HOUSEHOLDS_DIR):
+    """Reached-household array of a distribution, or ``None`` without payment rows.
+
+    Read (memory-mapped) from disk when the payment data is unchanged,
+    computed in memory otherwise. Never writes.
+    """
+    source = _source(distribution, payment_code)
+    if source is None:
+        return None
+    version, chunks = source
+
+    path = _path(distribution, version, directory)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+    return reached_ids(chunks())
+
+
+def write_distribution_ids(distribution, payment_code, directory=HOUSEHOLDS_DIR):
+    """Write the reached-household array of a distribution (offline step).
+
+    Replaces the arrays of earlier payment data; returns the number of
+    households, or ``None`` without payment rows.
+    """
+    source = _source(distribution, payment_code)
+    if source is None:
+        return None
+    version, chunks = source
+
+    path = _path(distribution, version, directory)
+    ids = reached_ids(chunks())
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, ids)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    for stale in glob.glob(os.path.join(directory, f"distribution={distribution:02d}-*.npy")):
+        if stale != path:
+            os.remove(stale)
+    return len(ids)
+
+
+# --------------------------------------------------
+# SUIVI INTER-DISTRIBUTIONS
+# --------------------------------------------------
+
+def household_flows(id_sets):
+    """Per-distribution reach figures from ``{distribution: sorted ids}``."""
+    seen = np.empty(0, dtype=np.uint64)
+    previous = np.empty(0, dtype=np.uint64)
+    rows = []
+
+    for distribution, ids in sorted(id_sets.items()):
+        ids = np.asarray(ids)
+        repeat = contains(seen, ids)
+        in_previous = contains(previous, ids)
+        rows.append({
+            "distribution": distribution,
+            "reached": len(ids),
+            "first_time": int((~repeat).sum()),
+            "repeat": int(repeat.sum()),
+            "returning": int((repeat & ~in_previous).sum()),
+            "dropouts": int((~contains(ids, previous)).sum()),
+            "cumulative_unique": len(seen) + int((~repeat).sum()),
+        })
+        # Both sorted and disjoint: insertion points keep ``seen`` sorted.
+        new = ids[~repeat]
+        seen = np.insert(seen, np.searchsorted(seen, new), new)
+        previous = ids
+
+    return pd.DataFrame(rows, columns=[
+        "distribution", "reached", "first_time", "repeat", "returning", "dropouts", "cumulative_unique",
+    ])
+
+
+@st.cache_data(show_spinner=False)
+def _cached_flows(version, sources):
+    id_sets = {}
+    for distribution, payment_code in sources:
+        ids = distribution_ids(distribution, payment_code)
+        if ids is not None:
+            id_sets[distribution] = ids
+    return household_flows(id_sets)
+
+
+def load_household_flows(realized):
+    """:func:`household_flows` of the realised distributions with payment rows.
+
+    Empty when no distribution has beneficiary-level data yet.
+    """
+    sources = tuple(
+        (distribution_number(name), d["payment_code"]) for name, d in realized.items()
+    )
+    versions = []
+    for distribution, payment_code in sources:
+        source = _source(distribution, payment_code)
+        versions.append(source[0] if source else None)
+    return _cached_flows(str(versions), sources)
@@ -0,0 +1,315 @@
+"""Indicator data and the rate / gap / score computations shared by the pages.
+
+All indicators (logframe of *Indicateurs Globaux* and DCT 2 activities) live
+in one table, ``Cible`` being the DCT 2 ``Planifié``. ``Taux (%)``, ``Écart``,
+per-group averages and the weighted DCT 2 score are computed vectorised in
+one place and memoised on ``SOURCE_VERSION``, a hash of the source
+constants taken once at import, so a data update invalidates every page
+consistently without rebuilding the table on each rerun.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.datasets import compact, share
+from utils.versioning import value_version
+
+# ==================================================
+# DONNÉES – INDICATEURS GLOBAUX (Réalisé modifié)
+# ==================================================
+
+LOGFRAME_ROWS = [
+
+    # ---------------- RESULTAT 1 ----------------
+    ("Résultat 1", "Couverture effective des allocations",
+     "Nombre de bénéficiaires recevant des paiements (enfants + PHS)",
+     "Fokontany", 0, 68000+3500, 76541,
+     "Fiche de paiement; HOPE; Listes bénéficiaires"),
+
+    ("Résultat 1", "Capacités des acteurs locaux",
+     "% d’acteurs locaux formés (PL, RCJ, TS, CMS…)",
+     "Région/district", 0, 100, 0,
+     "Registres formation; Rapports; Évaluations post-formation"),
+
+    ("Résultat 1", "Conformité des paiements",
+     "Nombre de paiements suivis régulièrement",
+     "Sites distribution", 0, 18, 0,
+     "États de paiement; HOPE; Rapport narratif SAF"),
+
+    ("Résultat 1", "Appropriation MACC",
+     "Taux d’agents évalués compétents après coaching",
+     "Région/district", 0, 70, 0,
+     "Rapports coaching; Grilles; Feedback bénéficiaires"),
+
+    ("Résultat 1", "Performance GRM",
+     "% de plaintes résolues / total plaintes",
+     "Fokontany/commune", 0, 90, 0,
+     "Système plaintes; Registres; Rapports"),
+
+    ("Résultat 1", "Activités EBE",
+     "Fréquence séances thématiques (EBE)",
+     "Fokontany", 0, 36, 0,
+     "Rapports; Fiches présence"),
+
+    ("Résultat 1", "Sensibilisation MACC",
+     "Nombre bénéficiaires sensibilisés MACC",
+     "Fokontany", 0, 62250, 0,
+     "Fiches AL; Fiches présence"),
+
+    ("Résultat 1", "PEAS – sensibilisation",
+     "Nombre de sites avec sessions PEAS",
+     "Fokontany", 0, 35, 0,
+     "Rapport activité"),
+
+    ("Résultat 1", "PEAS – formation staff",
+     "Personnel formé PEAS",
+     "Fokontany", 0, 1370, 0,
+     "Rapport activité"),
+
+    ("Résultat 1", "EBE – mise en place",
+     "Nombre d’EBE créées",
+     "Fokontany", 0, 102, 0,
+     "Registres; Photographies"),
+
+    # ---------------- RESULTAT 2 ----------------
+    ("Résultat 2", "Référencement & prise en charge",
+     "Circuit de référence établi",
+     "District", 0, 1, 0,
+     "Rapport validation"),
+
+    ("Résultat 2", "Comités gestion de cas",
+     "Nombre comités gestion cas",
+     "District", 0, 3, 0,
+     "Rapports; Listes comités"),
+
+    ("Résultat 2", "Réunions gestion de cas",
+     "Nombre réunions gestion cas",
+     "District", 0, 27, 0,
+     "Comptes rendus"),
+
+    ("Résultat 2", "Population cible",
+     "Bénéficiaires ciblés intervention protection",
+     "Fokontany", 0, 68000+3500, 0,
+     "Listes bénéficiaires"),
+
+    ("Résultat 2", "Sensibilisation communautés",
+     "Communautés sensibilisées (PE/VBG)",
+     "Fokontany", 0, 18000, 0,
+     "Fiches présence"),
+
+    ("Résultat 2", "Violences signalées et traitées",
+     "Nombre cas violences traités",
+     "District", 0, 900, 0,
+     "Dossiers cas"),
+
+    ("Résultat 2", "Participation communautaire",
+     "% communautés ayant participé campagnes",
+     "Région/district", 0, 70, 0,
+     "Rapports sensibilisation"),
+
+    ("Résultat 2", "Cas protection identifiés",
+     "Cas protection identifiés et pris en charge",
+     "Région/district", 0, 100, 0,
+     "Base de données cas"),
+
+    ("Résultat 2", "PEAS – engagement",
+     "% enfants/adultes engagés PEAS",
+     "Fokontany", 0, 80, 0,
+     "Rapports activité"),
+
+    # ---------------- RESULTAT 3 ----------------
+    ("Résultat 3", "Communication projet",
+     "Taux compréhension programme",
+     "3 districts", 0, 95, 0,
+     "Rapports atelier; Focus group"),
+
+    ("Résultat 3", "Supports communication",
+     "Nombre supports communication produits",
+     "Districts", 0, 3, 0,
+     "Inventaire supports"),
+
+    ("Résultat 3", "Success stories",
+     "Nombre histoires de réussite produites",
+     "Districts", 0, 6, 0,
+     "Liens publications"),
+]
+
+LOGFRAME_COLUMNS = [
+    "Résultat","Volet","Indicateur","Lieu",
+    "Baseline","Cible","Réalisé","Moyens de vérification"
+]
+
+# ==================================================
+# DONNÉES – DCT 2 (Activités 1, 2 et 3)
+# ==================================================
+
+DATA_ACT1 = {
+    "Indicateur": [
+        "CMS impliqués",
+        "AL recrutés & formés",
+        "IS formés",
+        "Superviseurs impliqués",
+        "Sites de paiement",
+        "Vagues de paiement",
+        "Sites avec ombrage conforme"
+    ],
+    "Planifié": [400, 60, 30, 6, 33, 2, 33],
+    "Réalisé": [404, 63, 31, 6, 33, 2, 12]  # 🔵 Réalisation théorique
+}
+
+DATA_ACT2 = {
+    "Indicateur": [
+        "Ligne verte dédiée",
+        "Boîtes à doléances installées",
+        "Plaintes traitées (%)",
+        "Couverture géographique"
+    ],
+    "Planifié": [1, 102, 90, 102],
+    "Réalisé": [1, 102, 88, 102]  # 🔵 Réalisation théorique
+}
+
+DATA_ACT3 = {
+    "Indicateur": [
+        "Espaces de Bien-Être (EBE)",
+        "Parents Leaders mobilisés",
+        "Relais Communautaires Jeunes (RCJ)",
+        "Fokontany avec RCJ"
+    ],
+    "Planifié": [102, 742, 102, 102],
+    "Réalisé": [95, 700, 102, 102]  # 🔵 Réalisation théorique
+}
+
+DCT2_ACTIVITIES = {
+    "Activité 1": DATA_ACT1,
+    "Activité 2": DATA_ACT2,
+    "Activité 3": DATA_ACT3,
+}
+
+# Pondération : Act1=40%, Act2=30%, Act3=30%
+DCT2_WEIGHTS = {
+    "Activité 1": 0.4,
+    "Activité 2": 0.3,
+    "Activité 3": 0.3,
+}
+
+# Content hash of the indicator constants above; update it after changing
+# them at run time (see ``benchmarks.synthetic.scale_indicators``).
+SOURCE_VERSION = value_version([LOGFRAME_ROWS, DCT2_ACTIVITIES])
+
+# ==================================================
+# TABLE COMBINÉE
+# ==================================================
+
+def combined_table():
+    """Every indicator in one table: source, Groupe, logframe columns."""
+    logframe = pd.DataFrame(LOGFRAME_ROWS, columns=LOGFRAME_COLUMNS)
+    logframe.insert(0, "source", "logframe")
+    logframe.insert(1, "Groupe", logframe["Résultat"])
+
+    activities = []
+    for activity, data in DCT2_ACTIVITIES.items():
+        frame = pd.DataFrame(data).rename(columns={"Planifié": "Cible"})
+        frame.insert(0, "source", "dct2")
+        frame.insert(1, "Groupe", activity)
+        activities.append(frame)
+
+    return pd.concat([logframe, *activities], ignore_index=True)
+
+
+# ==================================================
+# CALCULS
+# ==================================================
+
+def rate(cible, realise):
+    """``Taux (%)``: Réalisé / Cible × 100 (0 without target), to one decimal."""
+    cible = np.asarray(cible, dtype=float)
+    realise = np.asarray(realise, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        taux = np.where(cible == 0, 0, realise / cible * 100)
+    return np.round(taux, 1)
+
+
+def compute(table):
+    """Rates, gaps, group averages and weighted DCT 2 score, vectorised."""
+    table = table.copy()
+
+    table["Écart"] = table["Réalisé"] - table["Cible"]
+    table["Taux (%)"] = rate(table["Cible"], table["Réalisé"])
+
+    group_rates = table.groupby(["source", "Groupe"], sort=False)["Taux (%)"].mean().round(1)
+
+    dct2 = group_rates.loc["dct2"]
+    weights = pd.Series(DCT2_WEIGHTS)
+    dct2_score = round(float((dct2[weights.index] * weights).sum()), 1)
+
+    logframe = table.loc[table["source"] == "logframe", LOGFRAME_COLUMNS + ["Taux (%)"]]
+
+    table = compact(table)
+    logframe = compact(logframe.astype({"Baseline": int}))
+
+    return {
+        "table": table,
+        "logframe": logframe,
+        "group_rates": group_rates,
+        "dct2_score": dct2_score,
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_compute(version):
+    result = compute(combined_table())
+    share("indicateurs", result["table"])
+    share("indicateurs (cadre logique)", result["logframe"])
+    return result
+
+
+def load_indicators():
+    """Computed indicators, recomputed only when the source data changes.
+
+    One read-only copy per process, shared by every session (see
+    :mod:`utils.datasets`). ``version`` is :data:`SOURCE_VERSION`, for
+    keying caches built on top.
+    """
+    return {**_cached_compute(SOURCE_VERSION), "version": SOURCE_VERSION}
+
+
+def activity_table(table, activity):
+    """Indicators of one DCT 2 activity, as shown on the DCT 2 page."""
+    df = table[(table["source"] == "dct2") & (table["Groupe"] == activity)]
+    return (
+        df[["Indicateur", "Cible", "Réalisé", "Écart", "Taux (%)"]]
+        .rename(columns={"Cible": "Planifié"})
+        .reset_index(drop=True)
+    )
+
+
+def summarize(rates):
+    """(average rate, count, count below 50 %) of a ``Taux (%)`` selection."""
+    return round(rates.mean(), 1), len(rates), int((rates < 50).sum())
+
+
+# ==================================================
+# KPI DISTRIBUTIONS (dashboard)
+# ==================================================
+
+def compute_distribution_kpis(realized):
+    """Coverage, delivery and undelivered cash for every distribution."""
+    df = pd.DataFrame.from_dict(realized, orient="index")
+    undelivered = df["cash_plan"] - df["cash_reach"]
+    if "cash_undelivered" in df:
+        # Reconciled distributions: planned cash with no matching payment
+        undelivered = df["cash_undelivered"].fillna(undelivered)
+    return pd.DataFrame({
+        "coverage_rate": df["households_reach"] / df["households_plan"] * 100,
+        "delivery_rate": df["cash_reach"] / df["cash_plan"] * 100,
+        "undelivered": undelivered,
+    })
+
+
+@st.cache_data(show_spinner=False)
+def _cached_distribution_kpis(version, _realized):
+    return compute_distribution_kpis(_realized)
+
+
+def load_distribution_kpis(realized):
+    return _cached_distribution_kpis(value_version(realized), realized)
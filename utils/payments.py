@@ -0,0 +1,161 @@
+"""Streaming aggregation of beneficiary-level payment exports.
+
+Each payment plan is exported from HOPE as one or more CSV/XLSX files named
+after its code (``data/payments/PP-2670-25-00000001.csv``, optionally with a
+suffix such as ``PP-2670-25-00000001_part2.xlsx``). Files are read in
+fixed-size chunks and reduced in a single pass, so memory is bounded by the
+chunk size plus one sorted array of hashed household IDs.
+"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.versioning import file_version
+
+PAYMENTS_DIR = os.path.join("data", "payments")
+CHUNK_ROWS = 100_000
+
+# Export header -> internal name
+COLUMNS = {
+    "household_id": "household_id",
+    "entitlement_quantity": "amount_plan",
+    "delivered_quantity": "amount_paid",
+}
+
+
+def export_files(payment_code, directory=PAYMENTS_DIR):
+    """Export files of a payment plan, sorted for a stable fingerprint."""
+    files = []
+    for ext in ("csv", "xlsx"):
+        files += glob.glob(os.path.join(directory, f"{payment_code}*.{ext}"))
+    return sorted(files)
+
+
+# --------------------------------------------------
+# LECTURE PAR BLOCS
+# --------------------------------------------------
+
+def _read_csv_chunks(path, columns, chunk_rows, numeric):
+    # Numeric columns are left to the C parser (floats when clean); the rest
+    # is read as text so IDs keep their leading zeros.
+    yield from pd.read_csv(
+        path,
+        usecols=list(columns),
+        dtype={src: "string" for src, name in columns.items() if name not in numeric},
+        chunksize=chunk_rows,
+    )
+
+
+def _read_xlsx_chunks(path, columns, chunk_rows, numeric):
+    # openpyxl read-only mode streams rows instead of loading the sheet.
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows)]
+        missing = set(columns) - set(header)
+        if missing:
+            raise ValueError(f"{path}: missing columns {sorted(missing)}")
+        positions = [header.index(c) for c in columns]
+
+        batch = []
+        for row in rows:
+            batch.append([row[i] for i in positions])
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=list(columns))
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=list(columns))
+    finally:
+        wb.close()
+
+
+def export_header(path):
+    """Column names of an export file, without reading its rows."""
+    if path.endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True)
+        try:
+            header = next(wb.active.iter_rows(max_row=1, values_only=True))
+        finally:
+            wb.close()
+        return [str(h).strip() for h in header if h is not None]
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_chunks(path, columns=COLUMNS, chunk_rows=CHUNK_ROWS, numeric=()):
+    """Yield normalised chunks renamed through ``columns``.
+
+    Text columns are stripped strings. ``amount_*`` columns are numeric with
+    0 for missing values, the ``numeric`` ones are numeric with NaN.
+    """
+    reader = _read_xlsx_chunks if path.endswith(".xlsx") else _read_csv_chunks
+    amounts = {name for name in columns.values() if name.startswith("amount_")}
+
+    for chunk in reader(path, columns, chunk_rows, amounts | set(numeric)):
+        chunk = chunk.rename(columns=columns)
+        for col in chunk.columns:
+            if col in amounts:
+                chunk[col] = pd.to_numeric(chunk[col], errors="coerce").fillna(0)
+            elif col in numeric:
+                chunk[col] = pd.to_numeric(chunk[col], errors="coerce")
+            else:
+                chunk[col] = chunk[col].astype("string").str.strip()
+        yield chunk
+
+
+# --------------------------------------------------
+# AGRÉGATION (une passe)
+# --------------------------------------------------
+
+def _hash_ids(ids):
+    return np.unique(pd.util.hash_array(ids.to_numpy(dtype=object)))
+
+
+def aggregate_exports(paths, chunk_rows=CHUNK_ROWS):
+    """Plan/reach households and cash over all ``paths`` in one pass."""
+    planned = np.empty(0, dtype=np.uint64)
+    reached = np.empty(0, dtype=np.uint64)
+    cash_plan = 0.0
+    cash_reach = 0.0
+    rows = 0
+
+    for path in paths:
+        for chunk in read_chunks(path, chunk_rows=chunk_rows):
+            chunk = chunk[chunk["household_id"].notna() & (chunk["household_id"] != "")]
+            paid = chunk["amount_paid"] > 0
+
+            planned = np.union1d(planned, _hash_ids(chunk["household_id"]))
+            reached = np.union1d(reached, _hash_ids(chunk.loc[paid, "household_id"]))
+            cash_plan += chunk["amount_plan"].sum()
+            cash_reach += chunk["amount_paid"].sum()
+            rows += len(chunk)
+
+    return {
+        "households_plan": int(planned.size),
+        "households_reach": int(reached.size),
+        "cash_plan": float(cash_plan),
+        "cash_reach": float(cash_reach),
+        "rows": rows,
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _cached_aggregate(paths, version):
+    return aggregate_exports(list(paths))
+
+
+def load_plan_aggregates(payment_code):
+    """Aggregates of a payment plan, or ``None`` when no export is on disk.
+
+    Cached per export fingerprint, so a rerun never re-reads unchanged files.
+    """
+    paths = export_files(payment_code)
+    if not paths:
+        return None
+    return _cached_aggregate(tuple(paths), file_version(*paths))
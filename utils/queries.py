@@ -0,0 +1,194 @@
+"""Ad-hoc filtering over the beneficiary store with embedded DuckDB.
+
+One in-process DuckDB connection, for the current store version, reads the
+Parquet files in place (no copy, no server) through the ``payments`` view,
+which adds a derived payment ``status``. Partition columns (distribution,
+district) and the per-file min/max statistics let DuckDB skip files and row
+groups, and aggregation runs multi-threaded over the columns a query
+touches, so the filter widgets stay interactive over tens of millions of
+rows.
+
+Queries are built from whitelisted dimensions with ``?`` parameters only
+(never string formatting of user values) and their results are cached per
+store version. When an ingest changes the version, the next query opens a
+new connection and the previous one is closed once its running queries
+return.
+"""
+import contextlib
+import os
+import threading
+
+import streamlit as st
+
+from utils.store import STORE_DIR, store_version
+
+# column -> label shown on the filter widgets and tables
+DIMENSIONS = {
+    "distribution": "Distribution",
+    "district": "District",
+    "commune": "Commune",
+    "site": "Site de paiement",
+    "category": "Catégorie",
+    "status": "Statut",
+}
+
+# summary column -> label shown on the tables
+MEASURES = {
+    "beneficiaries": "Beneficiaries",
+    "households": "Households Plan",
+    "households_paid": "Households Reached",
+    "cash_plan": "Cash Plan",
+    "cash_paid": "Cash Reach",
+}
+
+# Query results kept per process (each a small aggregate table)
+MAX_QUERIES = 512
+
+# payment status code -> label
+STATUSES = {
+    "paid": "Payé",
+    "partial": "Partiel",
+    "unpaid": "Non payé",
+}
+
+VIEW_SQL = """
+CREATE VIEW payments AS
+SELECT
+    *,
+    CASE
+        WHEN amount_paid >= amount_plan AND amount_paid > 0 THEN 'paid'
+        WHEN amount_paid > 0 THEN 'partial'
+        ELSE 'unpaid'
+    END AS status
+FROM read_parquet(
+    {files},
+    hive_partitioning = true,
+    union_by_name = true,
+    hive_types = {{'distribution': INTEGER, 'district': VARCHAR}}
+)
+"""
+
+
+# --------------------------------------------------
+# CONNEXION
+# --------------------------------------------------
+
+class _Connection:
+    """DuckDB connection with the ``payments`` view and its running queries."""
+
+    def __init__(self, version, store_dir):
+        import duckdb
+
+        self.key = (version, store_dir)
+        # DDL cannot take parameters; the path is ours, quoted as a SQL literal.
+        # Partitions only: an ingest in progress stages its files in a hidden
+        # sibling directory.
+        files = os.path.join(store_dir, "distribution=*", "**", "*.parquet").replace("'", "''")
+        self.con = duckdb.connect()
+        self.con.execute(VIEW_SQL.format(files=f"'{files}'"))
+        self.users = 0
+
+
+_connection_lock = threading.Lock()
+_connection = None
+
+
+@contextlib.contextmanager
+def connection(version, store_dir=STORE_DIR):
+    """Cursor on the ``payments`` view; the connection is shared by every session.
+
+    Only the connection of the latest ``version`` stays open: an older one is
+    closed as soon as its last running query returns.
+    """
+    global _connection
+    with _connection_lock:
+        if _connection is None or _connection.key != (version, store_dir):
+            previous, _connection = _connection, _Connection(version, store_dir)
+            if previous is not None and previous.users == 0:
+                previous.con.close()
+        current = _connection
+        current.users += 1
+
+    cursor = current.con.cursor()
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+        with _connection_lock:
+            current.users -= 1
+            if current is not _connection and current.users == 0:
+                current.con.close()
+
+
+def _where(filters):
+    """``WHERE`` clause and parameters from ``{dimension: values}``.
+
+    Empty or ``None`` values mean no filter on that dimension.
+    """
+    clauses, params = [], []
+    for column, values in (filters or {}).items():
+        if column not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {column}")
+        if values is None:
+            continue
+        values = list(values) if isinstance(values, (list, tuple, set)) else [values]
+        if not values:
+            continue
+        clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_QUERIES)
+def _query(sql, params, version):
+    # A cursor per call: the shared connection is used from several sessions.
+    with connection(version) as cursor:
+        return cursor.execute(sql, list(params)).df()
+
+
+def run(sql, params=()):
+    """DataFrame of ``sql`` over the ``payments`` view, or ``None`` without a store."""
+    version = store_version()
+    if version is None:
+        return None
+    return _query(sql, tuple(params), version)
+
+
+# --------------------------------------------------
+# REQUÊTES SERVIES AUX PAGES
+# --------------------------------------------------
+
+def dimension_values(column, filters=None):
+    """Distinct non-null values of ``column`` among the filtered rows."""
+    if column not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension: {column}")
+    where, params = _where({k: v for k, v in (filters or {}).items() if k != column})
+    where = f"{where} AND" if where else " WHERE"
+    df = run(f"SELECT DISTINCT {column} FROM payments{where} {column} IS NOT NULL ORDER BY 1", params)
+    return [] if df is None else df[column].tolist()
+
+
+def payment_summary(by=(), filters=None):
+    """Beneficiaries, households and cash of the filtered rows, grouped ``by``.
+
+    Columns: the ``by`` dimensions, then ``beneficiaries``, ``households``
+    (distinct), ``households_paid``, ``cash_plan`` and ``cash_paid``.
+    """
+    by = list(by)
+    for column in by:
+        if column not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {column}")
+    where, params = _where(filters)
+    keys = ", ".join(by)
+    sql = f"""
+        SELECT
+            {keys + ',' if keys else ''}
+            count(*) AS beneficiaries,
+            count(DISTINCT household_id) AS households,
+            count(DISTINCT household_id) FILTER (WHERE amount_paid > 0) AS households_paid,
+            coalesce(sum(amount_plan), 0) AS cash_plan,
+            coalesce(sum(amount_paid), 0) AS cash_paid
+        FROM payments{where}
+        {'GROUP BY ' + keys + ' ORDER BY ' + keys if keys else ''}
+    """
+    return run(sql, params)
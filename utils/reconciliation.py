@@ -0,0 +1,207 @@
+"""Reconciliation of a payment plan against the provider's confirmations.
+
+The plan side (HOPE exports, or the beneficiary store when the exports are
+gone) is streamed in chunks and reduced to one row per household: hashed
+household ID and planned amount. That is the build side of a hash join
+(``pd.Index`` over the uint64 hashes). The confirmation files
+(``data/confirmations/<payment_code>*.csv|xlsx``, one row per transaction)
+are then streamed and probed against it chunk by chunk; paid amounts and
+transaction counts accumulate per household with ``np.bincount``. Memory is
+bounded by the number of households plus one chunk.
+
+Outcomes per planned household: reached (paid > 0) or unreached. Mismatch
+categories:
+
+* ``duplicate``: several transactions paying more than the plan (a plan
+  with one row per beneficiary may be paid in several transactions);
+* ``amount_mismatch``: any other paid household whose total differs from plan;
+* ``unknown``: transactions for a household absent from the plan.
+
+The cash of each category is the gap between paid and planned amounts,
+whichever the direction: the excess of a duplicate, the over- or
+under-payment of an amount mismatch, all of an unknown household's payments.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.payments import export_files, read_chunks
+from utils.store import record_chunks, store_version
+from utils.versioning import file_version
+
+CONFIRMATIONS_DIR = os.path.join("data", "confirmations")
+AMOUNT_TOLERANCE = 1.0  # MGA
+
+# Export header -> internal name
+PLAN_COLUMNS = {
+    "household_id": "household_id",
+    "entitlement_quantity": "amount_plan",
+}
+
+CONFIRMATION_COLUMNS = {
+    "household_id": "household_id",
+    "delivered_amount": "amount_confirmed",
+}
+
+# mismatch category -> label shown on the dashboard
+MISMATCHES = {
+    "duplicate": "Duplicate payment",
+    "amount_mismatch": "Amount mismatch",
+    "unknown": "Unknown beneficiary",
+}
+
+
+def confirmation_files(payment_code):
+    return export_files(payment_code, CONFIRMATIONS_DIR)
+
+
+def _valid(chunk):
+    return chunk[chunk["household_id"].notna() & (chunk["household_id"] != "")]
+
+
+def _hash(ids):
+    return pd.util.hash_array(ids.to_numpy(dtype=object))
+
+
+# --------------------------------------------------
+# CÔTÉ PLAN (table de hachage)
+# --------------------------------------------------
+
+def plan_households(chunks):
+    """``(hashes, planned amounts, household IDs)``, one entry per household.
+
+    Each chunk is reduced to its households before being kept, so memory
+    grows with the households, not with the beneficiary rows.
+    """
+    hashes, amounts, ids = [], [], []
+
+    for chunk in chunks:
+        chunk = _valid(chunk)
+        h = _hash(chunk["household_id"])
+        unique, first, inverse = np.unique(h, return_index=True, return_inverse=True)
+        hashes.append(unique)
+        amounts.append(np.bincount(inverse, weights=chunk["amount_plan"].to_numpy(dtype=float)))
+        ids.append(chunk["household_id"].to_numpy(dtype=object)[first])
+
+    if not hashes:
+        return np.empty(0, dtype=np.uint64), np.empty(0), np.empty(0, dtype=object)
+
+    unique, first, inverse = np.unique(np.concatenate(hashes), return_index=True, return_inverse=True)
+    planned = np.bincount(inverse, weights=np.concatenate(amounts), minlength=len(unique))
+    return unique, planned, np.concatenate(ids)[first]
+
+
+# --------------------------------------------------
+# RAPPROCHEMENT
+# --------------------------------------------------
+
+class Reconciliation:
+    """Per-household outcome of a plan against its confirmations."""
+
+    def __init__(self, ids, planned, paid, transactions, unknown):
+        reached = paid > 0
+        duplicate = (transactions > 1) & (paid - planned > AMOUNT_TOLERANCE)
+        mismatch = reached & ~duplicate & (np.abs(paid - planned) > AMOUNT_TOLERANCE)
+        gap = np.abs(paid - planned)
+
+        self.totals = {
+            "households_plan": int(len(ids)),
+            "households_reach": int(reached.sum()),
+            "households_unreached": int((~reached).sum()),
+            "cash_plan": float(planned.sum()),
+            # Within plan: over-payments are reported under their mismatch.
+            "cash_reach": float(np.minimum(paid, planned).sum()),
+            "cash_undelivered": float(np.maximum(planned - paid, 0).sum()),
+            "households_duplicate": int(duplicate.sum()),
+            "cash_duplicate": float(gap[duplicate].sum()),
+            "households_amount_mismatch": int(mismatch.sum()),
+            "cash_amount_mismatch": float(gap[mismatch].sum()),
+            "households_unknown": int(len(unknown)),
+            "cash_unknown": float(unknown["paid"].sum()),
+        }
+
+        flagged = duplicate | mismatch
+        known = pd.DataFrame({
+            "household_id": ids[flagged],
+            "category": np.where(duplicate[flagged], "duplicate", "amount_mismatch"),
+            "planned": planned[flagged],
+            "paid": paid[flagged],
+            "transactions": transactions[flagged],
+        })
+        self.mismatches = pd.concat(
+            [known, unknown.assign(category="unknown", planned=0.0)[known.columns]],
+            ignore_index=True,
+        )
+
+
+def reconcile(plan_chunks, confirmation_chunks):
+    """Hash-join streamed plan and confirmation chunks into a :class:`Reconciliation`."""
+    hashes, planned, ids = plan_households(plan_chunks)
+    table = pd.Index(hashes)
+    paid = np.zeros(len(hashes))
+    transactions = np.zeros(len(hashes), dtype=np.int64)
+    unknown = []
+
+    for chunk in confirmation_chunks:
+        chunk = _valid(chunk)
+        chunk = chunk[chunk["amount_confirmed"] > 0]
+        position = table.get_indexer(_hash(chunk["household_id"]))
+        amount = chunk["amount_confirmed"].to_numpy(dtype=float)
+
+        known = position >= 0
+        paid += np.bincount(position[known], weights=amount[known], minlength=len(hashes))
+        transactions += np.bincount(position[known], minlength=len(hashes))
+        if not known.all():
+            unknown.append(
+                chunk[~known].groupby("household_id")["amount_confirmed"]
+                .agg(paid="sum", transactions="count").reset_index()
+            )
+
+    if unknown:
+        unknown = pd.concat(unknown).groupby("household_id", as_index=False)[["paid", "transactions"]].sum()
+    else:
+        unknown = pd.DataFrame({"household_id": [], "paid": [], "transactions": []})
+
+    return Reconciliation(ids, planned, paid, transactions, unknown)
+
+
+# --------------------------------------------------
+# SOURCES + CACHE
+# --------------------------------------------------
+
+def plan_chunks(payment_code, distribution):
+    """Plan rows (``household_id``, ``amount_plan``) of a payment plan."""
+    paths = export_files(payment_code)
+    if paths:
+        for path in paths:
+            yield from read_chunks(path, PLAN_COLUMNS)
+    else:
+        yield from record_chunks(["household_id", "amount_plan"], distribution=distribution)
+
+
+def confirmation_chunks(paths):
+    """Confirmation rows (``household_id``, ``amount_confirmed``) of ``paths``."""
+    for path in paths:
+        yield from read_chunks(path, CONFIRMATION_COLUMNS)
+
+
+def _plan_version(payment_code, distribution):
+    paths = export_files(payment_code)
+    return file_version(*paths) if paths else store_version(distribution=distribution)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_reconciliation(payment_code, distribution, confirmations, version):
+    return reconcile(plan_chunks(payment_code, distribution), confirmation_chunks(confirmations))
+
+
+def load_reconciliation(payment_code, distribution):
+    """:class:`Reconciliation` of a plan, or ``None`` without confirmations or plan data."""
+    confirmations = confirmation_files(payment_code)
+    plan = _plan_version(payment_code, distribution)
+    if not confirmations or plan is None:
+        return None
+    version = f"{plan}-{file_version(*confirmations)}"
+    return _cached_reconciliation(payment_code, distribution, tuple(confirmations), version)
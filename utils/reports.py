@@ -0,0 +1,454 @@
+"""Batch reports (PDF + XLSX) per distribution and per district.
+
+:func:`distribution_report` and :func:`district_report` gather what the
+dashboard shows (KPI cards, gauge values, the cash breakdown chart, payment
+and indicator tables) into a :class:`Report`: plain data, built in the
+parent process from the same loaders and chart functions as the pages.
+``Report.version`` hashes that content, so a report whose figures did not
+change is skipped (``build/reports/manifest.json`` keeps the version of
+every file written).
+
+Charts become PNG images through Kaleido (``plotly.io.write_images``, one
+headless Chrome per batch). Kaleido 1.x does not ship Chrome: install it
+once with ``plotly_get_chrome`` (or ``kaleido.get_chrome_sync()``);
+:func:`check_renderer` fails early with that hint when it is missing. An
+image is named after the hash of its figure JSON,
+``build/reports/images/<hash>.png``, so it is rendered once and reused by
+every report and every run until its data changes: the DCT 2 activity
+charts, for one, are shared by all distribution reports.
+
+The PDF is laid out with ReportLab, the workbook with openpyxl (a summary
+sheet, a chart sheet and one sheet per table).
+"""
+import json
+import numbers
+import os
+import re
+from xml.sax.saxutils import escape
+
+import pandas as pd
+import plotly.io as pio
+
+from utils.charts import activity_chart, breakdown, gauge
+from utils.filters import labelled, option_labels
+from utils.indicators import DCT2_ACTIVITIES, DCT2_WEIGHTS, activity_table
+from utils.queries import payment_summary
+from utils.reconciliation import MISMATCHES
+from utils.store import available_distributions, distribution_number
+from utils.versioning import value_version
+
+REPORTS_DIR = os.path.join("build", "reports")
+IMAGES_DIR = os.path.join(REPORTS_DIR, "images")
+MANIFEST = os.path.join(REPORTS_DIR, "manifest.json")
+
+# Bumped when the layout changes, so every report is rebuilt once.
+REPORT_FORMAT = 1
+
+IMAGE_WIDTH = 1000  # px, layout height kept
+IMAGE_SCALE = 2
+
+CARD_COLORS = ["#005b96", "#003f73", "#c62828", "#8e0000"]
+HEADER_COLOR = "#005b96"
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+# --------------------------------------------------
+# CONTENU
+# --------------------------------------------------
+
+class Report:
+    """Content of one report.
+
+    * ``cards``: ``[(label, value)]``, the KPI cards;
+    * ``gauges``: ``[(label, value in %, figure JSON)]``;
+    * ``charts``: ``[(title, figure JSON)]``;
+    * ``tables``: ``[(title, DataFrame)]``.
+    """
+
+    def __init__(self, stem, title, subtitle, cards, gauges, charts, tables):
+        self.stem = stem
+        self.title = title
+        self.subtitle = subtitle
+        self.cards = cards
+        self.gauges = gauges
+        self.charts = charts
+        self.tables = tables
+
+    @property
+    def version(self):
+        return value_version([
+            REPORT_FORMAT, self.title, self.subtitle, self.cards, self.gauges, self.charts,
+            [(title, df.to_dict("split")) for title, df in self.tables],
+        ])
+
+    def figures(self):
+        """Every figure JSON of the report (gauges, then charts)."""
+        return [spec for _, _, spec in self.gauges] + [spec for _, spec in self.charts]
+
+
+def _spec(fig):
+    return pio.to_json(fig, validate=False)
+
+
+def _rate(part, whole):
+    return float(part / whole * 100) if whole else 0.0
+
+
+def _gauges(coverage_rate, delivery_rate):
+    return [
+        ("Household Coverage (%)", round(coverage_rate, 2),
+         _spec(gauge(coverage_rate, "Household Coverage (%)", "#005b96"))),
+        ("Cash Delivery (%)", round(delivery_rate, 2),
+         _spec(gauge(delivery_rate, "Cash Delivery (%)", "#c62828"))),
+    ]
+
+
+def indicator_tables(indicators):
+    """Logframe, DCT 2 activity tables and the weighted DCT 2 score."""
+    logframe = indicators["logframe"][["Résultat", "Volet", "Indicateur", "Cible", "Réalisé", "Taux (%)"]]
+    tables = [("Cadre logique", logframe.astype({"Résultat": str, "Volet": str}))]
+
+    for activity in DCT2_ACTIVITIES:
+        tables.append((f"DCT 2 – {activity}", activity_table(indicators["table"], activity)))
+
+    rates = indicators["group_rates"].loc["dct2"]
+    score = pd.DataFrame({
+        "Activité": [*DCT2_WEIGHTS, "Score global pondéré"],
+        "Pondération (%)": [w * 100 for w in DCT2_WEIGHTS.values()] + [100.0],
+        "Taux (%)": [float(rates[a]) for a in DCT2_WEIGHTS] + [indicators["dct2_score"]],
+    })
+    tables.append(("Score DCT 2", score))
+    return tables
+
+
+def indicator_charts(indicators):
+    return [
+        (f"DCT 2 – {activity}", _spec(activity_chart(activity_table(indicators["table"], activity))))
+        for activity in DCT2_ACTIVITIES
+    ]
+
+
+def distribution_report(name, d, kpis, indicators):
+    """Dashboard of one realised distribution (``app.py``) plus the indicators."""
+    distribution = distribution_number(name)
+
+    cards = [
+        ("Households Plan", d["households_plan"]),
+        ("Households Reached", d["households_reach"]),
+        ("Cash to Beneficiary (Plan) – MGA", d["cash_plan"]),
+        ("Cash to Beneficiary (Reach) – MGA", d["cash_reach"]),
+    ]
+    charts = [("Cash Distribution Breakdown", _spec(breakdown(d, kpis["undelivered"])))]
+    tables = []
+
+    if "households_duplicate" in d:
+        tables.append(("Reconciliation", pd.DataFrame({
+            "Category": list(MISMATCHES.values()),
+            "Households": [d[f"households_{c}"] for c in MISMATCHES],
+            "Cash gap vs plan – MGA": [d[f"cash_{c}"] for c in MISMATCHES],
+        })))
+
+    if distribution in available_distributions():
+        filters = {"distribution": [distribution]}
+        tables.append(("Payments by district", labelled(payment_summary(by=["district"], filters=filters))))
+        tables.append(("Payments by commune", labelled(payment_summary(by=["district", "commune"], filters=filters))))
+
+    tables += indicator_tables(indicators)
+    charts += indicator_charts(indicators)
+
+    return Report(
+        f"distribution-{distribution:02d}",
+        name,
+        f"Coverage Period: {d['coverage_period']} | Payment Plan Code: {d['payment_code']}",
+        cards,
+        _gauges(kpis["coverage_rate"], kpis["delivery_rate"]),
+        charts,
+        tables,
+    )
+
+
+def district_reports(name, d):
+    """One report per district of a distribution in the beneficiary store."""
+    distribution = distribution_number(name)
+    if distribution not in available_distributions():
+        return []
+
+    labels = option_labels("district")
+    by_district = payment_summary(by=["district"], filters={"distribution": [distribution]})
+    return [
+        district_report(name, d, row, labels.get(row["district"], row["district"]))
+        for _, row in by_district.iterrows()
+    ]
+
+
+def district_report(name, d, summary, label):
+    """KPIs, breakdown and payment tables of one district of a distribution."""
+    distribution = distribution_number(name)
+    filters = {"distribution": [distribution], "district": [summary["district"]]}
+
+    cash_plan, cash_paid = float(summary["cash_plan"]), float(summary["cash_paid"])
+    cards = [
+        ("Households Plan", int(summary["households"])),
+        ("Households Reached", int(summary["households_paid"])),
+        ("Cash to Beneficiary (Plan) – MGA", cash_plan),
+        ("Cash to Beneficiary (Reach) – MGA", cash_paid),
+    ]
+
+    return Report(
+        f"distribution-{distribution:02d}-{_slug(label)}",
+        f"{name} – {label}",
+        f"Payment Plan Code: {d['payment_code']} | District {summary['district']}",
+        cards,
+        _gauges(
+            _rate(summary["households_paid"], summary["households"]),
+            _rate(cash_paid, cash_plan),
+        ),
+        [("Cash Distribution Breakdown", _spec(breakdown({"cash_reach": cash_paid}, cash_plan - cash_paid)))],
+        [
+            ("Payments by commune", labelled(payment_summary(by=["commune"], filters=filters))),
+            ("Payments by category", labelled(payment_summary(by=["category"], filters=filters))),
+            ("Payments by status", labelled(payment_summary(by=["status"], filters=filters))),
+        ],
+    )
+
+
+# --------------------------------------------------
+# IMAGES (cache par version de figure)
+# --------------------------------------------------
+
+def image_path(spec, directory=IMAGES_DIR):
+    return os.path.join(directory, f"{value_version(spec)}.png")
+
+
+def missing_images(reports, directory=IMAGES_DIR):
+    """``{image path: figure JSON}`` of the figures not rendered yet."""
+    missing = {}
+    for report in reports:
+        for spec in report.figures():
+            path = image_path(spec, directory)
+            if path not in missing and not os.path.exists(path):
+                missing[path] = spec
+    return missing
+
+
+def check_renderer():
+    """Raise ``RuntimeError`` if Kaleido cannot find a Chrome to render with.
+
+    Kaleido 0.x bundles its own Chromium and needs no check.
+    """
+    try:
+        from choreographer.browsers.chromium import Chromium
+    except ImportError:
+        return
+    if not Chromium.find_browser(skip_local=False):
+        raise RuntimeError(
+            "chart images need Chrome, which Kaleido >= 1 does not bundle: "
+            "install it once with `plotly_get_chrome` (or `kaleido.get_chrome_sync()`), "
+            "or point BROWSER_PATH at an existing Chrome/Chromium"
+        )
+
+
+def render_images(items):
+    """Render ``[(path, figure JSON)]`` to PNG in one Kaleido batch."""
+    if not items:
+        return 0
+    paths = [path for path, _ in items]
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmps = [f"{path}.{os.getpid()}.tmp.png" for path in paths]
+    pio.write_images(
+        [json.loads(spec) for _, spec in items], tmps,
+        format="png", width=IMAGE_WIDTH, scale=IMAGE_SCALE, validate=False,
+    )
+    for tmp, path in zip(tmps, paths):
+        os.replace(tmp, path)
+    return len(items)
+
+
+# --------------------------------------------------
+# ÉCRITURE PDF
+# --------------------------------------------------
+
+def _text(value):
+    if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        return f"{value:,}"
+    if isinstance(value, numbers.Real) and not pd.isna(value):
+        return f"{value:,.1f}" if value % 1 else f"{value:,.0f}"
+    return "" if pd.isna(value) else str(value)
+
+
+def _image(path, width):
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import Image
+
+    w, h = ImageReader(path).getSize()
+    return Image(path, width=width, height=width * h / w)
+
+
+def write_pdf(report, path, images_dir=IMAGES_DIR):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    cell = styles["BodyText"].clone("cell", fontSize=8, leading=10)
+    card = styles["BodyText"].clone("card", leading=20)
+    heading = styles["Heading2"].clone("heading", keepWithNext=1)
+    doc = SimpleDocTemplate(
+        path, pagesize=landscape(A4), title=f"ZARA MIRA – {report.title}",
+        leftMargin=1.5 * cm, rightMargin=1.5 * cm, topMargin=1.5 * cm, bottomMargin=1.5 * cm,
+    )
+    width = doc.width
+
+    story = [
+        Paragraph(escape(f"ZARA MIRA – {report.title}"), styles["Title"]),
+        Paragraph(escape(report.subtitle), styles["Normal"]),
+        Spacer(1, 0.5 * cm),
+    ]
+
+    cards = Table(
+        [[Paragraph(f"<font color='white' size='9'>{escape(label)}</font><br/>"
+                    f"<font color='white' size='16'><b>{_text(value)}</b></font>", card)
+          for label, value in report.cards]],
+        colWidths=[width / len(report.cards)] * len(report.cards),
+    )
+    cards.setStyle(TableStyle(
+        [("BACKGROUND", (i, 0), (i, 0), colors.HexColor(c)) for i, c in enumerate(CARD_COLORS)]
+        + [("LINEAFTER", (0, 0), (-2, 0), 6, colors.white),
+           ("TOPPADDING", (0, 0), (-1, -1), 10), ("BOTTOMPADDING", (0, 0), (-1, -1), 10)]
+    ))
+    story += [cards, Spacer(1, 0.5 * cm)]
+
+    story.append(Table([[
+        _image(image_path(spec, images_dir), width / len(report.gauges) - 0.5 * cm)
+        for _, _, spec in report.gauges
+    ]]))
+    story.append(Paragraph(
+        " | ".join(f"{escape(label)}: <b>{value:.2f}%</b>" for label, value, _ in report.gauges), styles["Normal"]
+    ))
+
+    for title, spec in report.charts:
+        story.append(KeepTogether([
+            Paragraph(escape(title), heading),
+            _image(image_path(spec, images_dir), width * 0.6),
+        ]))
+
+    for title, df in report.tables:
+        rows = [[Paragraph(f"<b>{escape(str(c))}</b>", cell) for c in df.columns]]
+        rows += [[Paragraph(escape(_text(v)), cell) for v in record] for record in df.itertuples(index=False)]
+        table = Table(rows, repeatRows=1, hAlign="LEFT")
+        table.setStyle(TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#dde3ec")),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#9fb3c8")),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]))
+        story += [Paragraph(escape(title), heading), table]
+
+    doc.build(story)
+
+
+# --------------------------------------------------
+# ÉCRITURE XLSX
+# --------------------------------------------------
+
+def _sheet_title(title, taken):
+    title = re.sub(r"[\[\]:*?/\\]", "-", title)[:31]
+    base, n = title, 2
+    while title in taken:
+        suffix = f" ({n})"
+        title, n = base[:31 - len(suffix)] + suffix, n + 1
+    taken.add(title)
+    return title
+
+
+def write_xlsx(report, path, images_dir=IMAGES_DIR):
+    from openpyxl import Workbook
+    from openpyxl.drawing.image import Image
+    from openpyxl.styles import Font, PatternFill
+
+    bold = Font(bold=True)
+    header = PatternFill("solid", fgColor=HEADER_COLOR[1:])
+    wb = Workbook()
+
+    summary = wb.active
+    summary.title = "Synthèse"
+    summary.append([f"ZARA MIRA – {report.title}"])
+    summary["A1"].font = Font(bold=True, size=14)
+    summary.append([report.subtitle])
+    summary.append([])
+    for label, value in report.cards:
+        summary.append([label, value])
+        summary.cell(summary.max_row, 2).number_format = "#,##0"
+    for label, value, _ in report.gauges:
+        summary.append([label, value / 100])
+        summary.cell(summary.max_row, 2).number_format = "0.00%"
+    summary.column_dimensions["A"].width = 40
+    summary.column_dimensions["B"].width = 20
+
+    charts = wb.create_sheet("Graphiques")
+    row = 1
+    for title, spec in [(label, spec) for label, _, spec in report.gauges] + report.charts:
+        charts.cell(row, 1, title).font = bold
+        image = Image(image_path(spec, images_dir))
+        image.width, image.height = image.width / IMAGE_SCALE, image.height / IMAGE_SCALE
+        charts.add_image(image, f"A{row + 1}")
+        row += int(image.height / 20) + 3  # default row height: 20 px
+
+    taken = {"Synthèse", "Graphiques"}
+    for title, df in report.tables:
+        sheet = wb.create_sheet(_sheet_title(title, taken))
+        sheet.append(list(df.columns))
+        for c in sheet[1]:
+            c.font = Font(bold=True, color="FFFFFF")
+            c.fill = header
+        for record in df.itertuples(index=False):
+            sheet.append([None if pd.isna(v) else (v.item() if hasattr(v, "item") else v) for v in record])
+        for i, column in enumerate(df.columns, start=1):
+            longest = max([len(str(column)), *(len(_text(v)) for v in df.iloc[:, i - 1])])
+            sheet.column_dimensions[sheet.cell(1, i).column_letter].width = min(longest + 2, 60)
+        sheet.freeze_panes = "A2"
+
+    wb.save(path)
+
+
+def write_report(report, out_dir=REPORTS_DIR, images_dir=IMAGES_DIR):
+    """Write ``<stem>.pdf`` and ``<stem>.xlsx``; returns the stem."""
+    os.makedirs(out_dir, exist_ok=True)
+    for ext, write in ((".pdf", write_pdf), (".xlsx", write_xlsx)):
+        path = os.path.join(out_dir, report.stem + ext)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        write(report, tmp, images_dir)
+        os.replace(tmp, path)
+    return report.stem
+
+
+# --------------------------------------------------
+# MANIFESTE (rapports à jour)
+# --------------------------------------------------
+
+def read_manifest(path=MANIFEST):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(manifest, path=MANIFEST):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def is_current(report, manifest, out_dir=REPORTS_DIR):
+    """Whether both files of ``report`` exist and were written from this content."""
+    return manifest.get(report.stem) == report.version and all(
+        os.path.exists(os.path.join(out_dir, report.stem + ext)) for ext in (".pdf", ".xlsx")
+    )
@@ -0,0 +1,176 @@
+"""Beneficiary counts per commune, district and programme, in one pass.
+
+Records (one row per beneficiary, or one row per commune and category with
+a ``count``) are reduced to a commune × category matrix: the commune pcode
+and the category are turned into categorical codes against fixed key lists
+and every chunk adds a single ``np.bincount`` over the combined code.
+District and programme totals are sums of that matrix, so one pass over the
+records serves the map, the KPI cards and the district table of the Zones
+page. Results are cached per source and data version.
+
+Sources: the targeting list (``TARGETING``), the GPS household registry
+(communes from the spatial join) and each distribution of the beneficiary
+store.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.boundaries import LAYERS, load_map_topojson
+from utils.datasets import compact, share
+from utils.spatial import household_chunks, registry_files
+from utils.store import CATEGORIES, available_distributions, distribution_number, record_chunks, store_version
+from utils.versioning import file_version, value_version
+
+SOURCE_TARGETING = "Ciblage"
+SOURCE_REGISTRY = "Registre GPS"
+
+COUNT_COLUMNS = list(CATEGORIES.values())
+
+# Targeting list: District, Commune, ADM3_PCODE, Enfants, Handicap, Femmes_Enceintes
+TARGETING = [
+    ["BEFOTAKA","ANTANINARENINA","MG25222032",3723,92,29],
+    ["BEFOTAKA","BEFOTAKA SUD","MG25222011",5680,158,50],
+    ["BEFOTAKA","BEHARENA","MG25222052",4403,114,50],
+    ["MIDONGY-ATSIMO","ANKAZOVELO","MG25215012",3377,29,48],
+    ["MIDONGY-ATSIMO","NOSIFENO","MG25215011",10618,117,104],
+    ["MIDONGY-ATSIMO","MALIORANO","MG25215032",4125,41,19],
+    ["VONDROZO","VONDROZO","MG25217011",5573,125,79],
+    ["VONDROZO","MANAMBIDALA","MG25217012",11327,238,49],
+    ["VONDROZO","ANANDRAVY","MG25217013",4964,105,74],
+    ["VONDROZO","MAHATSINJO","MG25217030",15095,372,228],
+    ["VONDROZO","VOHIMARY","MG25217071",7656,167,39],
+]
+
+
+# --------------------------------------------------
+# CLÉS
+# --------------------------------------------------
+
+class CommuneKeys:
+    """Commune pcodes (the code order) with their district and name."""
+
+    def __init__(self, properties):
+        names = {}
+        for p in properties:
+            names.setdefault(p["ADM3_PCODE"], (p["ADM2_EN"].upper(), p["ADM3_EN"].upper()))
+        self.pcodes = sorted(names)
+        self.districts = [names[p][0] for p in self.pcodes]
+        self.communes = [names[p][1] for p in self.pcodes]
+
+    def __len__(self):
+        return len(self.pcodes)
+
+
+def commune_keys():
+    topology = load_map_topojson("adm3", "low")
+    return CommuneKeys(g["properties"] for g in topology["objects"]["adm3"]["geometries"])
+
+
+# --------------------------------------------------
+# AGRÉGATION
+# --------------------------------------------------
+
+class Rollup:
+    """Commune, district and programme totals of one source."""
+
+    def __init__(self, keys, counts, unmatched=0):
+        table = pd.DataFrame(counts, columns=COUNT_COLUMNS)
+        table.insert(0, "District", keys.districts)
+        table.insert(1, "Commune", keys.communes)
+        table.insert(2, "ADM3_PCODE", keys.pcodes)
+
+        # Communes -> districts is a sum over the matrix rows, not a second
+        # pass over the records.
+        district_names, district_codes = np.unique(keys.districts, return_inverse=True)
+        by_district = np.zeros((len(district_names), counts.shape[1]), dtype=np.int64)
+        np.add.at(by_district, district_codes, counts)
+        districts = pd.DataFrame(by_district, columns=COUNT_COLUMNS, index=pd.Index(district_names, name="District"))
+
+        self.communes = compact(table[counts.sum(axis=1) > 0].reset_index(drop=True))
+        self.districts = compact(districts[by_district.sum(axis=1) > 0])
+        self.programme = pd.Series(counts.sum(axis=0), index=COUNT_COLUMNS)
+        self.unmatched = unmatched
+
+
+def rollup(chunks, keys):
+    """Reduce record chunks (``commune``, ``category``[, ``count``]) in one pass.
+
+    Records whose commune is not in ``keys`` are counted in ``unmatched``;
+    unknown categories are ignored.
+    """
+    codes = pd.Index(list(CATEGORIES))
+    pcodes = pd.Index(keys.pcodes)
+    size = len(keys) * len(codes)
+    counts = np.zeros(size, dtype=np.int64)
+    unmatched = 0
+
+    for chunk in chunks:
+        commune = pcodes.get_indexer(chunk["commune"]).astype(np.int64)
+        category = codes.get_indexer(chunk["category"].str.lower()).astype(np.int64)
+        weights = chunk["count"].to_numpy(dtype=np.int64) if "count" in chunk else np.ones(len(chunk), dtype=np.int64)
+
+        ok = (commune >= 0) & (category >= 0)
+        unmatched += int(weights[commune < 0].sum())
+        counts += np.bincount(
+            commune[ok] * len(codes) + category[ok], weights=weights[ok], minlength=size
+        ).astype(np.int64)
+
+    return Rollup(keys, counts.reshape(len(keys), len(codes)), unmatched)
+
+
+def targeting_chunks():
+    """The targeting list as one chunk of (commune, category, count) rows."""
+    table = pd.DataFrame(TARGETING, columns=["District", "Commune", "ADM3_PCODE"] + COUNT_COLUMNS)
+    long = table.melt(id_vars="ADM3_PCODE", value_vars=COUNT_COLUMNS, var_name="category", value_name="count")
+    labels = {column: code for code, column in CATEGORIES.items()}
+    yield pd.DataFrame({
+        "commune": long["ADM3_PCODE"],
+        "category": long["category"].map(labels).astype("string"),
+        "count": long["count"],
+    })
+
+
+# --------------------------------------------------
+# SOURCES + CACHE
+# --------------------------------------------------
+
+def rollup_sources():
+    """Sources available right now, targeting list first."""
+    sources = [SOURCE_TARGETING]
+    if registry_files("households"):
+        sources.append(SOURCE_REGISTRY)
+    return sources + [f"Distribution {n}" for n in available_distributions()]
+
+
+def _chunks(source):
+    if source == SOURCE_TARGETING:
+        return targeting_chunks()
+    if source == SOURCE_REGISTRY:
+        return household_chunks(registry_files("households"))
+    return record_chunks(["commune", "category"], distribution=distribution_number(source))
+
+
+def source_version(source):
+    if source == SOURCE_TARGETING:
+        version = value_version(TARGETING)
+    elif source == SOURCE_REGISTRY:
+        version = file_version(*registry_files("households"))
+    else:
+        version = store_version(distribution=distribution_number(source))
+    return f"{version}-{file_version(LAYERS['adm3'])}"
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _cached_rollup(source, version):
+    result = rollup(_chunks(source), commune_keys())
+    share(f"effectifs par commune ({source})", result.communes)
+    return result
+
+
+def load_rollup(source=SOURCE_TARGETING):
+    """:class:`Rollup` of ``source`` (see :func:`rollup_sources`).
+
+    Shared, read-only, by every session (see :mod:`utils.datasets`).
+    """
+    return _cached_rollup(source, source_version(source))
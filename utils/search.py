@@ -0,0 +1,69 @@
+"""Accent- and case-folded inverted index for the indicator search box.
+
+Text is folded (``"Référencement"`` -> ``"referencement"``), split into
+tokens and indexed once per data version. A query matches the rows where
+every query token is a prefix of some indexed token, so "refer prise"
+finds "Référencement & prise en charge". Prefix lookups are a binary
+search over the sorted vocabulary instead of a scan over the rows.
+"""
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import streamlit as st
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def fold(text):
+    """Lower-case, strip accents and ligatures (œ -> oe)."""
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.replace("œ", "oe").replace("æ", "ae")
+
+
+def tokenize(text):
+    return _TOKEN.findall(fold(text))
+
+
+class SearchIndex:
+    """Token -> row positions, with a sorted vocabulary for prefix lookup."""
+
+    def __init__(self, documents):
+        postings = {}
+        for row, text in enumerate(documents):
+            for token in set(tokenize(text)):
+                postings.setdefault(token, []).append(row)
+
+        self.size = len(documents)
+        self.vocabulary = sorted(postings)
+        self.postings = [np.asarray(postings[t], dtype=np.int32) for t in self.vocabulary]
+
+    def _prefix(self, prefix):
+        lo = bisect.bisect_left(self.vocabulary, prefix)
+        hi = bisect.bisect_left(self.vocabulary, prefix + "￿")
+        if lo == hi:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(self.postings[lo:hi]))
+
+    def search(self, query):
+        """Row positions matching every token of ``query`` (all rows if empty)."""
+        tokens = tokenize(query)
+        if not tokens:
+            return np.arange(self.size)
+
+        rows = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            hits = self._prefix(token)
+            rows = hits if rows is None else np.intersect1d(rows, hits, assume_unique=True)
+            if rows.size == 0:
+                break
+        return rows
+
+
+@st.cache_resource(show_spinner=False)
+def build_search_index(version, _df, columns):
+    """Index over ``columns`` of ``_df``, shared by all sessions per data version."""
+    documents = _df[list(columns)].astype(str).agg(" ".join, axis=1).tolist()
+    return SearchIndex(documents)
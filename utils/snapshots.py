@@ -0,0 +1,258 @@
+"""Append-only history of the indicator values, with as-of queries.
+
+Each reporting period of a project is one Parquet file,
+``data/store/snapshots/project=<project>/period=<YYYY-MM-DD>.parquet``,
+written once and never rewritten. It holds only the values that changed
+since the previous period (delta encoding), one row per changed value:
+
+* ``source``, ``Groupe``, ``Indicateur``: the indicator (dictionary-encoded);
+* ``field``: ``Cible``, ``Réalisé`` or ``dropped``;
+* ``value``: the new value (null is a value too: not reported). For
+  ``dropped``, 1 when the indicator left the table at that period and 0
+  when it (re)appeared; every indicator gets a 0 on its first period.
+
+A period where nothing moved is an empty file: it still counts as a
+reporting date. Record the current table with
+``python -m scripts.record_snapshot <YYYY-MM-DD>``.
+
+Reading a project loads its delta rows once per version into a
+:class:`SnapshotIndex`: one sorted ``int64`` key per row (series code, then
+day). The value of every series as of any date is then a single
+``np.searchsorted`` over that key, so a whole table at a date, or every
+reporting date at once for the progress curves, costs one vectorised
+lookup, however many years of snapshots the project has. Projects are
+separate directories: a query reads only its own.
+"""
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import streamlit as st
+
+from utils.datasets import share
+from utils.indicators import rate
+from utils.versioning import file_version
+
+SNAPSHOTS_DIR = os.path.join("data", "store", "snapshots")
+PROJECT = "zara_mira"
+
+INDICATOR_COLUMNS = ["source", "Groupe", "Indicateur"]
+FIELDS = ["Cible", "Réalisé"]
+DROPPED = "dropped"
+SERIES_FIELDS = FIELDS + [DROPPED]
+
+SCHEMA = pa.schema([
+    ("source", pa.dictionary(pa.int32(), pa.string())),
+    ("Groupe", pa.dictionary(pa.int32(), pa.string())),
+    ("Indicateur", pa.dictionary(pa.int32(), pa.string())),
+    ("field", pa.dictionary(pa.int8(), pa.string())),
+    ("value", pa.float64()),
+])
+
+# key = series code * STRIDE + days since 1970 + DAY_OFFSET
+STRIDE = 1 << 32
+DAY_OFFSET = 1 << 31
+
+
+def _day(dates):
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64) + DAY_OFFSET
+
+
+def _project_dir(project, directory):
+    return os.path.join(directory, f"project={project}")
+
+
+def snapshot_files(project=PROJECT, directory=SNAPSHOTS_DIR):
+    """``{period: path}`` of a project, in date order."""
+    files = glob.glob(os.path.join(_project_dir(project, directory), "period=*.parquet"))
+    periods = {
+        np.datetime64(re.search(r"period=(\d{4}-\d{2}-\d{2})", f).group(1), "D"): f for f in files
+    }
+    return dict(sorted(periods.items()))
+
+
+# --------------------------------------------------
+# INDEX AS-OF
+# --------------------------------------------------
+
+class SnapshotIndex:
+    """As-of lookups over the delta rows of one project."""
+
+    def __init__(self, periods, deltas):
+        self.periods = np.array(sorted(periods), dtype="datetime64[D]")
+
+        indicators = deltas[INDICATOR_COLUMNS].astype(str)
+        codes, uniques = pd.MultiIndex.from_frame(indicators).factorize()
+        self.indicators = uniques.to_frame(index=False, name=INDICATOR_COLUMNS)
+        field = pd.Categorical(deltas["field"].astype(str), categories=SERIES_FIELDS).codes.astype(np.int64)
+        series = codes.astype(np.int64) * len(SERIES_FIELDS) + field
+
+        keys = series * STRIDE + _day(deltas["period"].to_numpy())
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.values = deltas["value"].to_numpy(dtype=float)[order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, dates):
+        """Values as of each of ``dates``: array (indicator, series field, date)."""
+        days = _day(dates)
+        series = np.arange(len(self.indicators) * len(SERIES_FIELDS), dtype=np.int64)
+        probe = (series[:, None] * STRIDE + days[None, :]).ravel()
+
+        position = np.searchsorted(self.keys, probe, side="right") - 1
+        found = position >= 0
+        found[found] = self.keys[position[found]] // STRIDE == probe[found] // STRIDE
+        values = np.where(found, self.values[np.maximum(position, 0)], np.nan)
+        return values.reshape(len(self.indicators), len(SERIES_FIELDS), len(days))
+
+    def _frame(self, values, dates):
+        """Long table from :meth:`lookup` output, indicators not in the table removed."""
+        n, periods = len(self.indicators), len(dates)
+        df = self.indicators.iloc[np.repeat(np.arange(n), periods)].reset_index(drop=True)
+        df.insert(0, "period", np.tile(np.asarray(dates, dtype="datetime64[D]"), n))
+        df["Cible"] = values[:, 0, :].ravel()
+        df["Réalisé"] = values[:, 1, :].ravel()
+        df = df[values[:, 2, :].ravel() == 0].reset_index(drop=True)
+        df["Taux (%)"] = rate(df["Cible"].fillna(0), df["Réalisé"])
+        return df
+
+    def state(self, date):
+        """Last recorded values of every indicator ever seen, as of ``date``,
+        with its ``dropped`` flag (0 or 1)."""
+        values = self.lookup([date])[:, :, 0]
+        df = self.indicators.copy()
+        for i, field in enumerate(SERIES_FIELDS):
+            df[field] = values[:, i]
+        return df[df[DROPPED].notna()].reset_index(drop=True)
+
+    def as_of(self, date):
+        """Every indicator's values at ``date`` (the last period on or before it)."""
+        return self._frame(self.lookup([date]), [date]).drop(columns="period")
+
+    def history(self):
+        """Values at every reporting period, one row per (period, indicator)."""
+        return self._frame(self.lookup(self.periods), self.periods)
+
+
+def read_index(project=PROJECT, directory=SNAPSHOTS_DIR):
+    """:class:`SnapshotIndex` of a project, read from disk (not cached)."""
+    files = snapshot_files(project, directory)
+    if files:
+        table = ds.dataset(list(files.values()), schema=SCHEMA, format="parquet").to_table()
+        sizes = [pq.ParquetFile(f).metadata.num_rows for f in files.values()]
+        deltas = table.to_pandas()
+        deltas["period"] = np.repeat(np.array(list(files), dtype="datetime64[D]"), sizes)
+    else:
+        deltas = pd.DataFrame({**{c: [] for c in SCHEMA.names}, "period": []})
+    return SnapshotIndex(list(files), deltas)
+
+
+# --------------------------------------------------
+# ENREGISTREMENT (ajout seulement)
+# --------------------------------------------------
+
+def _long(table):
+    return table[INDICATOR_COLUMNS + SERIES_FIELDS].melt(
+        id_vars=INDICATOR_COLUMNS, value_vars=SERIES_FIELDS, var_name="field", value_name="value"
+    ).astype({"value": float})
+
+
+def record_snapshot(table, period, project=PROJECT, directory=SNAPSHOTS_DIR):
+    """Append the ``Cible``/``Réalisé`` of ``table`` as period ``period``.
+
+    Only values that differ from the state at the previous period are
+    written, plus a ``dropped`` flag for indicators entering or leaving the
+    table. Periods are append-only: ``period`` must be later than every
+    recorded one. Returns the number of changed values.
+    """
+    period = np.datetime64(period, "D")
+    index = read_index(project, directory)
+    if len(index.periods) and period <= index.periods[-1]:
+        raise ValueError(
+            f"{project}: period {period} is not after the last recorded one ({index.periods[-1]})"
+        )
+
+    state = index.state(period)
+    current = table[INDICATOR_COLUMNS + FIELDS].astype({c: str for c in INDICATOR_COLUMNS}).assign(**{DROPPED: 0.0})
+    # Indicators no longer in the table keep their last values, flagged as dropped.
+    gone = state.merge(current[INDICATOR_COLUMNS], on=INDICATOR_COLUMNS, how="left", indicator=True)
+    gone = gone[gone["_merge"] == "left_only"].drop(columns="_merge").assign(**{DROPPED: 1.0})
+
+    previous = _long(state)
+    current = _long(pd.concat([current, gone], ignore_index=True))
+    merged = previous.merge(current, on=INDICATOR_COLUMNS + ["field"], how="outer", suffixes=("_old", ""))
+    changed = ~(
+        (merged["value"] == merged["value_old"])
+        | (merged["value"].isna() & merged["value_old"].isna())
+    )
+    deltas = merged.loc[changed, SCHEMA.names].reset_index(drop=True)
+
+    path = os.path.join(_project_dir(project, directory), f"period={period}.parquet")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(pa.Table.from_pandas(deltas, schema=SCHEMA, preserve_index=False), tmp)
+    os.replace(tmp, path)
+    return len(deltas)
+
+
+# --------------------------------------------------
+# LECTURE (pages)
+# --------------------------------------------------
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _cached_index(project, version, directory):
+    index = read_index(project, directory)
+    index.version = version
+    index.history_table = share(f"historique ({project})", index.history())
+    return index
+
+
+def load_snapshots(project=PROJECT, directory=SNAPSHOTS_DIR):
+    """Shared :class:`SnapshotIndex` of a project, or ``None`` without snapshots.
+
+    ``history_table`` holds :meth:`SnapshotIndex.history`, computed once per
+    version; ``version`` keys caches built on top.
+    """
+    files = snapshot_files(project, directory)
+    if not files:
+        return None
+    return _cached_index(project, file_version(*files.values()), directory)
+
+
+def compare(index, date_a, date_b, source):
+    """Indicators of ``source`` at two dates side by side, with the changes."""
+    a = index.as_of(date_a)
+    b = index.as_of(date_b)
+    a, b = a[a["source"] == source], b[b["source"] == source]
+    df = a.merge(b, on=INDICATOR_COLUMNS, how="outer", suffixes=(" A", " B"))
+    df["Δ Réalisé"] = df["Réalisé B"] - df["Réalisé A"]
+    df["Δ Taux (pts)"] = (df["Taux (%) B"] - df["Taux (%) A"]).round(1)
+    return df[[
+        "Groupe", "Indicateur", "Réalisé A", "Réalisé B", "Δ Réalisé", "Taux (%) A", "Taux (%) B", "Δ Taux (pts)",
+    ]]
+
+
+def progress(history, source, weights=None, score="Score global pondéré"):
+    """Average ``Taux (%)`` per group and period of ``source``, long format.
+
+    Same averaging as the pages' group rates; with ``weights``
+    (``{group: weight}``) the weighted score is added as group ``score``.
+    """
+    rows = history[history["source"] == source]
+    curves = rows.groupby(["period", "Groupe"], as_index=False)["Taux (%)"].mean()
+    curves["Taux (%)"] = curves["Taux (%)"].round(1)
+    if weights:
+        by_group = curves.pivot(index="period", columns="Groupe", values="Taux (%)")
+        weighted = (by_group.reindex(columns=list(weights)) * pd.Series(weights)).sum(axis=1, min_count=1)
+        curves = pd.concat(
+            [curves, pd.DataFrame({"period": weighted.index, "Groupe": score, "Taux (%)": weighted.round(1).to_numpy()})],
+            ignore_index=True,
+        )
+    return curves
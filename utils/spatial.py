@@ -0,0 +1,172 @@
+"""Spatial join of GPS points (households, payment sites) to ADM3 communes.
+
+The commune polygons are indexed once per boundary version in a shapely
+``STRtree``. Points are streamed in chunks of ``CHUNK_POINTS``; each chunk
+becomes a shapely point array, one bulk tree query returns the candidate
+(point, polygon) pairs from the bounding boxes and one vectorized
+``intersects_xy`` call over those pairs keeps the true hits. Memory is
+bounded by the chunk size and no Python loop runs over points or polygons.
+
+Inputs live in ``data/registry/`` (CSV or XLSX, read in chunks like the
+payment exports):
+
+* ``households*.csv|xlsx``: one row per beneficiary, ``beneficiary_category``,
+  ``latitude``, ``longitude``;
+* ``payment_sites*.csv|xlsx``: one row per site, ``site_id``, ``latitude``,
+  ``longitude``.
+"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+import streamlit as st
+from shapely.geometry import shape
+
+from utils.boundaries import LAYERS, boundaries_version, load_boundaries, read_geojson
+from utils.payments import read_chunks
+from utils.versioning import file_version
+
+REGISTRY_DIR = os.path.join("data", "registry")
+CHUNK_POINTS = 250_000
+
+HOUSEHOLD_COLUMNS = {
+    "beneficiary_category": "category",
+    "latitude": "lat",
+    "longitude": "lon",
+}
+
+SITE_COLUMNS = {
+    "site_id": "site_id",
+    "latitude": "lat",
+    "longitude": "lon",
+}
+
+
+def registry_files(prefix, directory=REGISTRY_DIR):
+    files = []
+    for ext in ("csv", "xlsx"):
+        files += glob.glob(os.path.join(directory, f"{prefix}*.{ext}"))
+    return sorted(files)
+
+
+# --------------------------------------------------
+# INDEX SPATIAL
+# --------------------------------------------------
+
+class CommuneIndex:
+    """STRtree over the ADM3 polygons, with their pcode and names."""
+
+    def __init__(self, collection):
+        features = collection["features"]
+        self.polygons = np.array([shape(f["geometry"]) for f in features])
+        shapely.prepare(self.polygons)
+        self.tree = shapely.STRtree(self.polygons)
+        self.pcodes = np.array([f["properties"]["ADM3_PCODE"] for f in features])
+        self.communes = [f["properties"]["ADM3_EN"] for f in features]
+        self.districts = [f["properties"]["ADM2_EN"] for f in features]
+
+    def __len__(self):
+        return len(self.pcodes)
+
+    def assign(self, lon, lat):
+        """Polygon position of each point, ``-1`` outside every commune.
+
+        A point on a shared border goes to the first polygon in index order.
+        """
+        x = np.asarray(lon, dtype=float)
+        y = np.asarray(lat, dtype=float)
+        hits, polygons = self.tree.query(shapely.points(x, y))
+        inside = shapely.intersects_xy(self.polygons[polygons], x[hits], y[hits])
+        hits, polygons = hits[inside], polygons[inside]
+
+        out = np.full(len(x), -1, dtype=np.int32)
+        order = np.lexsort((polygons, hits))
+        hits, polygons = hits[order], polygons[order]
+        first = np.ones(len(hits), dtype=bool)
+        first[1:] = hits[1:] != hits[:-1]
+        out[hits[first]] = polygons[first]
+        return out
+
+    def frame(self, counts):
+        """Per-commune DataFrame of ``{column: counts per polygon}``.
+
+        Communes made of several features are summed under their pcode.
+        """
+        df = pd.DataFrame({
+            "District": [d.upper() for d in self.districts],
+            "Commune": [c.upper() for c in self.communes],
+            "ADM3_PCODE": self.pcodes,
+            **counts,
+        })
+        keys = ["District", "Commune", "ADM3_PCODE"]
+        return df.groupby(keys, sort=False, as_index=False)[list(counts)].sum()
+
+
+@st.cache_resource(show_spinner=False)
+def commune_index(version):
+    """Index over the source ADM3 polygons, shared by every session."""
+    return CommuneIndex(read_geojson(LAYERS["adm3"]))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _tier_index(tier, version):
+    return CommuneIndex(load_boundaries("adm3", tier, properties=["ADM3_PCODE", "ADM3_EN", "ADM2_EN"]))
+
+
+def load_commune_index(tier=None):
+    """Index over the source ADM3 polygons or, with ``tier``, over the
+    simplified polygons the map draws at that tier."""
+    if tier is None:
+        return commune_index(file_version(LAYERS["adm3"]))
+    return _tier_index(tier, boundaries_version("adm3", tier))
+
+
+# --------------------------------------------------
+# COMPTAGES PAR COMMUNE
+# --------------------------------------------------
+
+def _points(paths, columns):
+    """Yield chunks of ``CHUNK_POINTS`` rows with numeric ``lon``/``lat``."""
+    for path in paths:
+        yield from read_chunks(path, columns, chunk_rows=CHUNK_POINTS, numeric=("lon", "lat"))
+
+
+def household_chunks(paths):
+    """Registry chunks as ``commune`` (pcode, missing when unassigned) and ``category``."""
+    index = load_commune_index()
+    pcodes = np.append(index.pcodes, None)  # position -1 (unassigned) -> None
+
+    for chunk in _points(paths, HOUSEHOLD_COLUMNS):
+        commune = index.assign(chunk["lon"], chunk["lat"])
+        yield pd.DataFrame({
+            "commune": pd.array(pcodes[commune], dtype="string"),
+            "category": chunk["category"].array,
+        })
+
+
+def count_sites(index, paths):
+    """Payment sites per commune, plus those left unassigned."""
+    counts = np.zeros(len(index), dtype=np.int64)
+    unassigned = 0
+
+    for chunk in _points(paths, SITE_COLUMNS):
+        commune = index.assign(chunk["lon"], chunk["lat"])
+        unassigned += int((commune < 0).sum())
+        counts += np.bincount(commune[commune >= 0], minlength=len(index))
+
+    return index.frame({"Sites": counts}), unassigned
+
+
+@st.cache_data(show_spinner=False)
+def _site_counts(version):
+    return count_sites(load_commune_index(), registry_files("payment_sites"))
+
+
+def load_site_counts():
+    """``(sites per commune, unassigned)``, or ``None`` without a site list."""
+    paths = registry_files("payment_sites")
+    if not paths:
+        return None
+    return _site_counts(file_version(LAYERS["adm3"], *paths))
@@ -0,0 +1,313 @@
+"""Local beneficiary/payment store (Parquet, partitioned by distribution and
+district) and the query API the pages read from.
+
+Layout: ``data/store/beneficiaries/distribution=3/district=MG25217/*.parquet``.
+Rows are sorted by commune inside each file, so a filter such as
+``commune == "MG25217030"`` skips whole row groups from their min/max
+statistics on top of the partition pruning on distribution and district.
+
+Fill it with ``python -m scripts.ingest_payments <payment_code> <distribution>``.
+An ingest writes the new partition next to the store and swaps it in, so a
+failed run leaves the previous one in place, then records the partition's
+fingerprint in ``_versions.json``. Store versions are read from that file
+(one ``stat`` per call) instead of listing every Parquet file.
+"""
+import glob
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import streamlit as st
+
+from utils.payments import export_files, export_header, read_chunks
+from utils.versioning import file_version, value_version
+
+STORE_DIR = os.path.join("data", "store", "beneficiaries")
+# Hidden from the dataset by its "_" prefix
+VERSIONS_FILE = "_versions.json"
+ROW_GROUP_ROWS = 64_000
+
+# HOPE export header -> store column
+RECORD_COLUMNS = {
+    "household_id": "household_id",
+    "individual_id": "beneficiary_id",
+    "admin2": "district",
+    "admin3": "commune",
+    "beneficiary_category": "category",
+    "entitlement_quantity": "amount_plan",
+    "delivered_quantity": "amount_paid",
+}
+
+# Columns not present in every export (null in the store when missing)
+OPTIONAL_RECORD_COLUMNS = {
+    "payment_site": "site",
+}
+
+SCHEMA = pa.schema([
+    ("payment_code", pa.string()),
+    ("household_id", pa.string()),
+    ("beneficiary_id", pa.string()),
+    ("commune", pa.string()),
+    ("category", pa.string()),
+    ("site", pa.string()),
+    ("amount_plan", pa.float64()),
+    ("amount_paid", pa.float64()),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("distribution", pa.int8()), ("district", pa.string())]),
+    flavor="hive",
+)
+
+# category code -> column shown on the pages
+CATEGORIES = {
+    "enfant": "Enfants",
+    "handicap": "Handicap",
+    "femme_enceinte": "Femmes_Enceintes",
+}
+
+
+def distribution_number(name):
+    """``"Distribution 3"`` -> ``3``."""
+    return int(str(name).split()[-1])
+
+
+# --------------------------------------------------
+# ÉCRITURE
+# --------------------------------------------------
+
+def ingest_plan(payment_code, distribution, store_dir=STORE_DIR):
+    """Stream a plan's exports into the store, replacing that distribution.
+
+    The partition is written to a staging directory inside ``store_dir``
+    (hidden from readers by its ``.`` prefix) and swapped in once complete.
+    Returns the number of rows written.
+    """
+    paths = export_files(payment_code)
+    if not paths:
+        raise FileNotFoundError(f"No export found for {payment_code}")
+
+    os.makedirs(store_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=store_dir, prefix=".ingest-")
+    partition = f"distribution={distribution}"
+    try:
+        rows = _write_partition(paths, payment_code, distribution, staging)
+        _swap(os.path.join(staging, partition), os.path.join(store_dir, partition), staging)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    _record_version(store_dir, distribution)
+    return rows
+
+
+def _write_partition(paths, payment_code, distribution, base_dir):
+    rows = 0
+    for i, path in enumerate(paths):
+        header = export_header(path)
+        optional = {k: v for k, v in OPTIONAL_RECORD_COLUMNS.items() if k in header}
+        for j, chunk in enumerate(read_chunks(path, {**RECORD_COLUMNS, **optional})):
+            for column in set(OPTIONAL_RECORD_COLUMNS.values()) - set(optional.values()):
+                chunk[column] = pd.NA
+            chunk["payment_code"] = payment_code
+            chunk["category"] = chunk["category"].str.lower()
+            chunk = chunk.sort_values(["district", "commune"], kind="stable")
+
+            table = pa.Table.from_pandas(
+                chunk[SCHEMA.names + ["district"]],
+                schema=SCHEMA.append(pa.field("district", pa.string())),
+                preserve_index=False,
+            )
+            table = table.append_column(
+                "distribution", pa.array([distribution] * len(chunk), pa.int8())
+            )
+            ds.write_dataset(
+                table,
+                base_dir,
+                format="parquet",
+                partitioning=PARTITIONING,
+                basename_template=f"{payment_code}-{i}-{j}-{{i}}.parquet",
+                max_rows_per_group=ROW_GROUP_ROWS,
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            rows += len(chunk)
+    return rows
+
+
+def _swap(new, path, staging):
+    """Put directory ``new`` at ``path``; the previous one goes to ``staging``."""
+    previous = None
+    if os.path.exists(path):
+        previous = os.path.join(staging, "previous")
+        os.replace(path, previous)
+    try:
+        if os.path.exists(new):
+            os.replace(new, path)
+    except BaseException:
+        if previous is not None:
+            os.replace(previous, path)
+        raise
+
+
+def _partition_files(store_dir, distribution=None):
+    root = store_dir if distribution is None else os.path.join(store_dir, f"distribution={distribution}")
+    return sorted(glob.glob(os.path.join(root, "**", "*.parquet"), recursive=True))
+
+
+def _record_version(store_dir, distribution):
+    path = os.path.join(store_dir, VERSIONS_FILE)
+    versions = dict(_versions(store_dir))
+    files = _partition_files(store_dir, distribution)
+    if files:
+        versions[str(distribution)] = file_version(*files)
+    else:
+        versions.pop(str(distribution), None)
+
+    fd, tmp = tempfile.mkstemp(dir=store_dir, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(versions, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+# --------------------------------------------------
+# LECTURE
+# --------------------------------------------------
+
+def _scan_versions(store_dir):
+    """Versions of a store ingested before ``_versions.json`` existed."""
+    versions = {}
+    for directory in glob.glob(os.path.join(store_dir, "distribution=*")):
+        files = _partition_files(directory)
+        if files:
+            versions[directory.rsplit("=", 1)[1]] = file_version(*files)
+    return versions
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _read_versions(path, version):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _versions(store_dir):
+    """``{distribution: fingerprint}`` of the partitions in the store (read-only)."""
+    path = os.path.join(store_dir, VERSIONS_FILE)
+    if os.path.exists(path):
+        return _read_versions(path, file_version(path))
+    return _scan_versions(store_dir)
+
+
+def store_version(store_dir=STORE_DIR, distribution=None):
+    """Fingerprint of the whole store, or of one distribution's partition."""
+    versions = _versions(store_dir)
+    if distribution is not None:
+        return versions.get(str(distribution))
+    return value_version(versions) if versions else None
+
+
+@st.cache_resource(show_spinner=False)
+def open_dataset(version, store_dir=STORE_DIR):
+    """Dataset handle (file listing + schema), shared by every session."""
+    return ds.dataset(store_dir, format="parquet", partitioning=PARTITIONING)
+
+
+def _filter(distribution=None, district=None, commune=None):
+    expr = None
+    for field, value in (("distribution", distribution), ("district", district), ("commune", commune)):
+        if value is None:
+            continue
+        cond = ds.field(field).isin(value) if isinstance(value, (list, tuple, set)) else ds.field(field) == value
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def query_table(columns=None, distribution=None, district=None, commune=None):
+    """Arrow table of matching rows; only matching partitions/row groups are read."""
+    version = store_version()
+    if version is None:
+        return None
+    dataset = open_dataset(version)
+    return dataset.to_table(columns=columns, filter=_filter(distribution, district, commune))
+
+
+def query(columns=None, distribution=None, district=None, commune=None):
+    """Same as :func:`query_table`, as a DataFrame."""
+    table = query_table(columns, distribution, district, commune)
+    return None if table is None else table.to_pandas()
+
+
+def record_chunks(columns, distribution=None, district=None, commune=None):
+    """Matching rows as DataFrames, one per record batch (bounded memory)."""
+    version = store_version()
+    if version is None:
+        return
+    dataset = open_dataset(version)
+    for batch in dataset.to_batches(columns=columns, filter=_filter(distribution, district, commune)):
+        yield batch.to_pandas()
+
+
+def available_distributions():
+    return sorted(int(d) for d in _versions(STORE_DIR))
+
+
+# --------------------------------------------------
+# AGRÉGATS SERVIS AUX PAGES
+# --------------------------------------------------
+
+@st.cache_data(show_spinner=False)
+def _distribution_totals(distribution, version):
+    table = query_table(["household_id", "amount_plan", "amount_paid"], distribution=distribution)
+    if table.num_rows == 0:
+        return None
+
+    paid = table.filter(pc.greater(table["amount_paid"], 0))
+    return {
+        "households_plan": pc.count_distinct(table["household_id"]).as_py(),
+        "households_reach": pc.count_distinct(paid["household_id"]).as_py(),
+        "cash_plan": pc.sum(table["amount_plan"]).as_py(),
+        "cash_reach": pc.sum(table["amount_paid"]).as_py(),
+        "rows": table.num_rows,
+    }
+
+
+def load_distribution_totals(distribution):
+    """KPI-card aggregates of a distribution, or ``None`` if not in the store."""
+    version = store_version()
+    if version is None:
+        return None
+    return _distribution_totals(distribution, version)
+
+
+def commune_totals(distribution):
+    """Households and cash per commune for one distribution (uncached)."""
+    table = query_table(
+        ["district", "commune", "household_id", "amount_plan", "amount_paid"],
+        distribution=distribution,
+    )
+    if table is None or table.num_rows == 0:
+        return None
+
+    paid = table.filter(pc.greater(table["amount_paid"], 0))
+    keys = ["district", "commune"]
+    plan = table.group_by(keys).aggregate([
+        ("household_id", "count_distinct"),
+        ("amount_plan", "sum"),
+        ("amount_paid", "sum"),
+    ]).to_pandas()
+    reach = paid.group_by(keys).aggregate([("household_id", "count_distinct")]).to_pandas()
+
+    totals = plan.merge(reach, on=keys, how="left", suffixes=("", "_reach"))
+    return totals.rename(columns={
+        "household_id_count_distinct": "households_plan",
+        "household_id_count_distinct_reach": "households_reach",
+        "amount_plan_sum": "cash_plan",
+        "amount_paid_sum": "cash_reach",
+    }).fillna({"households_reach": 0})
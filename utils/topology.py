@@ -0,0 +1,273 @@
+"""Shared-arc topology for polygon layers (TopoJSON-style).
+
+Rings are cut at junctions (vertices where the set of neighbouring polygons
+changes) into arcs, and each arc is stored once. Simplifying an arc therefore
+simplifies both sides of a shared border identically, so communes and
+districts still line up after simplification.
+
+Arc references follow the TopoJSON convention: ``i`` is arc ``i`` in stored
+order, ``~i`` (``-i - 1``) is arc ``i`` reversed.
+"""
+import numpy as np
+
+
+# --------------------------------------------------
+# CONSTRUCTION
+# --------------------------------------------------
+
+def _polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def _open_ring(ring):
+    pts = [tuple(p[:2]) for p in ring]
+    if len(pts) > 1 and pts[0] == pts[-1]:
+        pts = pts[:-1]
+    return pts
+
+
+def _junctions(rings):
+    """Vertices whose neighbour pair differs between the rings using them."""
+    neighbours = {}
+    junctions = set()
+
+    for ring in rings:
+        n = len(ring)
+        for i, pt in enumerate(ring):
+            pair = frozenset((ring[i - 1], ring[(i + 1) % n]))
+            seen = neighbours.setdefault(pt, pair)
+            if seen != pair:
+                junctions.add(pt)
+
+    return junctions
+
+
+def _cut_ring(ring, junctions):
+    """Split an open ring into arcs that start and end on junctions."""
+    cuts = [i for i, pt in enumerate(ring) if pt in junctions]
+
+    if not cuts:
+        # Ring shared as a whole (or not at all): rotate to a canonical start
+        # so both sides produce the same closed arc.
+        start = min(range(len(ring)), key=ring.__getitem__)
+        rotated = ring[start:] + ring[:start]
+        return [rotated + [rotated[0]]]
+
+    rotated = ring[cuts[0]:] + ring[:cuts[0]]
+    offsets = [c - cuts[0] for c in cuts] + [len(ring)]
+    rotated = rotated + [rotated[0]]
+    return [rotated[a:b + 1] for a, b in zip(offsets, offsets[1:])]
+
+
+class Topology:
+    """Arcs plus, per layer, features expressed as arc references."""
+
+    def __init__(self, arcs, objects):
+        self.arcs = arcs          # list of (n, 2) float arrays
+        self.objects = objects    # layer -> list of (properties, polygons)
+        self._weights = None
+
+    @classmethod
+    def from_layers(cls, layers):
+        """Build a topology from ``{name: FeatureCollection}``."""
+        parsed = {}
+        all_rings = []
+
+        for name, collection in layers.items():
+            features = []
+            for feature in collection["features"]:
+                polygons = [
+                    [_open_ring(ring) for ring in polygon]
+                    for polygon in _polygons(feature["geometry"])
+                ]
+                all_rings.extend(r for polygon in polygons for r in polygon)
+                features.append((feature["properties"], polygons))
+            parsed[name] = features
+
+        junctions = _junctions(all_rings)
+        arcs = []
+        index = {}
+
+        def arc_ref(points):
+            key = tuple(points)
+            if key in index:
+                return index[key]
+            reverse = key[::-1]
+            if reverse in index:
+                return ~index[reverse]
+            index[key] = len(arcs)
+            arcs.append(np.asarray(points, dtype=float))
+            return index[key]
+
+        objects = {}
+        for name, features in parsed.items():
+            objects[name] = [
+                (props, [
+                    [[arc_ref(a) for a in _cut_ring(ring, junctions)] for ring in polygon]
+                    for polygon in polygons
+                ])
+                for props, polygons in features
+            ]
+
+        return cls(arcs, objects)
+
+    # --------------------------------------------------
+    # SIMPLIFICATION
+    # --------------------------------------------------
+
+    @property
+    def weights(self):
+        """Douglas–Peucker importance of every vertex of every arc.
+
+        A vertex is kept at tolerance ``t`` when its weight is ``>= t``;
+        endpoints are always kept. Computed once, shared by all tiers.
+        """
+        if self._weights is None:
+            self._weights = [_dp_weights(arc) for arc in self.arcs]
+        return self._weights
+
+    def _min_points(self):
+        """Minimum vertices per arc so that no ring collapses."""
+        need = np.full(len(self.arcs), 2)
+        for features in self.objects.values():
+            for _, polygons in features:
+                for polygon in polygons:
+                    for ring in polygon:
+                        # A ring needs 3 distinct vertices: 1 closed arc -> 4
+                        # points, 2 arcs -> 3 points each.
+                        per_arc = {1: 4, 2: 3}.get(len(ring), 2)
+                        for ref in ring:
+                            i = ref if ref >= 0 else ~ref
+                            need[i] = max(need[i], per_arc)
+        return need
+
+    def simplified_arcs(self, tolerance):
+        """Arcs simplified at ``tolerance`` (same units as the coordinates)."""
+        if not tolerance:
+            return self.arcs
+
+        need = self._min_points()
+        out = []
+        for arc, w, k in zip(self.arcs, self.weights, need):
+            keep = w >= tolerance
+            if keep.sum() < min(k, len(arc)):
+                keep = np.zeros(len(arc), dtype=bool)
+                keep[np.argsort(-w, kind="stable")[:k]] = True
+            out.append(arc[keep])
+        return out
+
+    # --------------------------------------------------
+    # EXPORT
+    # --------------------------------------------------
+
+    def to_geojson(self, name, tolerance=0.0):
+        """Rebuild layer ``name`` as a GeoJSON FeatureCollection."""
+        arcs = self.simplified_arcs(tolerance)
+        features = []
+
+        for props, polygons in self.objects[name]:
+            rings = [[_stitch(arcs, ring) for ring in polygon] for polygon in polygons]
+            if len(rings) == 1:
+                geometry = {"type": "Polygon", "coordinates": rings[0]}
+            else:
+                geometry = {"type": "MultiPolygon", "coordinates": rings}
+            features.append({"type": "Feature", "properties": props, "geometry": geometry})
+
+        return {"type": "FeatureCollection", "features": features}
+
+    def to_topojson(self, names, tolerance=0.0, precision=1e-5, properties=None):
+        """Quantized, delta-encoded TopoJSON of the layers ``names``.
+
+        Coordinates are snapped to a grid of ``precision`` (coordinate units)
+        and each arc stores its first point followed by integer deltas.
+        Only the arcs used by ``names`` are kept; ``properties`` optionally
+        maps a layer name to the property keys to keep.
+        """
+        arcs = self.simplified_arcs(tolerance)
+        used = sorted({
+            ref if ref >= 0 else ~ref
+            for name in names
+            for _, polygons in self.objects[name]
+            for polygon in polygons for ring in polygon for ref in ring
+        })
+        remap = {old: new for new, old in enumerate(used)}
+
+        def ref(r):
+            return remap[r] if r >= 0 else ~remap[~r]
+
+        origin = np.min([arcs[i].min(axis=0) for i in used], axis=0)
+        encoded = []
+        for i in used:
+            q = np.round((arcs[i] - origin) / precision).astype(np.int64)
+            keep = np.ones(len(q), dtype=bool)
+            keep[1:] = (np.diff(q, axis=0) != 0).any(axis=1)
+            q = q[keep]
+            if len(q) < 2:
+                q = np.vstack([q, q])
+            encoded.append(np.vstack([q[:1], np.diff(q, axis=0)]).tolist())
+
+        objects = {}
+        for name in names:
+            keys = (properties or {}).get(name)
+            geometries = []
+            for props, polygons in self.objects[name]:
+                rings = [[[ref(r) for r in ring] for ring in polygon] for polygon in polygons]
+                geometries.append({
+                    "type": "Polygon" if len(rings) == 1 else "MultiPolygon",
+                    "arcs": rings[0] if len(rings) == 1 else rings,
+                    "properties": props if keys is None else {k: props.get(k) for k in keys},
+                })
+            objects[name] = {"type": "GeometryCollection", "geometries": geometries}
+
+        return {
+            "type": "Topology",
+            "transform": {"scale": [precision, precision], "translate": origin.tolist()},
+            "objects": objects,
+            "arcs": encoded,
+        }
+
+    def vertex_count(self, tolerance=0.0):
+        return int(sum(len(a) for a in self.simplified_arcs(tolerance)))
+
+
+def _stitch(arcs, refs):
+    coords = []
+    for ref in refs:
+        pts = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+        coords.extend(pts[1:].tolist() if coords else pts.tolist())
+    if coords[0] != coords[-1]:
+        coords.append(coords[0])
+    return coords
+
+
+def _dp_weights(pts):
+    n = len(pts)
+    weights = np.zeros(n)
+    weights[0] = weights[-1] = np.inf
+    stack = [(0, n - 1, np.inf)]
+
+    while stack:
+        i, j, cap = stack.pop()
+        if j <= i + 1:
+            continue
+
+        a, b = pts[i], pts[j]
+        seg = pts[i + 1:j]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            dist = np.hypot(*(seg - a).T)
+        else:
+            dist = np.abs(ab[0] * (seg[:, 1] - a[1]) - ab[1] * (seg[:, 0] - a[0])) / length
+
+        k = int(np.argmax(dist))
+        w = min(dist[k], cap)
+        weights[i + 1 + k] = w
+        stack.append((i, i + 1 + k, w))
+        stack.append((i + 1 + k, j, w))
+
+    return weights
@@ -0,0 +1,216 @@
+"""Render-time tracing of the pages.
+
+Each entry point opens a trace with ``trace = trace_page("app")`` and marks
+its sections (``trace.section("kpis")``): a section lasts until the next
+mark or ``trace.end()``, which also records the whole rerun as ``total``.
+Finer work inside a section (figure build and serialisation, map layers,
+the ``st_folium`` round trip) is timed with ``with span("..."):`` and
+recorded as ``<section> / <name>``.
+
+Every timing goes to:
+
+* a rotating JSON-lines log, ``logs/render.log`` (5 x 2 MB);
+* ``logs/render_metrics.prom``, Prometheus text format (a summary per page
+  and section), rewritten at most every ``PROM_INTERVAL`` seconds, for the
+  node_exporter textfile collector;
+* an in-process window of the last ``WINDOW`` timings per section, shown by
+  :func:`performance_panel` to admins (``?admin=<ZARA_MIRA_ADMIN_TOKEN>``).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "render.log")
+PROM_FILE = os.path.join(LOG_DIR, "render_metrics.prom")
+PROM_INTERVAL = 15  # seconds
+WINDOW = 200  # timings kept per section for the panel
+ADMIN_TOKEN_ENV = "ZARA_MIRA_ADMIN_TOKEN"
+
+_local = threading.local()
+
+
+# --------------------------------------------------
+# AGRÉGATION (partagée par le processus)
+# --------------------------------------------------
+
+class Timings:
+    """Recent durations plus running count/sum per (page, section)."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._recent = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._written = 0.0
+
+    def record(self, page, section, seconds):
+        key = (page, section)
+        with self._lock:
+            self._recent.setdefault(key, deque(maxlen=self.window)).append(seconds)
+            count, total = self._totals.get(key, (0, 0.0))
+            self._totals[key] = (count + 1, total + seconds)
+
+    def summary(self):
+        """p50/p95/max (ms) over the recent window, slowest p95 first."""
+        with self._lock:
+            recent = {key: np.array(values) for key, values in self._recent.items()}
+        rows = [
+            {
+                "page": page,
+                "section": section,
+                "n": len(values),
+                "p50 (ms)": np.percentile(values, 50) * 1000,
+                "p95 (ms)": np.percentile(values, 95) * 1000,
+                "max (ms)": values.max() * 1000,
+            }
+            for (page, section), values in recent.items()
+        ]
+        columns = ["page", "section", "n", "p50 (ms)", "p95 (ms)", "max (ms)"]
+        return pd.DataFrame(rows, columns=columns).sort_values("p95 (ms)", ascending=False)
+
+    def prometheus(self):
+        """Prometheus text exposition of every section."""
+        with self._lock:
+            recent = {key: np.array(values) for key, values in self._recent.items()}
+            totals = dict(self._totals)
+
+        lines = [
+            "# HELP zara_mira_render_seconds Render time of page sections.",
+            "# TYPE zara_mira_render_seconds summary",
+        ]
+        for (page, section), values in sorted(recent.items()):
+            labels = f'page="{_escape(page)}",section="{_escape(section)}"'
+            for q in (0.5, 0.95):
+                lines.append(f'zara_mira_render_seconds{{{labels},quantile="{q}"}} {np.quantile(values, q):.6f}')
+            count, total = totals[(page, section)]
+            lines.append(f"zara_mira_render_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"zara_mira_render_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=PROM_FILE, force=False):
+        """Rewrite the textfile, at most every ``PROM_INTERVAL`` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._written < PROM_INTERVAL:
+                return
+            self._written = now
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+@st.cache_resource(show_spinner=False)
+def timings():
+    """The process-wide :class:`Timings`, with its rotating log attached."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    logger = logging.getLogger("zara_mira.render")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(LOG_FILE, maxBytes=2 * 1024 * 1024, backupCount=5, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return Timings()
+
+
+def _record(page, section, seconds):
+    store = timings()
+    store.record(page, section, seconds)
+    logging.getLogger("zara_mira.render").info(json.dumps({
+        "ts": round(time.time(), 3),
+        "pid": os.getpid(),
+        "page": page,
+        "section": section,
+        "ms": round(seconds * 1000, 2),
+    }, ensure_ascii=False))
+    try:
+        store.write_prometheus()
+    except OSError:
+        pass
+
+
+# --------------------------------------------------
+# TRACES DE PAGE
+# --------------------------------------------------
+
+class PageTrace:
+    """Sections of one rerun of a page, timed back to back."""
+
+    def __init__(self, page):
+        self.page = page
+        self.current = None
+        self._started = time.perf_counter()
+        self._section_start = None
+
+    def _close(self):
+        if self.current is not None:
+            _record(self.page, self.current, time.perf_counter() - self._section_start)
+            self.current = None
+
+    def section(self, name):
+        """End the running section (if any) and start ``name``."""
+        self._close()
+        self.current = name
+        self._section_start = time.perf_counter()
+
+    def end(self):
+        """End the last section and record the whole rerun as ``total``."""
+        self._close()
+        _record(self.page, "total", time.perf_counter() - self._started)
+
+
+def trace_page(page):
+    """Start the trace of this rerun (the script thread's current trace)."""
+    _local.trace = PageTrace(page)
+    return _local.trace
+
+
+@contextmanager
+def span(name):
+    """Time a block, attributed to the current page and section."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = getattr(_local, "trace", None)
+        page = trace.page if trace else "-"
+        if trace and trace.current:
+            name = f"{trace.current} / {name}"
+        _record(page, name, time.perf_counter() - start)
+
+
+# --------------------------------------------------
+# PANNEAU ADMIN
+# --------------------------------------------------
+
+def is_admin():
+    token = os.environ.get(ADMIN_TOKEN_ENV)
+    return bool(token) and st.query_params.get("admin") == token
+
+
+def performance_panel():
+    """Sidebar p50/p95 per section, for admins only."""
+    if not is_admin():
+        return
+    summary = timings().summary()
+    with st.sidebar.expander("Performance (p50 / p95)"):
+        if summary.empty:
+            st.caption("Aucune mesure pour l'instant.")
+            return
+        st.dataframe(summary.round(1), hide_index=True, use_container_width=True)
+        st.caption(f"{WINDOW} dernières mesures par section ; journal : {LOG_FILE}")
@@ -0,0 +1,30 @@
+"""Data-version fingerprints used as cache keys across pages."""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+
+def frame_version(*frames):
+    """Content hash of one or more DataFrames (values, index and columns)."""
+    h = hashlib.sha1()
+    for df in frames:
+        h.update(",".join(map(str, df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()[:16]
+
+
+def file_version(*paths):
+    """Cheap fingerprint of files on disk (path, size, mtime)."""
+    h = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        h.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return h.hexdigest()[:16]
+
+
+def value_version(value):
+    """Content hash of a JSON-serialisable value (dicts, lists, scalars)."""
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
@@ -0,0 +1,231 @@
+"""Viewport clipping of the boundary layers for the Zones map.
+
+The map no longer ships whole layers: each rerun sends only the features
+that intersect the current view, clipped to it. The view reported by
+``st_folium`` (bounds and zoom) is padded by ``PADDING`` viewports on each
+side and snapped outward to a grid of square cells as wide as one 256 px
+map tile (``360 / 2**zoom`` degrees). The grid is linear in degrees on both
+axes: its rows are not the Web Mercator tile rows, it only needs to be
+stable. Small pans stay inside the same snapped box and reuse the same
+layers; the browser only receives new ones once the view leaves the box.
+
+Each layer and tier is indexed once per boundary version in a shapely
+``STRtree`` over the tier geometries of the boundary store. A box costs one
+tree query plus ``clip_by_rect`` on the features crossing its border, and
+the clipped layers are encoded as TopoJSON like the whole-layer payloads
+(shared arcs, quantized to the tier's ``PRECISION``). The payload of a view
+depends on what is visible at that zoom, not on how many communes the
+layers hold; a ``limit`` on the features per box (communes on the Zones
+page) keeps zoomed-out views over a large coverage bounded too.
+"""
+import math
+import os
+
+import numpy as np
+import shapely
+import streamlit as st
+
+from utils.boundaries import (
+    GEOMETRY_COLUMN,
+    LAYERS,
+    PRECISION,
+    boundaries_version,
+    load_boundaries,
+    open_store,
+    store_path,
+)
+from utils.topology import Topology
+from utils.versioning import file_version
+
+TILE_PIXELS = 256
+
+# Viewports of margin around the view on each side, before snapping
+PADDING = 0.5
+
+# Box clips kept per process (each is a few tens of KB of TopoJSON)
+MAX_CLIPS = 256
+
+# Properties sent with the clipped layers: the district name for the
+# tooltip, the pcode only for communes (their detail is loaded on click).
+VIEW_PROPERTIES = {
+    "adm2": ("ADM2_PCODE", "ADM2_EN"),
+    "adm3": ("ADM3_PCODE",),
+}
+
+
+def tile_degrees(zoom):
+    """Width in degrees of one map tile at ``zoom``."""
+    return 360 / 2 ** int(zoom)
+
+
+def viewport_around(center, zoom, width, height):
+    """``(west, south, east, north)`` of a ``width`` x ``height`` px view.
+
+    Used before the map has reported its bounds. Latitudes use the
+    longitude scale, which slightly overestimates the view off the equator.
+    """
+    per_pixel = tile_degrees(zoom) / TILE_PIXELS
+    lat, lon = center
+    return (
+        lon - width / 2 * per_pixel,
+        lat - height / 2 * per_pixel,
+        lon + width / 2 * per_pixel,
+        lat + height / 2 * per_pixel,
+    )
+
+
+def leaflet_bounds(bounds):
+    """``(west, south, east, north)`` of ``st_folium``'s ``bounds``, or ``None``."""
+    try:
+        south_west, north_east = bounds["_southWest"], bounds["_northEast"]
+        box = (south_west["lng"], south_west["lat"], north_east["lng"], north_east["lat"])
+    except (KeyError, TypeError):
+        return None
+    if any(v is None for v in box) or box[0] >= box[2] or box[1] >= box[3]:
+        return None
+    return tuple(float(v) for v in box)
+
+
+def tile_box(viewport, zoom, padding=PADDING):
+    """Padded ``viewport`` snapped outward to the degree grid of ``zoom``.
+
+    Cells are :func:`tile_degrees` wide in longitude and in latitude alike
+    (a linear grid, not the Mercator tile rows). Returns
+    ``(zoom, x0, y0, x1, y1)`` in cell units: a hashable cache key that
+    stays the same while the view moves inside the padding.
+    """
+    west, south, east, north = viewport
+    pad_x = (east - west) * padding
+    pad_y = (north - south) * padding
+    step = tile_degrees(zoom)
+    return (
+        int(zoom),
+        math.floor((west - pad_x) / step),
+        math.floor((south - pad_y) / step),
+        math.ceil((east + pad_x) / step),
+        math.ceil((north + pad_y) / step),
+    )
+
+
+def box_bounds(box):
+    """``(west, south, east, north)`` in degrees of a :func:`tile_box` key."""
+    zoom, x0, y0, x1, y1 = box
+    step = tile_degrees(zoom)
+    return (x0 * step, y0 * step, x1 * step, y1 * step)
+
+
+# --------------------------------------------------
+# INDEX SPATIAL
+# --------------------------------------------------
+
+class LayerIndex:
+    """STRtree over the features of one layer at one tier."""
+
+    def __init__(self, geometries, properties):
+        self.geometries = np.asarray(geometries)
+        self.properties = properties
+        self.tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_store(cls, store, properties):
+        table = store.table
+        geometries = shapely.from_wkb(table.column(GEOMETRY_COLUMN).to_numpy(zero_copy_only=False))
+        return cls(geometries, table.select(list(properties)).to_pylist())
+
+    @classmethod
+    def from_geojson(cls, collection):
+        features = collection["features"]
+        return cls(
+            [shapely.geometry.shape(f["geometry"]) for f in features],
+            [f["properties"] for f in features],
+        )
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def query(self, bounds):
+        """Positions of the features intersecting ``bounds``, in index order."""
+        return np.sort(self.tree.query(shapely.box(*bounds), predicate="intersects"))
+
+    def clip(self, bounds, hits=None):
+        """FeatureCollection of the features in ``bounds``, clipped to it.
+
+        Features entirely inside are kept as they are; only those crossing
+        the border are cut. ``hits`` reuses a :meth:`query` result.
+        """
+        box = shapely.box(*bounds)
+        hits = self.query(bounds) if hits is None else hits
+        geometries = self.geometries[hits]
+        crossing = ~shapely.contains_properly(box, geometries)
+        geometries[crossing] = shapely.clip_by_rect(geometries[crossing], *bounds)
+
+        features = []
+        for row, geometry in zip(hits, geometries):
+            if shapely.is_empty(geometry) or geometry.geom_type not in ("Polygon", "MultiPolygon"):
+                continue
+            features.append({
+                "type": "Feature",
+                "properties": self.properties[row],
+                "geometry": shapely.geometry.mapping(geometry),
+            })
+        return {"type": "FeatureCollection", "features": features}
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_index(layer, tier, properties, version):
+    path = store_path(layer, tier)
+    if os.path.exists(path):
+        return LayerIndex.from_store(open_store(layer, tier, file_version(path)), properties)
+    return LayerIndex.from_geojson(load_boundaries(layer, tier, properties=properties))
+
+
+def layer_version(tier):
+    """Version of the boundary geometries served at ``tier``."""
+    return "-".join(boundaries_version(layer, tier) for layer in LAYERS)
+
+
+def load_layer_index(layer, tier, properties=None):
+    """Process-wide :class:`LayerIndex` of ``layer`` at ``tier``.
+
+    ``properties`` are the attributes kept per feature (``VIEW_PROPERTIES``
+    by default).
+    """
+    properties = tuple(properties or VIEW_PROPERTIES[layer])
+    return _cached_index(layer, tier, properties, layer_version(tier))
+
+
+# --------------------------------------------------
+# DÉCOUPAGE PAR VUE
+# --------------------------------------------------
+
+def _empty_topojson(layer):
+    return {
+        "type": "Topology",
+        "objects": {layer: {"type": "GeometryCollection", "geometries": []}},
+        "arcs": [],
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CLIPS)
+def _clipped_topojson(layer, tier, box, properties, limit, version):
+    index = load_layer_index(layer, tier, properties)
+    bounds = box_bounds(box)
+    hits = index.query(bounds)
+    if limit is not None and len(hits) > limit:
+        return None
+    clipped = index.clip(bounds, hits)
+    if not clipped["features"]:
+        return _empty_topojson(layer)
+    # Geometries are already simplified for the tier: quantize only.
+    return Topology.from_layers({layer: clipped}).to_topojson([layer], 0.0, PRECISION[tier])
+
+
+def clipped_topojson(layer, tier, box, properties=None, limit=None):
+    """TopoJSON of ``layer`` at ``tier`` inside the :func:`tile_box` ``box``.
+
+    Cached per layer, tier, box and boundary version; ``objects[layer]``
+    holds the clipped features with ``properties`` (``VIEW_PROPERTIES`` by
+    default). ``None`` when the box holds more than ``limit`` features.
+    """
+    properties = tuple(properties or VIEW_PROPERTIES[layer])
+    return _clipped_topojson(layer, tier, box, properties, limit, layer_version(tier))
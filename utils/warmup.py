@@ -0,0 +1,78 @@
+"""Once-per-process warm-up of heavy modules and shared state.
+
+Every entry point calls ``warm_up()`` right after ``st.set_page_config``. The
+first call in a worker process starts a background thread that imports the
+modules the pages load lazily (Plotly Express, folium and the Leaflet
+component) and builds what the default map view needs (the district index
+at the low tier), while the first visitor's page renders. Everything else is
+built by the first page that uses it. Later calls, from any session, return
+immediately.
+
+The thread runs without a script run context: it belongs to no session.
+Streamlit's "missing ScriptRunContext" warning is filtered out for it.
+"""
+import importlib
+import logging
+import threading
+import time
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+THREAD_NAME = "zara-mira-warmup"
+
+# Logger of Streamlit's "missing ScriptRunContext" warning
+CONTEXT_LOGGER = "streamlit.runtime.scriptrunner_utils.script_run_context"
+
+PRELOAD_MODULES = [
+    "plotly.express",
+    "folium",
+    "folium.plugins",
+    "streamlit_folium",
+    "pyarrow.dataset",
+    "shapely",
+]
+
+
+def _preload_modules():
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as exc:
+            logger.warning("warm-up: cannot import %s (%s)", name, exc)
+
+
+def _preload_state():
+    from utils.boundaries import TIERS
+    from utils.viewport import load_layer_index
+
+    # Districts at the coarsest tier: the Zones map at its opening zoom.
+    load_layer_index("adm2", TIERS[0][0])
+
+
+class _WarmUpFilter(logging.Filter):
+    """Drop the missing-context warnings logged from the warm-up thread."""
+
+    def filter(self, record):
+        return record.threadName != THREAD_NAME
+
+
+def _run():
+    start = time.perf_counter()
+    _preload_modules()
+    try:
+        _preload_state()
+    except Exception:
+        # Best effort: the page that needs the state builds it itself.
+        logger.exception("warm-up: preloading shared state failed")
+    logger.info("warm-up done in %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+@st.cache_resource(show_spinner=False)
+def warm_up():
+    """Start the warm-up thread (once per process) and return it."""
+    logging.getLogger(CONTEXT_LOGGER).addFilter(_WarmUpFilter())
+    thread = threading.Thread(target=_run, name=THREAD_NAME, daemon=True)
+    thread.start()
+    return thread